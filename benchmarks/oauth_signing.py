@@ -0,0 +1,56 @@
+"""
+Compare per-request oauthlib clients with a long-lived OAuth1Signer.
+
+Run with ``python benchmarks/oauth_signing.py [iterations]``.
+"""
+
+import sys
+import time
+
+from oauthlib import oauth1
+
+from txtwitter.oauth import OAuth1Signer
+
+
+CREDS = ('consumer-key', 'consumer-secret', 'token-key', 'token-secret')
+URI = 'https://api.twitter.com/1.1/statuses/update.json'
+PARAMS = {
+    'status': 'Hello, world! This is a tweet of a fairly typical length.',
+    'in_reply_to_status_id': '240854986559455234',
+    'trim_user': 'true',
+}
+BODY = 'status=Hello%2C+world%21+This+is+a+tweet+of+a+fairly+typical+length.'
+BODY += '&in_reply_to_status_id=240854986559455234&trim_user=true'
+
+
+def sign_oauthlib():
+    consumer_key, consumer_secret, token_key, token_secret = CREDS
+    client = oauth1.Client(
+        consumer_key, client_secret=consumer_secret,
+        resource_owner_key=token_key, resource_owner_secret=token_secret,
+        encoding='utf-8', decoding='utf-8')
+    client.sign(URI, http_method='POST', body=BODY, headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+    })
+
+
+def make_sign_signer():
+    signer = OAuth1Signer(*CREDS)
+    return lambda: signer.sign('POST', URI, PARAMS)
+
+
+def bench(name, func, iterations):
+    start = time.time()
+    for _ in xrange(iterations):
+        func()
+    elapsed = time.time() - start
+    print '%-24s %10.0f requests/sec' % (name, iterations / elapsed)
+
+
+def main(iterations=20000):
+    bench('oauthlib.oauth1.Client', sign_oauthlib, iterations)
+    bench('OAuth1Signer', make_sign_signer(), iterations)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,109 @@
+"""
+Compare the set_*_param() helpers with the ones they replaced.
+
+Run with ``python benchmarks/param_encoding.py [iterations]``.
+"""
+
+import sys
+import timeit
+
+from txtwitter.twitter import (
+    set_bool_param, set_float_param, set_list_param, set_str_param)
+
+
+BASE_URI = 'https://api.twitter.com/1.1/'
+RESOURCE = 'statuses/update.json'
+VALUES = {
+    'status': u'Hello, world! This is a tweet of a fairly typical length.',
+    'in_reply_to_status_id': '240854986559455234',
+    'lat': 37.7821120598956,
+    'long': -122.400612831116,
+    'trim_user': True,
+    'media_ids': [471592142565957632, 471592142565957633],
+}
+
+
+# The parameter helpers as they were before the encode_*() functions.
+
+def old_set_float_param(params, name, value, min=None, max=None):
+    if value is None:
+        return
+    try:
+        value = float(str(value))
+    except:
+        raise ValueError(name)
+    if min is not None and value < min:
+        raise ValueError(name)
+    if max is not None and value > max:
+        raise ValueError(name)
+    params[name] = str(value)
+
+
+def old_set_list_param(params, name, value, min_len=None, max_len=None):
+    if value is None:
+        return
+    if type(value) is dict:
+        raise ValueError(name)
+    try:
+        value = list(value)
+    except:
+        raise ValueError(name)
+    if min_len is not None and len(value) < min_len:
+        raise ValueError(name)
+    if max_len is not None and len(value) > max_len:
+        raise ValueError(name)
+    list_str = ''
+    for item in value:
+        list_str += '%s,' % item
+    set_str_param(params, name, list_str)
+
+
+def old_make_uri(base_uri, resource):
+    return "%s/%s" % (base_uri.rstrip('/'), resource.lstrip('/'))
+
+
+def old_path(status, in_reply_to_status_id=None, lat=None, long=None,
+             place_id=None, display_coordinates=None, trim_user=None,
+             media_ids=None):
+    params = {}
+    set_str_param(params, 'status', status)
+    set_str_param(params, 'in_reply_to_status_id', in_reply_to_status_id)
+    old_set_float_param(params, 'lat', lat, min=-90, max=90)
+    old_set_float_param(params, 'long', long, min=-180, max=180)
+    set_str_param(params, 'place_id', place_id)
+    set_bool_param(params, 'display_coordinates', display_coordinates)
+    set_bool_param(params, 'trim_user', trim_user)
+    old_set_list_param(params, 'media_ids', media_ids, max_len=4)
+    return old_make_uri(BASE_URI, RESOURCE), params
+
+
+def set_param_path(status, in_reply_to_status_id=None, lat=None, long=None,
+                   place_id=None, display_coordinates=None, trim_user=None,
+                   media_ids=None):
+    params = {}
+    set_str_param(params, 'status', status)
+    set_str_param(params, 'in_reply_to_status_id', in_reply_to_status_id)
+    set_float_param(params, 'lat', lat, min=-90, max=90)
+    set_float_param(params, 'long', long, min=-180, max=180)
+    set_str_param(params, 'place_id', place_id)
+    set_bool_param(params, 'display_coordinates', display_coordinates)
+    set_bool_param(params, 'trim_user', trim_user)
+    set_list_param(params, 'media_ids', media_ids, max_len=4)
+    return old_make_uri(BASE_URI, RESOURCE), params
+
+
+def bench(name, func, iterations):
+    # The best of several runs, since the others were slowed by something
+    # else on the machine.
+    elapsed = min(timeit.repeat(
+        lambda: func(**VALUES), number=iterations, repeat=7))
+    print '%-24s %10.0f calls/sec' % (name, iterations / elapsed)
+
+
+def main(iterations=20000):
+    bench('old set_*_param()', old_path, iterations)
+    bench('new set_*_param()', set_param_path, iterations)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
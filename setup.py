@@ -19,7 +19,14 @@ setup(
     author_email='firxen@gmail.com',
     packages=find_packages(),
     include_package_data=True,
-    install_requires=['Twisted>=13.1.0', 'oauthlib', 'pyOpenSSL'],
+    install_requires=[
+        # optionsForClientTLS, IPolicyForHTTPS and IHandshakeListener are
+        # needed for TLS session resumption, and Deferred.addTimeout (16.5)
+        # for request timeouts.
+        'Twisted>=17.1.0',
+        'oauthlib',
+        'pyOpenSSL',
+    ],
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Framework :: Twisted',
@@ -0,0 +1,160 @@
+"""
+Application-only authentication.
+
+https://dev.twitter.com/docs/auth/application-only-auth
+"""
+
+from base64 import b64encode
+from StringIO import StringIO
+from urllib import quote
+from urlparse import urlsplit
+
+from twisted.internet.defer import Deferred, succeed
+from twisted.python.failure import Failure
+from twisted.web.client import FileBodyProducer, readBody
+from twisted.web.http_headers import Headers
+
+from txtwitter.error import TwitterAPIError, UnauthorizedError
+from txtwitter.twitter import TWITTER_API_URL, TwitterClient
+
+
+class BearerToken(object):
+    """
+    Obtains and caches an application's bearer token.
+
+    The token is requested the first time it is needed, and kept until it is
+    cleared. Calls that need the token while it is being requested wait for
+    the same request.
+
+    :param agent: The ``IAgent`` provider to request the token with.
+
+    :param str consumer_key: The application's consumer key.
+
+    :param str consumer_secret: The application's consumer secret.
+
+    :param str token_url: The URL of the ``oauth2/token`` endpoint.
+
+    :param decoder: A ``loads``-style callable to decode the response with.
+
+    :param str access_token: A token obtained earlier, if there is one.
+    """
+
+    def __init__(self, agent, consumer_key, consumer_secret, token_url,
+                 decoder, access_token=None):
+        self._agent = agent
+        self._credentials = b64encode(
+            '%s:%s' % (quote(consumer_key, ''), quote(consumer_secret, '')))
+        self.token_url = token_url
+        self._decoder = decoder
+        self.access_token = access_token
+        self._waiters = None
+
+    def clear(self):
+        """
+        Forget the token, so that a new one is requested when it is next
+        needed.
+        """
+        self.access_token = None
+
+    def get(self):
+        """
+        Get the token, requesting it if necessary.
+
+        :returns: A ``Deferred`` that fires with the token.
+        """
+        if self.access_token is not None:
+            return succeed(self.access_token)
+        d = Deferred()
+        if self._waiters is not None:
+            self._waiters.append(d)
+            return d
+        self._waiters = [d]
+
+        headers = Headers({
+            'Authorization': ['Basic %s' % (self._credentials,)],
+            'Content-Type': ['application/x-www-form-urlencoded'],
+        })
+        body = FileBodyProducer(StringIO('grant_type=client_credentials'))
+        request = self._agent.request('POST', self.token_url, headers, body)
+        request.addCallback(self._read_token)
+        request.addBoth(self._got_token)
+        return d
+
+    def _read_token(self, response):
+        def check_response(body):
+            if response.code != 200:
+                raise TwitterAPIError(response.code, response=body)
+            token = self._decoder(body)
+            if token.get('token_type') != 'bearer':
+                raise TwitterAPIError(
+                    response.code, "Expected a bearer token.", body)
+            return token['access_token']
+
+        return readBody(response).addCallback(check_response)
+
+    def _got_token(self, result):
+        waiters, self._waiters = self._waiters, None
+        if not isinstance(result, Failure):
+            self.access_token = result
+        for d in waiters:
+            if isinstance(result, Failure):
+                d.errback(result)
+            else:
+                d.callback(result)
+
+
+class TwitterAppClient(TwitterClient):
+    """
+    A client that authenticates as an application rather than a user.
+
+    Instead of signing every request with OAuth1, the client obtains a bearer
+    token once and sends it in a static ``Authorization`` header. App-only
+    calls have their own (often larger) rate limits, but can only read public
+    data: calls that need a user, such as posting tweets or reading home
+    timelines and user streams, will be rejected by Twitter.
+
+    If the token is rejected, it is forgotten and a new one is obtained for
+    the next call.
+
+    :param str consumer_key: The application's consumer key.
+
+    :param str consumer_secret: The application's consumer secret.
+
+    :param str bearer_token:
+        A token obtained earlier. If ``None``, one is requested when it's
+        first needed.
+
+    :param str token_url:
+        The URL to request bearer tokens from. If ``None``, the
+        ``/oauth2/token`` endpoint on the API host is used.
+
+    Any other keyword arguments are passed to :class:`TwitterClient`.
+    """
+
+    def __init__(self, consumer_key, consumer_secret, bearer_token=None,
+                 api_url=TWITTER_API_URL, token_url=None, **kw):
+        # The rate limit registry and response cache key budgets and
+        # responses by token, and the application is the "token" here.
+        TwitterClient.__init__(
+            self, 'app:%s' % (consumer_key,), '', consumer_key,
+            consumer_secret, api_url=api_url, **kw)
+        if token_url is None:
+            scheme, netloc = urlsplit(api_url)[:2]
+            token_url = '%s://%s/oauth2/token' % (scheme, netloc)
+        self.bearer_token = BearerToken(
+            self._agent, consumer_key, consumer_secret, token_url,
+            self._json_decoder, bearer_token)
+
+    def _authorization(self, method, uri, body_parameters=None):
+        return 'Bearer %s' % (self.bearer_token.access_token,)
+
+    def _make_request(self, method, uri, body_parameters=None):
+        d = self.bearer_token.get()
+        d.addCallback(lambda _: TwitterClient._make_request(
+            self, method, uri, body_parameters))
+        return d.addErrback(self._check_unauthorized)
+
+    def _check_unauthorized(self, failure):
+        if failure.check(UnauthorizedError):
+            self.bearer_token.clear()
+        return failure
@@ -0,0 +1,107 @@
+"""
+Implicit batching of single-object lookups.
+"""
+
+from twisted.internet.defer import Deferred
+
+from txtwitter.error import NotFoundError
+
+
+class BatchLoader(object):
+    """
+    Collects lookups of single objects and makes them in batches.
+
+    Each call to :meth:`load` returns a ``Deferred`` straight away. The values
+    asked for are collected until ``delay`` seconds have passed (by default,
+    until the reactor's next turn) or ``max_batch`` values are waiting, and
+    are then looked up together with one call to ``batch``. Values asked for
+    more than once in the same batch are only looked up once.
+
+    :param batch:
+        A callable that takes a list of at most ``max_batch`` values and
+        returns a ``Deferred`` that fires with a list of objects, in any
+        order.
+
+    :param key:
+        A callable that takes an object and returns the value it was looked up
+        with.
+
+    :param int max_batch: The most values to look up in one batch.
+
+    :param float delay: The time to collect values for before looking them up.
+
+    :param clock: The clock to schedule batches with.
+
+    :ivar int batches: The number of batches looked up.
+    :ivar int loads: The number of values asked for.
+    """
+
+    def __init__(self, batch, key, max_batch=100, delay=0, clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self._batch = batch
+        self._key = key
+        self.max_batch = max_batch
+        self.delay = delay
+        self.clock = clock
+        self.batches = 0
+        self.loads = 0
+        self._waiters = {}
+        self._order = []
+        self._call = None
+
+    def load(self, value):
+        """
+        Look up the object for a value.
+
+        :returns:
+            A ``Deferred`` that fires with the object, or fails with
+            :class:`txtwitter.error.NotFoundError` if there isn't one.
+        """
+        self.loads += 1
+        d = Deferred()
+        waiters = self._waiters.get(value)
+        if waiters is not None:
+            waiters.append(d)
+            return d
+        self._waiters[value] = [d]
+        self._order.append(value)
+        if len(self._order) >= self.max_batch:
+            self.dispatch()
+        elif self._call is None:
+            self._call = self.clock.callLater(self.delay, self.dispatch)
+        return d
+
+    def dispatch(self):
+        """
+        Look up the values that are waiting now, without waiting any longer
+        for more.
+        """
+        if self._call is not None:
+            if self._call.active():
+                self._call.cancel()
+            self._call = None
+        waiters, self._waiters = self._waiters, {}
+        order, self._order = self._order, []
+        for start in range(0, len(order), self.max_batch):
+            values = order[start:start + self.max_batch]
+            batch_waiters = dict((value, waiters[value]) for value in values)
+            self.batches += 1
+            d = self._batch(values)
+            d.addCallbacks(
+                self._deliver, self._fail, callbackArgs=(batch_waiters,),
+                errbackArgs=(batch_waiters,))
+
+    def _deliver(self, objects, waiters):
+        for obj in objects:
+            for d in waiters.pop(self._key(obj), []):
+                d.callback(obj)
+        for value, ds in waiters.items():
+            for d in ds:
+                d.errback(NotFoundError(404, "%r was not found." % (value,)))
+
+    def _fail(self, failure, waiters):
+        for ds in waiters.values():
+            for d in ds:
+                d.errback(failure)
@@ -0,0 +1,138 @@
+"""
+Helpers for splitting bulk API work into requests.
+"""
+
+from itertools import islice
+
+from twisted.internet.defer import gatherResults, inlineCallbacks
+
+from txtwitter.error import NotFoundError
+
+
+LOOKUP_CHUNK_SIZE = 100
+
+
+def chunks(iterable, size):
+    """
+    Split an iterable into lists of at most ``size`` items.
+
+    The iterable is consumed lazily, one chunk at a time.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def fan_out(func, items, concurrency):
+    """
+    Call a function for each item, with at most ``concurrency`` calls running
+    at once.
+
+    Items are taken from ``items`` only when a call can be made, so a large
+    (or endless) iterable is never held in memory.
+
+    :param func:
+        A callable that takes an item's index and the item, and returns a
+        ``Deferred``.
+
+    :param items: An iterable of items.
+
+    :param int concurrency: The maximum number of calls to run at once.
+
+    :returns:
+        A ``Deferred`` that fires with ``None`` once every call has finished,
+        or fails with the first failure. No new calls are made after a
+        failure.
+    """
+    items = enumerate(items)
+    state = {'failed': False}
+
+    @inlineCallbacks
+    def worker():
+        for index, item in items:
+            if state['failed']:
+                return
+            try:
+                yield func(index, item)
+            except Exception:
+                state['failed'] = True
+                raise
+
+    d = gatherResults(
+        [worker() for _ in range(concurrency)], consumeErrors=True)
+    d.addErrback(lambda f: f.value.subFailure)
+    return d.addCallback(lambda _: None)
+
+
+def lookup_all(lookup, values, key, callback=None, concurrency=4,
+               chunk_size=LOOKUP_CHUNK_SIZE):
+    """
+    Look up any number of objects with a bulk lookup endpoint.
+
+    :param lookup:
+        A callable that takes a list of at most ``chunk_size`` values and
+        returns a ``Deferred`` that fires with a list of objects.
+
+    :param values: An iterable of values (such as IDs) to look up.
+
+    :param key:
+        A callable that takes an object and returns the value it was looked up
+        with, used to put the results in the same order as ``values``.
+
+    :param callback:
+        If given, each object is passed to this callable as soon as the
+        request it came from finishes, instead of being collected. Objects
+        from each request are in order, but requests may finish in any order.
+
+    :param int concurrency: The maximum number of requests to make at once.
+
+    :param int chunk_size: The number of values to look up in each request.
+
+    :returns:
+        A ``Deferred`` that fires with a list of the objects found, in the
+        order of ``values``, or with the number of objects found if there is
+        a ``callback``. Values that aren't found are left out. A request that
+        fails with :class:`txtwitter.error.NotFoundError` (as
+        ``users/lookup`` does when none of its values are found) found
+        nothing, and the rest are still looked up.
+    """
+    results = {}
+    state = {'count': 0}
+
+    def look_up_chunk(index, chunk):
+        d = lookup(chunk).addErrback(nothing_found)
+        return d.addCallback(got_chunk, index, chunk)
+
+    def nothing_found(failure):
+        failure.trap(NotFoundError)
+        return []
+
+    def got_chunk(objects, index, chunk):
+        by_key = {}
+        for obj in objects:
+            by_key[key(obj)] = obj
+        ordered = []
+        for value in chunk:
+            obj = by_key.pop(value, None)
+            if obj is not None:
+                ordered.append(obj)
+        state['count'] += len(ordered)
+        if callback is None:
+            results[index] = ordered
+        else:
+            for obj in ordered:
+                callback(obj)
+
+    def finished(_):
+        if callback is not None:
+            return state['count']
+        merged = []
+        for index in sorted(results):
+            merged.extend(results[index])
+        return merged
+
+    d = fan_out(look_up_chunk, chunks(values, chunk_size), concurrency)
+    return d.addCallback(finished)
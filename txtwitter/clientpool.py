@@ -0,0 +1,165 @@
+"""
+Spreading read-only API calls across many access tokens.
+"""
+
+import sys
+from copy import copy
+
+from twisted.web.client import Agent
+
+from txtwitter.connectionpool import TwitterConnectionPool
+from txtwitter.ratelimit import RateLimitRegistry, normalize_endpoint
+from txtwitter.twitter import TwitterClient
+
+
+class TwitterClientPool(TwitterClient):
+    """
+    A client that makes read-only API calls with many access tokens.
+
+    Each call is made with whichever token has the most rate limit budget left
+    for its endpoint, so the pool's read capacity grows with the number of
+    tokens. Tokens with the same budget are used in turn.
+
+    All the tokens share one connection pool, TLS policy and
+    :class:`RateLimitRegistry`, and each token has its own
+    :class:`TwitterClient` (with its own cached signer) in :attr:`clients`.
+
+    Calls that change anything, upload media or read a user stream act as a
+    particular account, so the pool doesn't make them. They raise
+    ``ValueError``; use one of the :attr:`clients` instead.
+
+    :param str consumer_key: The consumer key for all the tokens.
+
+    :param str consumer_secret: The consumer secret for all the tokens.
+
+    :param list tokens: A list of ``(token_key, token_secret)`` pairs.
+
+    :param rate_limits:
+        The :class:`RateLimitRegistry` to share between the tokens. If
+        ``None``, a new one is made.
+
+    Identical GET requests are coalesced (and cached, if there is a
+    ``cache``) by the pool, whichever tokens they would be made with.
+
+    Any other keyword arguments are passed to each :class:`TwitterClient`,
+    and used by the pool in the same way.
+
+    :ivar list clients: A :class:`TwitterClient` for each token.
+    """
+
+    def __init__(self, consumer_key, consumer_secret, tokens, agent=None,
+                 pool=None, tls_policy=None, rate_limits=None, **kw):
+        if not tokens:
+            raise ValueError("At least one token is required.")
+        # The agent and rate limit registry are built here, rather than by
+        # each client, so that they are shared.
+        if agent is None:
+            if pool is None:
+                pool = TwitterConnectionPool(self.reactor)
+            if tls_policy is None:
+                from txtwitter.tls import TwitterTLSPolicy
+                tls_policy = TwitterTLSPolicy()
+            agent = Agent(self.reactor, tls_policy, pool=pool)
+        if rate_limits is None:
+            rate_limits = RateLimitRegistry()
+        self._next = 0
+        self.clients = [
+            TwitterClient(
+                token_key, token_secret, consumer_key, consumer_secret,
+                agent=agent, pool=pool, rate_limits=rate_limits, **kw)
+            for token_key, token_secret in tokens]
+        # The pool has no token of its own. It never signs a request, since
+        # every request is made by one of the clients.
+        TwitterClient.__init__(
+            self, None, None, consumer_key, consumer_secret, agent=agent,
+            pool=pool, rate_limits=rate_limits, **kw)
+
+    def _best_client(self, resource, start):
+        endpoint = normalize_endpoint(resource)
+        best = None
+        best_remaining = -1
+        for i in range(len(self.clients)):
+            client = self.clients[(start + i) % len(self.clients)]
+            remaining = self._rate_limits.remaining(
+                client._token_key, endpoint)
+            if remaining is None:
+                # We haven't used this token for this endpoint yet, so it
+                # probably has its whole budget.
+                remaining = sys.maxint
+            if remaining > best_remaining:
+                best, best_remaining = client, remaining
+        return best
+
+    def client_for(self, resource):
+        """
+        Get the client to make the next call to a resource with.
+
+        This is the client with the most rate limit budget left for the
+        resource. Clients with the same budget are returned in turn.
+
+        :param str resource: The resource, such as ``'statuses/show.json'``.
+
+        :returns: One of :attr:`clients`.
+        """
+        start = self._next
+        self._next = (start + 1) % len(self.clients)
+        return self._best_client(resource, start)
+
+    def _routed(self, resource):
+        client = self.client_for(resource)
+        if self._priority is not None or self._item_callback is not None:
+            client = copy(client)
+            client._priority = self._priority
+            client._item_callback = self._item_callback
+        return client
+
+    def rate_limit(self, resource):
+        """
+        Get the rate limit budget of the token with the most budget left for
+        an API resource.
+        """
+        return self._best_client(resource, self._next).rate_limit(resource)
+
+    def application_rate_limit_status(self, resources=None):
+        resource = 'application/rate_limit_status.json'
+        return self._routed(resource).application_rate_limit_status(resources)
+
+    def _request_api(self, resource, uri, parse):
+        # Caching and coalescing happen in the pool, so that identical calls
+        # are shared whichever tokens they would have been made with.
+        return self._routed(resource)._request_api(resource, uri, parse)
+
+    def _post_stream(self, resource, parameters):
+        return self._routed(resource)._post_stream(resource, parameters)
+
+    def _not_pooled(self, resource):
+        raise ValueError(
+            "%r acts as a particular account, so it can't be called on a"
+            " client pool." % (resource,))
+
+    def _post_api(self, resource, parameters):
+        self._not_pooled(resource)
+
+    def _upload_media(self, resource, media, params):
+        self._not_pooled(resource)
+
+    def _post_multipart(self, resource, *args, **kw):
+        self._not_pooled(resource)
+
+    def _post_upload(self, resource, parameters):
+        self._not_pooled(resource)
+
+    def _get_upload(self, resource, parameters):
+        self._not_pooled(resource)
+
+    def _get_userstream(self, resource, parameters):
+        self._not_pooled(resource)
+
+    def media_upload(self, *args, **kw):
+        # With a media cache, the upload would only fail once the media had
+        # been hashed, so we fail now.
+        self._not_pooled('media/upload.json')
+
+    def userstream_user(self, *args, **kw):
+        # The stream would only fail when it connects, so we fail now.
+        self._not_pooled('user.json')
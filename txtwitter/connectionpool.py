@@ -0,0 +1,88 @@
+from twisted.web.client import HTTPConnectionPool
+
+
+def _key_name(key):
+    """
+    Turn a connection pool key into something readable.
+
+    :class:`Agent` uses ``(scheme, host, port)`` keys, but proxy agents (and
+    possibly others) use their own format.
+    """
+    if len(key) == 3:
+        return '%s://%s:%s' % key
+    return repr(key)
+
+
+class TwitterConnectionPool(HTTPConnectionPool):
+    """
+    A persistent HTTP connection pool that keeps usage statistics.
+
+    A single pool is shared by all the hosts a :class:`TwitterClient` talks to
+    (REST, upload and streaming APIs), but connections are cached per host so
+    the per-host limit applies to each of them separately.
+
+    :param reactor: The reactor to use for connection timeouts.
+
+    :param bool persistent:
+        If ``False``, connections are closed after each request.
+
+    :param int max_per_host:
+        The maximum number of idle connections to keep open for each host. If
+        ``None``, :attr:`maxPersistentPerHost` is used.
+
+    :param float idle_timeout:
+        The number of seconds an idle connection is kept open before it is
+        closed. If ``None``, :attr:`cachedConnectionTimeout` is used.
+    """
+
+    maxPersistentPerHost = 4
+    cachedConnectionTimeout = 90
+
+    def __init__(self, reactor, persistent=True, max_per_host=None,
+                 idle_timeout=None):
+        HTTPConnectionPool.__init__(self, reactor, persistent=persistent)
+        if max_per_host is not None:
+            self.maxPersistentPerHost = max_per_host
+        if idle_timeout is not None:
+            self.cachedConnectionTimeout = idle_timeout
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.connections_expired = 0
+
+    def getConnection(self, key, endpoint):
+        self.requests += 1
+        created = self.connections_created
+        d = HTTPConnectionPool.getConnection(self, key, endpoint)
+        if self.connections_created == created:
+            self.connections_reused += 1
+        return d
+
+    def _newConnection(self, key, endpoint):
+        self.connections_created += 1
+        return HTTPConnectionPool._newConnection(self, key, endpoint)
+
+    def _removeConnection(self, key, connection):
+        self.connections_expired += 1
+        return HTTPConnectionPool._removeConnection(self, key, connection)
+
+    def stats(self):
+        """
+        Get usage statistics for this pool.
+
+        :returns:
+            A dict containing the number of ``requests`` served, the number of
+            connections ``created``, ``reused`` and ``expired``, and the number
+            of ``idle`` connections currently cached for each host.
+        """
+        idle = {}
+        for key, connections in self._connections.items():
+            if connections:
+                idle[_key_name(key)] = len(connections)
+        return {
+            'requests': self.requests,
+            'created': self.connections_created,
+            'reused': self.connections_reused,
+            'expired': self.connections_expired,
+            'idle': idle,
+        }
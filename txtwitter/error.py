@@ -1,9 +1,141 @@
+import json
+
 from twisted.web import error
 
 
 class TwitterAPIError(error.Error):
-    pass
+    """
+    An error response from the Twitter API.
+    """
+
+    @property
+    def errors(self):
+        """
+        The ``errors`` list from the response body, if there is one. Each
+        error is a dict with ``code`` and ``message`` fields.
+        """
+        try:
+            body = json.loads(self.response)
+        except (TypeError, ValueError):
+            return []
+        if not isinstance(body, dict):
+            return []
+        errors = body.get('errors')
+        if not isinstance(errors, list):
+            return []
+        return [err for err in errors if isinstance(err, dict)]
+
+    @property
+    def codes(self):
+        """
+        The Twitter error codes from the response body.
+        """
+        return [err['code'] for err in self.errors if 'code' in err]
 
 
 class RateLimitedError(TwitterAPIError):
-    pass
+    """
+    The request was rejected because a rate limit was exceeded.
+
+    :ivar reset:
+        The time (in epoch seconds) the rate limit window resets, or ``None``
+        if the response didn't say.
+    """
+    reset = None
+
+
+class ServerError(TwitterAPIError):
+    """
+    Twitter failed to handle the request. Retrying it later may succeed.
+    """
+
+
+class NotFoundError(TwitterAPIError):
+    """
+    The requested resource does not exist.
+    """
+
+
+class UnauthorizedError(TwitterAPIError):
+    """
+    The request's credentials are missing or invalid.
+    """
+
+
+class ForbiddenError(TwitterAPIError):
+    """
+    The request is understood, but is not allowed.
+    """
+
+
+class MediaProcessingError(Exception):
+    """
+    Twitter failed to process uploaded media.
+
+    :ivar dict processing_info:
+        The ``processing_info`` from the upload's status, which describes the
+        problem in its ``error`` field.
+    """
+
+    def __init__(self, processing_info):
+        error = processing_info.get('error') or {}
+        Exception.__init__(
+            self, error.get('message', 'Media processing failed.'))
+        self.processing_info = processing_info
+
+
+# Twitter error codes that tell us more than the HTTP status does.
+# https://dev.twitter.com/docs/error-codes-responses
+ERROR_CODES = {
+    32: UnauthorizedError,
+    34: NotFoundError,
+    88: RateLimitedError,
+    89: UnauthorizedError,
+    130: ServerError,
+    131: ServerError,
+    144: NotFoundError,
+}
+
+HTTP_STATUSES = {
+    401: UnauthorizedError,
+    403: ForbiddenError,
+    404: NotFoundError,
+    420: RateLimitedError,
+    429: RateLimitedError,
+}
+
+
+def make_api_error(code, response=None, headers=None):
+    """
+    Build the most specific :class:`TwitterAPIError` for an error response.
+
+    :param int code: The HTTP status code.
+
+    :param str response: The response body.
+
+    :param headers:
+        The response's ``Headers``, if available. These are used to find the
+        reset time for :class:`RateLimitedError`.
+
+    :returns: An instance of :class:`TwitterAPIError` or a subclass.
+    """
+    err = TwitterAPIError(code, response=response)
+    for twitter_code in err.codes:
+        if twitter_code in ERROR_CODES:
+            cls = ERROR_CODES[twitter_code]
+            break
+    else:
+        if code >= 500:
+            cls = ServerError
+        else:
+            cls = HTTP_STATUSES.get(code, TwitterAPIError)
+    err = cls(code, response=response)
+
+    if cls is RateLimitedError and headers is not None:
+        reset = headers.getRawHeaders('x-rate-limit-reset')
+        if reset:
+            try:
+                err.reset = int(reset[0])
+            except ValueError:
+                pass
+    return err
@@ -0,0 +1,233 @@
+"""
+Hedged requests for latency-sensitive reads.
+"""
+
+from bisect import bisect_left, insort
+from collections import deque
+
+from twisted.internet.defer import Deferred, maybeDeferred
+from twisted.python.failure import Failure
+
+from txtwitter.ratelimit import normalize_endpoint
+
+
+class LatencyTracker(object):
+    """
+    Keeps the most recent latencies for an endpoint.
+
+    The latencies are kept in sorted order as well as in the order they were
+    recorded, so that percentiles can be looked up without sorting.
+
+    :param int size: The number of latencies to keep.
+    """
+
+    def __init__(self, size=1000):
+        self._latencies = deque()
+        self._sorted = []
+        self.size = size
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def record(self, latency):
+        """
+        Record the latency of a request.
+        """
+        if len(self._latencies) >= self.size:
+            oldest = self._latencies.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        self._latencies.append(latency)
+        insort(self._sorted, latency)
+
+    def percentile(self, percentile):
+        """
+        Get a latency percentile.
+
+        :param float percentile: The percentile, between ``0`` and ``100``.
+
+        :returns:
+            The latency that ``percentile`` percent of recent requests took no
+            longer than, or ``None`` if nothing has been recorded.
+        """
+        if not self._sorted:
+            return None
+        index = int(round(percentile / 100.0 * (len(self._sorted) - 1)))
+        return self._sorted[index]
+
+
+class HedgePolicy(object):
+    """
+    Sends a second copy of slow requests and uses whichever answers first.
+
+    If a request hasn't answered by the time that ``percentile`` percent of
+    recent requests to the same endpoint had, a single duplicate (a "hedge")
+    is sent. The first successful response is used and the other request is
+    cancelled.
+
+    Hedges are paid for out of a budget so that they don't use up rate
+    limits: each request adds ``budget`` to it (up to ``max_budget``), and
+    each hedge takes one away. With the default budget, at most about one
+    request in twenty is hedged. :class:`txtwitter.twitter.TwitterClient`
+    also counts each hedge against its token's rate limit and its scheduler,
+    and doesn't hedge when the token has no more than ``min_remaining`` calls
+    left or the scheduler has no room.
+
+    The latency of the request that answers first is recorded. A request
+    that is cancelled because it lost the race is recorded too, with the
+    time it had taken so far (as a lower bound of its latency), if that is
+    longer than the winner took. Otherwise slow requests would only ever be
+    recorded when they weren't hedged, and the percentile would drift down.
+
+    Only idempotent requests may be hedged.
+
+    :param float percentile: The latency percentile to hedge at.
+
+    :param float budget: The fraction of requests that may be hedged.
+
+    :param float max_budget: The most budget that may be saved up.
+
+    :param int min_samples:
+        The number of latencies to record for an endpoint before its requests
+        are hedged.
+
+    :param float min_delay: The shortest time to wait before hedging.
+
+    :param int min_remaining:
+        The rate limit budget to leave for requests that aren't hedges.
+
+    :param clock:
+        The clock to use for timing requests and scheduling hedges. If
+        ``None``, the reactor is used.
+
+    :ivar int hedges: The number of hedges sent.
+    :ivar int hedges_won: The number of hedges that answered first.
+    """
+
+    def __init__(self, percentile=95, budget=0.05, max_budget=10,
+                 min_samples=20, min_delay=0.01, min_remaining=5,
+                 clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self.percentile = percentile
+        self.budget = budget
+        self.max_budget = max_budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.min_remaining = min_remaining
+        self.clock = clock
+        self.available = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self._trackers = {}
+
+    def tracker(self, endpoint):
+        """
+        Get the :class:`LatencyTracker` for an endpoint.
+        """
+        endpoint = normalize_endpoint(endpoint)
+        tracker = self._trackers.get(endpoint)
+        if tracker is None:
+            tracker = self._trackers[endpoint] = LatencyTracker()
+        return tracker
+
+    def delay(self, endpoint):
+        """
+        Get the time to wait for a request before hedging it.
+
+        :returns:
+            The number of seconds to wait, or ``None`` if we don't know enough
+            about the endpoint yet.
+        """
+        tracker = self.tracker(endpoint)
+        if len(tracker) < self.min_samples:
+            return None
+        return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def call(self, endpoint, func, hedge_func=None):
+        """
+        Call a function that makes a request, hedging it if it is slow.
+
+        :param str endpoint: The endpoint the request is for.
+
+        :param func:
+            A callable that makes the request and returns a ``Deferred``. It
+            is called a second time to send the hedge, unless there is a
+            ``hedge_func``.
+
+        :param hedge_func:
+            A callable that sends the hedge and returns a ``Deferred``, or
+            ``None`` if the hedge can't be sent now. A hedge that isn't sent
+            doesn't take any budget.
+
+        :returns:
+            A ``Deferred`` that fires with the first successful result, or with
+            the last failure if every request failed.
+        """
+        self.available = min(self.max_budget, self.available + self.budget)
+        tracker = self.tracker(endpoint)
+        delay = self.delay(endpoint)
+        pending = []
+        started_at = {}
+        state = {'timer': None}
+
+        def cancel(d):
+            if state['timer'] is not None:
+                state['timer'].cancel()
+                state['timer'] = None
+            for attempt in pending[:]:
+                attempt.cancel()
+
+        result = Deferred(cancel)
+
+        def send(attempt, started, hedge):
+            pending.append(attempt)
+            started_at[attempt] = started
+            attempt.addBoth(done, attempt, started, hedge)
+
+        def done(r, attempt, started, hedge):
+            pending.remove(attempt)
+            del started_at[attempt]
+            if result.called:
+                # Either we lost the race and were cancelled, or the caller
+                # cancelled us.
+                return
+            if isinstance(r, Failure) and pending:
+                # The other request may still succeed.
+                return
+            if state['timer'] is not None:
+                state['timer'].cancel()
+                state['timer'] = None
+            now = self.clock.seconds()
+            if not isinstance(r, Failure):
+                latency = now - started
+                tracker.record(latency)
+                if hedge:
+                    self.hedges_won += 1
+                for other in pending:
+                    if now - started_at[other] > latency:
+                        tracker.record(now - started_at[other])
+            result.callback(r)
+            for other in pending[:]:
+                other.cancel()
+
+        def hedge():
+            state['timer'] = None
+            if self.available < 1:
+                return
+            started = self.clock.seconds()
+            if hedge_func is None:
+                attempt = maybeDeferred(func)
+            else:
+                attempt = hedge_func()
+                if attempt is None:
+                    return
+            self.available -= 1
+            self.hedges += 1
+            send(attempt, started, True)
+
+        started = self.clock.seconds()
+        send(maybeDeferred(func), started, False)
+        if delay is not None and not result.called:
+            state['timer'] = self.clock.callLater(delay, hedge)
+        return result
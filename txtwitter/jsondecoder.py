@@ -0,0 +1,42 @@
+"""
+Pluggable JSON decoding.
+
+Decoding JSON is the largest CPU cost in a busy stream consumer, so the
+client and stream service accept any ``loads``-style callable as a decoder.
+:func:`find_json_decoder` picks the fastest one that is installed.
+"""
+
+import json
+
+
+JSON_BACKENDS = ('orjson', 'ujson', 'simplejson', 'json')
+
+
+def _import_loads(name):
+    module = __import__(name)
+    if name == 'simplejson':
+        # Without its C speedups, simplejson is slower than the stdlib.
+        from simplejson import scanner
+        if getattr(scanner, 'c_make_scanner', None) is None:
+            raise ImportError("simplejson speedups are not available.")
+    return module.loads
+
+
+def find_json_decoder(backends=JSON_BACKENDS):
+    """
+    Find the first available JSON decoder.
+
+    :param backends:
+        A sequence of module names to try, in order of preference. Each
+        module must have a ``loads()`` function.
+
+    :returns:
+        The ``loads()`` function of the first module that can be imported, or
+        ``json.loads`` if none of them can.
+    """
+    for name in backends:
+        try:
+            return _import_loads(name)
+        except ImportError:
+            continue
+    return json.loads
@@ -0,0 +1,179 @@
+"""
+Incremental parsing of JSON response bodies.
+"""
+
+import json
+import re
+
+from twisted.internet.defer import Deferred
+from twisted.internet.protocol import Protocol
+from twisted.web.client import ResponseDone
+from twisted.web.http import PotentialDataLoss
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONArrayProtocol(Protocol):
+    """
+    A protocol that parses a JSON array incrementally as it arrives.
+
+    Each element of the top-level array is decoded and passed to ``callback``
+    once it has been received, long before the whole response has arrived,
+    and only the bytes of elements that are not yet complete are kept in
+    memory.
+
+    If the body is not an array, it is buffered and decoded when the response
+    is complete.
+
+    :ivar finished:
+        A ``Deferred`` that fires when the response is complete. For an array,
+        it fires with the number of elements passed to ``callback``. For any
+        other value, it fires with the decoded value (and ``callback`` is not
+        called). Cancelling it stops the response, and nothing more is passed
+        to ``callback``.
+    """
+
+    def __init__(self, callback, decoder=None):
+        if decoder is None:
+            decoder = json.JSONDecoder()
+        self._callback = callback
+        self._decoder = decoder
+        self._buffer = ''
+        self._state = 'start'
+        # When an element is incomplete, we don't try again until we have at
+        # least twice as much data. This keeps the total work linear even if a
+        # single large element arrives in many small chunks.
+        self._retry_len = 0
+        self.items = 0
+        self.finished = Deferred(self._cancel)
+
+    def dataReceived(self, data):
+        if self._state is None:
+            return
+        self._buffer += data
+        if self._state == 'value':
+            return
+        try:
+            self._parse()
+        except Exception as e:
+            self._fail(e)
+
+    def _skip_whitespace(self, pos):
+        return _WHITESPACE.match(self._buffer, pos).end()
+
+    def _parse(self, finishing=False):
+        buf = self._buffer
+        pos = self._skip_whitespace(0)
+        if pos == len(buf):
+            self._buffer = ''
+            return
+
+        if self._state == 'start':
+            if buf[pos] != '[':
+                self._state = 'value'
+                return
+            self._state = 'first'
+            pos = self._skip_whitespace(pos + 1)
+
+        while pos < len(buf) and self._state != 'end':
+            char = buf[pos]
+            if self._state == 'next':
+                if char == ']':
+                    self._state = 'end'
+                    pos += 1
+                elif char == ',':
+                    self._state = 'item'
+                    pos = self._skip_whitespace(pos + 1)
+                else:
+                    raise ValueError(
+                        "Expected ',' or ']', got %r" % (buf[pos:pos + 20],))
+                continue
+            if self._state == 'first' and char == ']':
+                self._state = 'end'
+                pos += 1
+                continue
+
+            if len(buf) - pos < self._retry_len:
+                break
+            try:
+                item, end = self._decoder.raw_decode(buf, pos)
+            except ValueError:
+                # Not enough data yet (or invalid data, which we'll find out
+                # about when the response is complete).
+                self._retry_len = 2 * (len(buf) - pos)
+                break
+            if (not finishing and isinstance(item, (int, long, float)) and
+                    buf[end:end + 1] in ('', '.', 'e', 'E')):
+                # There may be more of this number still to come.
+                break
+            self._retry_len = 0
+            self._state = 'next'
+            self.items += 1
+            self._callback(item)
+            pos = self._skip_whitespace(end)
+
+        if self._state == 'end':
+            pos = self._skip_whitespace(pos)
+            if pos != len(buf):
+                raise ValueError(
+                    "Extra data after array: %r" % (buf[pos:pos + 20],))
+        self._buffer = buf[pos:]
+
+    def _cancel(self, d):
+        self._state = None
+        self._buffer = ''
+        if self.transport is not None:
+            self.transport.stopProducing()
+
+    def _fail(self, err):
+        self._state = None
+        self._buffer = ''
+        if self.transport is not None:
+            self.transport.stopProducing()
+        self.finished.errback(err)
+
+    def connectionLost(self, reason):
+        if self._state is None:
+            return
+        if not reason.check(ResponseDone, PotentialDataLoss):
+            self._state = None
+            self.finished.errback(reason)
+            return
+        try:
+            if self._state == 'value':
+                result = self._decoder.decode(self._buffer)
+            elif self._state != 'end':
+                self._retry_len = 0
+                self._parse(finishing=True)
+                if self._state != 'end':
+                    raise ValueError("Incomplete JSON array.")
+                result = self.items
+            else:
+                result = self.items
+        except Exception as e:
+            self._state = None
+            self.finished.errback(e)
+            return
+        self._state = None
+        self._buffer = ''
+        self.finished.callback(result)
+
+
+def parse_json_array(response, callback, decoder=None):
+    """
+    Parse a response body incrementally with :class:`JSONArrayProtocol`.
+
+    :param response: An ``IResponse`` provider.
+
+    :param callback: A callable to pass each array element to.
+
+    :param decoder:
+        A ``json.JSONDecoder`` (or something else with the same ``decode()``
+        and ``raw_decode()`` methods) to decode elements with.
+
+    :returns: The protocol's ``finished`` Deferred.
+    """
+    protocol = JSONArrayProtocol(callback, decoder)
+    response.deliverBody(protocol)
+    return protocol.finished
@@ -0,0 +1,114 @@
+"""
+The expiring LRU store shared by the response and media caches.
+"""
+
+from collections import OrderedDict
+
+
+class ExpiringLRUCache(object):
+    """
+    A store of values that expire at given times, which evicts the least
+    recently used values once it is full.
+
+    Subclasses decide how long to keep values and how big they are, and
+    build their public ``get`` and ``set`` methods on :meth:`_lookup` and
+    :meth:`_store`.
+
+    :param int max_entries:
+        The maximum number of entries to keep, or ``None`` for no limit.
+
+    :param int max_bytes:
+        The maximum total size of the entries, or ``None`` for no limit.
+
+    :param clock:
+        The clock to use for the current time. If ``None``, the reactor is
+        used.
+
+    :ivar int size: The total size of the entries.
+    :ivar int hits: The number of lookups that found a fresh entry.
+    :ivar int misses: The number of lookups that didn't.
+    :ivar int evictions: The number of entries evicted to make space.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self.clock = clock
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Each entry is a (value, expiry time, size) tuple.
+        self._entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self._fresh_entry(key) is not None
+
+    def _fresh_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self.clock.seconds():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key):
+        _value, _expires, size = self._entries.pop(key)
+        self.size -= size
+
+    def _lookup(self, key):
+        """
+        Look up a fresh entry, and count the lookup as a hit or a miss.
+
+        :returns: The entry's value, or ``None`` if there is no fresh entry.
+        """
+        entry = self._fresh_entry(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Move the entry to the most recently used end.
+        del self._entries[key]
+        self._entries[key] = entry
+        return entry[0]
+
+    def _store(self, key, value, expires, size=0):
+        """
+        Store a value, replacing any entry with the same key, and evict
+        entries until the cache is no longer full.
+
+        :param float expires: The time the value expires at.
+
+        :param int size: The size of the value, counted against ``max_bytes``.
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires, size)
+        self.size += size
+        while self._entries and (
+                (self.max_entries is not None and
+                 len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self.size > self.max_bytes)):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Remove an entry from the cache, if it is present.
+        """
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,130 @@
+"""
+Reusing uploaded media instead of uploading the same content again.
+"""
+
+import hashlib
+import os
+from copy import deepcopy
+
+from twisted.internet.defer import succeed
+from twisted.internet.threads import deferToThread
+
+from txtwitter.lrucache import ExpiringLRUCache
+
+
+def _hash_file(media, chunk_size):
+    if not (hasattr(media, 'seek') and hasattr(media, 'tell')):
+        data = media.read()
+        return hashlib.sha256(data).hexdigest(), data
+    digest = hashlib.sha256()
+    position = media.tell()
+    for chunk in iter(lambda: media.read(chunk_size), ''):
+        digest.update(chunk)
+    media.seek(position, os.SEEK_SET)
+    return digest.hexdigest(), media
+
+
+def content_hash(media, chunk_size=64 * 1024):
+    """
+    Hash the content of some media.
+
+    Files are read in a thread, so that hashing a large file doesn't block
+    the reactor. Seekable files are read from their current position in
+    chunks and then moved back, so that they can still be uploaded. Anything
+    else with a ``read`` method has to be read all at once, so its content is
+    returned to be uploaded in its place.
+
+    :param media: A string, or a file to hash from its current position.
+
+    :returns: A ``Deferred`` that fires with a ``(digest, media)`` tuple of
+        the hex SHA-256 digest and the media to upload.
+    """
+    if isinstance(media, str):
+        return succeed((hashlib.sha256(media).hexdigest(), media))
+    return deferToThread(_hash_file, media, chunk_size)
+
+
+class MediaCache(ExpiringLRUCache):
+    """
+    Remembers uploaded media by content, so that the same content isn't
+    uploaded twice.
+
+    Twitter keeps uploaded media for ``expires_after_secs`` seconds (a day, at
+    the time of writing) so that it can be attached to tweets. Each upload is
+    kept until ``margin`` seconds before then, leaving time to post the tweet
+    it is used in. Once the cache holds more than ``max_entries`` uploads, the
+    least recently used are forgotten.
+
+    Uploads are keyed by access token and ``additional_owners`` as well as by
+    content, since media can only be attached by its owners. A single cache
+    may be shared by several clients.
+
+    :param int max_entries:
+        The maximum number of uploads to remember, or ``None`` for no limit.
+
+    :param float margin:
+        The number of seconds before the media expires to stop using it.
+
+    :param clock:
+        The clock to use for the current time. If ``None``, the reactor is
+        used.
+
+    :ivar int hits: The number of lookups that found a usable upload.
+    :ivar int misses: The number of lookups that didn't.
+    :ivar int evictions: The number of uploads forgotten to make space.
+    """
+
+    def __init__(self, max_entries=1000, margin=60 * 60, clock=None):
+        ExpiringLRUCache.__init__(self, max_entries, clock=clock)
+        self.margin = margin
+
+    @staticmethod
+    def key(token, digest, additional_owners=None):
+        """
+        Build the key for an upload.
+
+        :param str token: The access token the media is uploaded with.
+
+        :param str digest: The :func:`content_hash` digest of the media.
+
+        :param list additional_owners: The other owners of the media, if any.
+        """
+        owners = tuple(sorted(set(str(o) for o in additional_owners or ())))
+        return (token, digest, owners)
+
+    def get(self, key):
+        """
+        Look up an upload.
+
+        :returns:
+            A copy of the ``media/upload`` response, with
+            ``expires_after_secs`` counting down from now rather than from
+            the upload, or ``None`` if there is no usable upload.
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None
+        response, expires_at = entry
+        response = deepcopy(response)
+        response['expires_after_secs'] = int(expires_at - self.clock.seconds())
+        return response
+
+    def set(self, key, response):
+        """
+        Remember an upload.
+
+        Responses without an ``expires_after_secs`` (or that expire within
+        ``margin`` seconds) aren't stored.
+
+        :param key: The key from :meth:`key`.
+
+        :param dict response: The ``media/upload`` response.
+        """
+        expires_after = response.get('expires_after_secs')
+        if expires_after is None or expires_after <= self.margin:
+            return
+        # Entries are kept until the margin, but remember when Twitter lets
+        # the media expire.
+        expires_at = self.clock.seconds() + expires_after
+        self._store(
+            key, (deepcopy(response), expires_at), expires_at - self.margin)
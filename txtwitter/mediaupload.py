@@ -0,0 +1,236 @@
+"""
+Chunked media uploads.
+
+https://dev.twitter.com/rest/media/uploading-media
+"""
+
+import os
+
+from twisted.internet.defer import TimeoutError
+from twisted.internet.error import ConnectError, ConnectionLost
+from twisted.internet.task import deferLater
+from twisted.web.client import RequestTransmissionFailed, ResponseFailed
+
+from txtwitter.bulk import fan_out
+from txtwitter.error import MediaProcessingError
+from txtwitter.multipart import is_real_file
+from txtwitter.retry import RetryPolicy
+
+
+# Twitter allows segments of up to 5MB. Smaller segments keep memory use down
+# and make a failed segment cheaper to send again.
+SEGMENT_SIZE = 1024 * 1024
+
+
+def file_size(media):
+    """
+    Get the number of bytes left to read in a file.
+    """
+    try:
+        return os.fstat(media.fileno()).st_size - media.tell()
+    except (AttributeError, EnvironmentError, ValueError):
+        # Not a real file, but we can still look for the end.
+        position = media.tell()
+        media.seek(0, os.SEEK_END)
+        size = media.tell() - position
+        media.seek(position)
+        return size
+
+
+class SegmentRetryPolicy(RetryPolicy):
+    """
+    A :class:`txtwitter.retry.RetryPolicy` for ``APPEND`` requests.
+
+    Sending a segment again with the same index just replaces it, so as well
+    as the failures any API call is retried for, segments that fail because of
+    the network (or time out) are retried with exponential backoff.
+    """
+
+    NETWORK_ERRORS = (
+        ConnectError, ConnectionLost, ResponseFailed,
+        RequestTransmissionFailed, TimeoutError)
+
+    def delay(self, failure, retries):
+        if retries < self.max_retries and failure.check(
+                *self.NETWORK_ERRORS):
+            return self.add_jitter(self.backoff(retries))
+        return RetryPolicy.delay(self, failure, retries)
+
+
+class ChunkedUpload(object):
+    """
+    Uploads a file in segments with the ``INIT``, ``APPEND`` and ``FINALIZE``
+    commands of ``media/upload``.
+
+    Up to ``concurrency`` segments are sent at once, each over its own
+    connection, and the upload is only finalized once every segment has been
+    sent. Failed segments are retried on their own as ``retry_policy``
+    allows, and if a segment can't be sent no new segments are started and
+    the upload fails.
+
+    Segments of regular files are streamed straight from the file (see
+    :class:`txtwitter.multipart.MultipartBodyProducer`). Other files are read
+    a segment at a time, and only when a segment can be sent, so at most
+    ``concurrency`` segments are held in memory however big the file is. Once
+    the upload is finalized, the ``STATUS`` command is polled until
+    Twitter has finished processing the media (if it needs processing).
+
+    :param client: The :class:`txtwitter.twitter.TwitterClient` to upload with.
+
+    :param file media: The file to upload, from its current position.
+
+    :param str media_type: The MIME type of the media, such as ``video/mp4``.
+
+    :param int total_bytes:
+        The size of the media. If ``None``, it is found from the file.
+
+    :param str media_category:
+        The category of the media, such as ``tweet_video``, if any.
+
+    :param list additional_owners:
+        Users (up to 100) who may also use the media in their tweets.
+
+    :param int segment_size: The number of bytes to send in each segment.
+
+    :param progress:
+        A callable that is called with the upload after each segment is sent.
+
+    :param int concurrency: The most segments to send at once.
+
+    :param retry_policy:
+        The :class:`txtwitter.retry.RetryPolicy` to retry failed segments
+        with. If ``None``, a :class:`SegmentRetryPolicy` is used.
+
+    :param clock:
+        The clock to measure throughput and wait for processing with. If
+        ``None``, the reactor is used.
+
+    :ivar str media_id: The media ID, once the upload has been started.
+    :ivar int bytes_sent: The number of bytes sent so far.
+    :ivar int segments_sent: The number of segments sent so far.
+    """
+
+    def __init__(self, client, media, media_type, total_bytes=None,
+                 media_category=None, additional_owners=None,
+                 segment_size=SEGMENT_SIZE, progress=None, concurrency=1,
+                 retry_policy=None, clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        if retry_policy is None:
+            retry_policy = SegmentRetryPolicy(clock=clock)
+        if total_bytes is None:
+            total_bytes = file_size(media)
+        self._client = client
+        self._media = media
+        self._filename = getattr(media, 'name', 'media')
+        self.media_type = media_type
+        self.total_bytes = total_bytes
+        self.media_category = media_category
+        self.additional_owners = additional_owners
+        self.segment_size = segment_size
+        self.progress = progress
+        self.concurrency = concurrency
+        self.retry_policy = retry_policy
+        self.clock = clock
+        self.media_id = None
+        self.bytes_sent = 0
+        self.segments_sent = 0
+        self._started = None
+        self._finished = None
+
+    @property
+    def elapsed(self):
+        """
+        The number of seconds spent sending segments.
+        """
+        if self._started is None:
+            return 0
+        finished = self._finished
+        if finished is None:
+            finished = self.clock.seconds()
+        return finished - self._started
+
+    @property
+    def throughput(self):
+        """
+        The average number of bytes sent per second, or ``None`` if nothing
+        has been sent yet.
+        """
+        elapsed = self.elapsed
+        if not self.bytes_sent or elapsed <= 0:
+            return None
+        return self.bytes_sent / float(elapsed)
+
+    def start(self):
+        """
+        Upload the media.
+
+        :returns:
+            A ``Deferred`` that fires with the final status of the media (a
+            dict with its ``media_id``), or fails with
+            :class:`txtwitter.error.MediaProcessingError` if Twitter couldn't
+            process it.
+        """
+        d = self._client.media_upload_init(
+            self.total_bytes, self.media_type,
+            media_category=self.media_category,
+            additional_owners=self.additional_owners)
+        d.addCallback(self._initialized)
+        d.addCallback(lambda _: self._send_segments())
+        d.addCallback(
+            lambda _: self._client.media_upload_finalize(self.media_id))
+        return d.addCallback(self._check_processing)
+
+    def _initialized(self, response):
+        self.media_id = response['media_id_string']
+
+    def _segments(self):
+        """
+        Generate the ``(data, offset, size)`` of each segment to send.
+        """
+        if is_real_file(self._media):
+            start = self._media.tell()
+            end = start + self.total_bytes
+            for offset in xrange(start, end, self.segment_size):
+                yield self._media, offset, min(self.segment_size, end - offset)
+            # Leave the file where reading it would have.
+            self._media.seek(end)
+            return
+        while True:
+            data = self._media.read(self.segment_size)
+            if not data:
+                return
+            yield data, None, len(data)
+
+    def _send_segments(self):
+        self._started = self.clock.seconds()
+        d = fan_out(self._send_segment, self._segments(), self.concurrency)
+        return d.addCallback(self._sent_segments)
+
+    def _send_segment(self, index, segment):
+        data, offset, size = segment
+        d = self.retry_policy.call(
+            lambda: self._client.media_upload_append(
+                self.media_id, index, data, self._filename, offset, size))
+        return d.addCallback(self._sent_segment, size)
+
+    def _sent_segment(self, _, size):
+        self.bytes_sent += size
+        self.segments_sent += 1
+        if self.progress is not None:
+            self.progress(self)
+
+    def _sent_segments(self, _):
+        self._finished = self.clock.seconds()
+
+    def _check_processing(self, response):
+        info = response.get('processing_info')
+        if info is None or info.get('state') == 'succeeded':
+            return response
+        if info.get('state') == 'failed':
+            raise MediaProcessingError(info)
+        d = deferLater(
+            self.clock, info.get('check_after_secs', 1),
+            self._client.media_upload_status, self.media_id)
+        return d.addCallback(self._check_processing)
@@ -0,0 +1,211 @@
+"""
+Streaming ``multipart/form-data`` request bodies.
+"""
+
+import mmap
+import os
+import stat
+from threading import Lock
+
+from twisted.internet import task
+from twisted.internet.threads import deferToThread
+from twisted.web.iweb import IBodyProducer
+from zope.interface import implementer
+
+
+BOUNDARY = 'txtwitter'
+
+# The most we write (or read from a file) at a time.
+CHUNK_SIZE = 64 * 1024
+
+# Seeking and reading a file object in a thread has to happen in one step, or
+# two producers reading the same file could interleave.
+_read_lock = Lock()
+
+
+def is_real_file(media):
+    """
+    Check whether a file object is a regular file on disk, which can be
+    mapped into memory.
+    """
+    try:
+        return stat.S_ISREG(os.fstat(media.fileno()).st_mode)
+    except (AttributeError, EnvironmentError, ValueError):
+        return False
+
+
+def _read_at(media, offset, size):
+    with _read_lock:
+        position = media.tell()
+        media.seek(offset)
+        data = media.read(size)
+        media.seek(position)
+        return data
+
+
+def _form_field(name, value):
+    return (
+        '--%s\r\n'
+        'Content-Disposition: form-data, name=%s\r\n'
+        '\r\n'
+        '%s\r\n'
+    ) % (BOUNDARY, name, value)
+
+
+def _file_header(field, filename):
+    return (
+        '--%s\r\n'
+        'Content-Disposition: form-data; name=%s; filename=%s\r\n'
+        'Content-Type: application/octet-stream\r\n'
+        '\r\n'
+    ) % (BOUNDARY, field, filename)
+
+
+@implementer(IBodyProducer)
+class MultipartBodyProducer(object):
+    """
+    Produces a ``multipart/form-data`` body with some form fields and a file.
+
+    The form fields and part headers are built up front, and the file is
+    streamed after them a chunk at a time, so the file is never held in memory
+    as a whole. The body's :attr:`length` is known in advance, so it is sent
+    with a ``Content-Length`` rather than chunked.
+
+    The file may be:
+
+    * a string, which is written as it is,
+    * a regular file, which is mapped into memory and written from the map,
+    * a file-like object with ``seek`` and ``tell``, which is read a chunk at
+      a time in a thread so that slow reads don't block the reactor, or
+    * any other object with a ``read`` method, which is read all at once.
+
+    Files are sent from ``offset`` (by default, their current position) and
+    are not moved by the producer, so the same file may be sent again, or
+    several producers may send different parts of it.
+
+    :param dict params: The form fields to send before the file.
+
+    :param str filename: The name to give the file.
+
+    :param media: The file.
+
+    :param int offset: The position in the file to start at.
+
+    :param int size:
+        The number of bytes of the file to send. If ``None``, the rest of the
+        file is sent.
+
+    :param str field: The name of the file's form field.
+
+    :param cooperator:
+        The cooperator to schedule writes with. If ``None``, the global
+        cooperator is used.
+    """
+
+    def __init__(self, params, filename, media, offset=None, size=None,
+                 field='media', cooperator=None):
+        if cooperator is None:
+            cooperator = task
+        self._cooperate = cooperator.cooperate
+        self._task = None
+
+        self._mmap = None
+        self._data = None
+        self._file = None
+        self._media = None
+        if isinstance(media, str):
+            self._data = media
+            offset, size = _window(len(media), offset, size)
+        elif is_real_file(media):
+            if offset is None:
+                offset = media.tell()
+            file_size = os.fstat(media.fileno()).st_size
+            offset, size = _window(file_size, offset, size)
+            self._file = media
+        elif hasattr(media, 'seek') and hasattr(media, 'tell'):
+            with _read_lock:
+                position = media.tell()
+                if offset is None:
+                    offset = position
+                if size is None:
+                    media.seek(0, os.SEEK_END)
+                    size = media.tell() - offset
+                    media.seek(position)
+            self._media = media
+        else:
+            # We can't find out how big it is without reading it.
+            self._data = media.read()
+            offset, size = _window(len(self._data), offset, size)
+        self._offset = offset
+        self._size = size
+
+        self._head = ''.join(
+            [_form_field(k, v) for k, v in sorted((params or {}).items())] +
+            [_file_header(field, filename)])
+        self._tail = '\r\n--%s--\r\n' % (BOUNDARY,)
+        self.length = len(self._head) + size + len(self._tail)
+
+    def startProducing(self, consumer):
+        self._task = self._cooperate(self._write(consumer))
+        d = self._task.whenDone()
+        return d.addBoth(self._finished)
+
+    def _write(self, consumer):
+        if self._file is not None and self._size:
+            # The map is made here rather than up front, so that it is
+            # always closed when we finish.
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        consumer.write(self._head)
+        yield None
+        end = self._offset + self._size
+        for start in xrange(self._offset, end, CHUNK_SIZE):
+            chunk_size = min(CHUNK_SIZE, end - start)
+            if self._data is not None:
+                consumer.write(self._data[start:start + chunk_size])
+            elif self._mmap is not None:
+                consumer.write(self._mmap[start:start + chunk_size])
+            else:
+                d = deferToThread(_read_at, self._media, start, chunk_size)
+                d.addCallback(self._write_read, consumer, chunk_size)
+                yield d
+                continue
+            yield None
+        consumer.write(self._tail)
+
+    def _write_read(self, data, consumer, expected):
+        if len(data) != expected:
+            raise IOError(
+                "Expected %d bytes of media, got %d." % (expected, len(data)))
+        consumer.write(data)
+
+    def _finished(self, result):
+        self._task = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        return result
+
+    def pauseProducing(self):
+        if self._task is not None:
+            self._task.pause()
+
+    def resumeProducing(self):
+        if self._task is not None:
+            self._task.resume()
+
+    def stopProducing(self):
+        if self._task is not None:
+            self._task.stop()
+
+
+def _window(total, offset, size):
+    if offset is None:
+        offset = 0
+    if size is None:
+        size = total - offset
+    if offset < 0 or size < 0 or offset + size > total:
+        raise ValueError(
+            "Can't send %r bytes from offset %r of %r." % (
+                size, offset, total))
+    return offset, size
@@ -0,0 +1,143 @@
+"""
+Request signing for Twitter's API.
+"""
+
+import binascii
+import hashlib
+import hmac
+import os
+import time
+from urllib import quote
+from urlparse import parse_qsl, urlsplit, urlunsplit
+
+
+def _escape(value):
+    """
+    Percent-encode a value as described in RFC 5849, section 3.6.
+    """
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return quote(str(value), safe='~')
+
+
+def _base_uri(uri):
+    """
+    Build the base string URI described in RFC 5849, section 3.4.1.2.
+    """
+    scheme, netloc, path, _query, _fragment = urlsplit(uri)
+    scheme = scheme.lower()
+    netloc = netloc.lower()
+    if (scheme, netloc[-4:]) == ('https', ':443'):
+        netloc = netloc[:-4]
+    elif (scheme, netloc[-3:]) == ('http', ':80'):
+        netloc = netloc[:-3]
+    return urlunsplit((scheme, netloc, path or '/', '', ''))
+
+
+def _generate_nonce():
+    return binascii.hexlify(os.urandom(16))
+
+
+def _generate_timestamp():
+    return str(int(time.time()))
+
+
+class OAuth1Signer(object):
+    """
+    A long-lived OAuth1 HMAC-SHA1 request signer.
+
+    Everything that doesn't change between requests (the HMAC key and the
+    static OAuth parameters, both escaped and formatted for the header) is
+    computed once, so only the nonce, timestamp and signature are generated
+    for each request.
+
+    :param str consumer_key: The application's consumer key.
+    :param str consumer_secret: The application's consumer secret.
+    :param str token_key: The user's access token.
+    :param str token_secret: The user's access token secret.
+    """
+
+    def __init__(self, consumer_key, consumer_secret, token_key,
+                 token_secret):
+        self.consumer_key = consumer_key
+        self.token_key = token_key
+        key = '%s&%s' % (_escape(consumer_secret), _escape(token_secret))
+        self._hmac = hmac.new(key, digestmod=hashlib.sha1)
+        self._static_params = [
+            ('oauth_consumer_key', _escape(consumer_key)),
+            ('oauth_signature_method', 'HMAC-SHA1'),
+            ('oauth_token', _escape(token_key)),
+            ('oauth_version', '1.0'),
+        ]
+        self._static_header = ', '.join(
+            '%s="%s"' % param for param in self._static_params)
+
+    def signature(self, method, uri, oauth_params, body_parameters=None):
+        """
+        Calculate the signature for a request.
+
+        :param str method: The HTTP method.
+
+        :param str uri: The full request URI, including any query parameters.
+
+        :param list oauth_params:
+            Escaped ``(name, value)`` pairs for the per-request OAuth
+            parameters.
+
+        :param dict body_parameters:
+            Form-encoded body parameters, if any.
+
+        :returns: The base64-encoded (but not escaped) signature.
+        """
+        params = [
+            (_escape(k), _escape(v))
+            for k, v in parse_qsl(urlsplit(uri).query, True)]
+        if body_parameters:
+            params.extend(
+                (_escape(k), _escape(v)) for k, v in body_parameters.items())
+        params.extend(self._static_params)
+        params.extend(oauth_params)
+        params.sort()
+        base_string = '&'.join([
+            method.upper(),
+            _escape(_base_uri(uri)),
+            _escape('&'.join('%s=%s' % param for param in params)),
+        ])
+        mac = self._hmac.copy()
+        mac.update(base_string)
+        return binascii.b2a_base64(mac.digest())[:-1]
+
+    def sign(self, method, uri, body_parameters=None, nonce=None,
+             timestamp=None):
+        """
+        Sign a request.
+
+        :param str method: The HTTP method.
+
+        :param str uri: The full request URI, including any query parameters.
+
+        :param dict body_parameters:
+            Form-encoded body parameters, if any. These are included in the
+            signature, so they must not be provided for multipart bodies.
+
+        :param str nonce:
+            The nonce to use. If ``None``, a random one will be generated.
+
+        :param str timestamp:
+            The timestamp to use. If ``None``, the current time will be used.
+
+        :returns: The value of the ``Authorization`` header for the request.
+        """
+        if nonce is None:
+            nonce = _generate_nonce()
+        if timestamp is None:
+            timestamp = _generate_timestamp()
+        oauth_params = [
+            ('oauth_nonce', _escape(nonce)),
+            ('oauth_timestamp', _escape(timestamp)),
+        ]
+        signature = self.signature(
+            method, uri, oauth_params, body_parameters)
+        return 'OAuth %s, %s, oauth_signature="%s"' % (
+            ', '.join('%s="%s"' % param for param in oauth_params),
+            self._static_header, _escape(signature))
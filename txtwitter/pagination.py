@@ -0,0 +1,229 @@
+"""
+Iterating over paginated API responses.
+
+https://dev.twitter.com/docs/misc/cursoring
+"""
+
+from array import array
+
+from twisted.internet.defer import (
+    inlineCallbacks, maybeDeferred, returnValue, succeed)
+
+
+# Twitter IDs are unsigned 64-bit integers, which fit in an unsigned long on
+# the 64-bit platforms we care about.
+ID_TYPECODE = 'L'
+
+
+class _PageIterator(object):
+    """
+    Iterates over pages, given how to request them and what to make of them.
+
+    :param request:
+        A callable that takes no arguments and returns a ``Deferred`` that
+        fires with the next page.
+
+    :param parse:
+        A callable that takes a page and returns ``(items, done)``, where
+        ``done`` is ``True`` if there are no pages after it.
+
+    :param bool prefetch: Whether to request the next page early.
+
+    :param bool done: ``True`` if there are no pages at all.
+
+    :ivar bool done: ``True`` once every page has been returned.
+    :ivar int pages: The number of pages returned.
+    """
+
+    def __init__(self, request, parse, prefetch=True, done=False):
+        self._request = request
+        self._parse = parse
+        self.prefetch = prefetch
+        self.done = done
+        self.pages = 0
+        self._prefetched = None
+        self._waiting = False
+
+    def next_page(self):
+        if self._waiting:
+            raise ValueError("Already waiting for a page.")
+        if self.done:
+            return succeed(None)
+        d, self._prefetched = self._prefetched, None
+        if d is None:
+            d = maybeDeferred(self._request)
+        self._waiting = True
+        d.addBoth(self._stop_waiting)
+        return d.addCallback(self._got_page)
+
+    def _stop_waiting(self, result):
+        self._waiting = False
+        return result
+
+    def _got_page(self, page):
+        items, self.done = self._parse(page)
+        self.pages += 1
+        if self.prefetch and not self.done:
+            self._prefetched = maybeDeferred(self._request)
+        return items
+
+    def stop(self):
+        """
+        Cancel the request for the next page, if it has been prefetched.
+
+        The position is unchanged, so iteration may be carried on later from
+        the same place.
+        """
+        d, self._prefetched = self._prefetched, None
+        if d is not None:
+            d.addErrback(lambda _: None)
+            d.cancel()
+
+    @inlineCallbacks
+    def each(self, callback):
+        """
+        Call a function with each of the remaining items.
+
+        :param callback: A callable to pass each item to.
+
+        :returns:
+            A ``Deferred`` that fires with the number of items once the last
+            page has been dealt with.
+        """
+        count = 0
+        while True:
+            items = yield self.next_page()
+            if items is None:
+                returnValue(count)
+            for item in items:
+                callback(item)
+            count += len(items)
+
+
+class CursorIterator(_PageIterator):
+    """
+    Iterates over the pages of IDs from a cursored endpoint such as
+    ``friends/ids``.
+
+    Each page of IDs is returned as an ``array`` of integers, which takes a
+    fraction of the memory of a list. Unless ``prefetch`` is ``False``, the
+    next page is requested as soon as a page is returned, so that it has
+    (usually) arrived by the time the current page has been dealt with.
+
+    :attr:`cursor` is the cursor of the first page that hasn't been returned
+    yet. It may be saved and passed to a new iterator to carry on from there
+    later.
+
+    :param fetch:
+        A callable that takes a cursor and returns a ``Deferred`` that fires
+        with the page at that cursor, as a dict with ``ids`` and
+        ``next_cursor`` fields.
+
+    :param int cursor: The cursor to start at. ``-1`` is the first page.
+
+    :param bool prefetch: Whether to request the next page early.
+
+    :ivar bool done: ``True`` if every page has been returned.
+    :ivar int pages: The number of pages returned.
+    """
+
+    def __init__(self, fetch, cursor=-1, prefetch=True):
+        _PageIterator.__init__(
+            self, lambda: fetch(self.cursor), self._parse_ids, prefetch,
+            done=cursor == 0)
+        self.cursor = cursor
+
+    def _parse_ids(self, page):
+        ids = array(ID_TYPECODE, page['ids'])
+        self.cursor = page['next_cursor']
+        return ids, self.cursor == 0
+
+    def next_page(self):
+        """
+        Get the next page of IDs.
+
+        :returns:
+            A ``Deferred`` that fires with an ``array`` of IDs, or with
+            ``None`` if there are no more pages. If the request for the page
+            fails, :attr:`cursor` is left alone so that it can be retried.
+        """
+        return _PageIterator.next_page(self)
+
+    @inlineCallbacks
+    def all(self):
+        """
+        Get all the remaining IDs.
+
+        :returns: A ``Deferred`` that fires with an ``array`` of IDs.
+        """
+        all_ids = array(ID_TYPECODE)
+        while True:
+            ids = yield self.next_page()
+            if ids is None:
+                returnValue(all_ids)
+            all_ids.extend(ids)
+
+
+class TimelineWalker(_PageIterator):
+    """
+    Walks backwards through a timeline such as ``statuses/user_timeline``.
+
+    Each page is requested with a ``max_id`` one less than the oldest ID on
+    the page before (``max_id`` is inclusive, so this avoids getting the
+    oldest item twice). The walk ends at the first empty page, or once it
+    reaches ``since_id``. Items at or before ``since_id`` are never returned.
+    Unless ``prefetch`` is ``False``, the next page is requested as soon as a
+    page is returned.
+
+    To pick up where a walk that was interrupted left off, start a new walker
+    with the same ``since_id`` and the old walker's :attr:`max_id`. To get
+    only items newer than a finished walk next time, use its
+    :attr:`newest_id` as the next ``since_id``.
+
+    :param fetch:
+        A callable that takes a ``max_id`` (or ``None`` for the newest page)
+        and returns a ``Deferred`` that fires with a list of items, each with
+        an ``id`` field.
+
+    :param int since_id: The ID to stop at, if any.
+
+    :param int max_id: The newest ID to start at, if any.
+
+    :param bool prefetch: Whether to request the next page early.
+
+    :ivar int max_id: The ``max_id`` of the next page.
+    :ivar int newest_id: The newest ID returned, if any.
+    :ivar bool done: ``True`` if the walk has ended.
+    :ivar int pages: The number of pages returned.
+    """
+
+    def __init__(self, fetch, since_id=None, max_id=None, prefetch=True):
+        _PageIterator.__init__(
+            self, lambda: fetch(self.max_id), self._parse_items, prefetch)
+        self.since_id = since_id
+        self.max_id = max_id
+        self.newest_id = None
+
+    def _parse_items(self, items):
+        if self.since_id is not None:
+            items = [item for item in items if item['id'] > self.since_id]
+        if not items:
+            return items, True
+        ids = [item['id'] for item in items]
+        oldest = min(ids)
+        if self.newest_id is None or max(ids) > self.newest_id:
+            self.newest_id = max(ids)
+        self.max_id = oldest - 1
+        return items, (
+            self.since_id is not None and self.max_id <= self.since_id)
+
+    def next_page(self):
+        """
+        Get the next page of items.
+
+        :returns:
+            A ``Deferred`` that fires with a list of items, or with ``None``
+            if the walk has ended. If the request for the page fails,
+            :attr:`max_id` is left alone so that it can be retried.
+        """
+        return _PageIterator.next_page(self)
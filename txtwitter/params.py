@@ -0,0 +1,121 @@
+"""
+Validating and encoding API call parameters.
+
+The ``encode_*`` functions below check the common cases (values that are
+already of the right type) first, so that they are cheap.
+"""
+
+_INT_TYPES = (int, long)
+
+
+def encode_bool(name, value):
+    """
+    Encode a boolean parameter as ``'true'`` or ``'false'``.
+
+    :raises ValueError: If the value isn't ``True`` or ``False``.
+    """
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    raise ValueError("Parameter '%s' must be boolean or None, got %r." % (
+        name, value))
+
+
+def encode_str(name, value):
+    """
+    Encode a string parameter. ``unicode`` values are encoded as UTF-8.
+
+    :raises ValueError: If the value isn't a string.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    raise ValueError("Parameter '%s' must be a string or None, got %r." % (
+        name, value))
+
+
+def _check_range(name, value, min, max):
+    if min is not None and value < min:
+        raise ValueError(
+            "Parameter '%s' must not be less than %r, got %r." % (
+                name, min, value))
+    if max is not None and value > max:
+        raise ValueError(
+            "Parameter '%s' must not be greater than %r, got %r." % (
+                name, max, value))
+
+
+def encode_float(name, value, min=None, max=None):
+    """
+    Encode a numeric (or numeric string) parameter as a float.
+
+    :raises ValueError:
+        If the value isn't numeric, or is outside ``[min, max]``.
+    """
+    if type(value) is float:
+        pass
+    elif type(value) in _INT_TYPES:
+        value = float(value)
+    else:
+        try:
+            value = float(str(value))
+        except:
+            raise ValueError(
+                "Parameter '%s' must be numeric (or a numeric string) or"
+                " None, got %r." % (name, value))
+    _check_range(name, value, min, max)
+    return str(value)
+
+
+def encode_int(name, value, min=None, max=None):
+    """
+    Encode an integer (or integer string) parameter.
+
+    :raises ValueError:
+        If the value isn't an integer, or is outside ``[min, max]``.
+    """
+    # Exact type checks, so that bools are still rejected.
+    if type(value) not in _INT_TYPES:
+        try:
+            value = int(str(value))
+        except:
+            raise ValueError(
+                "Parameter '%s' must be an integer (or a string"
+                " representation of an integer) or None, got %r." % (
+                    name, value))
+    _check_range(name, value, min, max)
+    return str(value)
+
+
+def encode_list(name, value, min_len=None, max_len=None):
+    """
+    Encode a list (or anything that can be turned into one, other than a
+    ``dict``) as a comma-separated string.
+
+    :raises ValueError:
+        If the value can't be turned into a list, or its length is outside
+        ``[min_len, max_len]``.
+    """
+    if type(value) is dict:
+        raise ValueError(
+            "Parameter '%s' cannot be a dict." % name)
+
+    try:
+        value = list(value)
+    except:
+        raise ValueError(
+            "Parameter '%s' must be a list (or a type that can be turned into"
+            " a list) or None, got %r." % (name, value))
+
+    if min_len is not None and len(value) < min_len:
+        raise ValueError(
+            "Parameter '%s' must not be shorter than %r, got %r." % (
+                name, min_len, value))
+    if max_len is not None and len(value) > max_len:
+        raise ValueError(
+            "Parameter '%s' must not be longer than %r, got %r." % (
+                name, max_len, value))
+
+    return encode_str(name, ','.join(['%s' % (item,) for item in value]))
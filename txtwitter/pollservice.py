@@ -0,0 +1,167 @@
+from twisted.application.service import Service
+from twisted.internet.defer import CancelledError, maybeDeferred
+
+from txtwitter.error import RateLimitedError
+
+
+class TwitterPollService(Service):
+    """
+    REST API polling service.
+
+    The service calls ``poll_func`` over and over, keeping track of the newest
+    ID it has seen, and passes each new item to ``delegate`` (oldest first).
+
+    The time between polls adapts to the traffic: after a poll that finds
+    something new, the interval is halved, and after one that finds nothing
+    it is increased by half, within ``[INTERVAL_MIN, INTERVAL_MAX]``. Quiet
+    timelines are polled rarely, and busy ones often.
+
+    If there is a ``rate_limit_func``, polls are also spread out so that the
+    remaining rate limit budget lasts until the window resets. A poll that is
+    rate limited anyway waits for the window to reset, and other failures
+    double the interval. Failures are passed to the ``error_callback``, if
+    there is one.
+
+    Only the newest page is fetched on each poll, so items may be missed if
+    more than a page arrives between polls. Use
+    :class:`txtwitter.pagination.TimelineWalker` to fill such gaps if they
+    matter.
+
+    :param poll_func:
+        A callable that takes a ``since_id`` (as a string, or ``None`` on the
+        first poll) and returns a ``Deferred`` that fires with a list of
+        items, each with an ``id`` field.
+
+    :param delegate: A callable to pass each new item to.
+
+    :param since_id:
+        The newest ID already seen, if any. Only items newer than this are
+        delivered.
+
+    :param rate_limit_func:
+        A callable that returns the :class:`txtwitter.ratelimit.RateLimit`
+        for the polled endpoint, or ``None`` if it is unknown.
+
+    :param float interval: The interval to start with.
+
+    :ivar int since_id:
+        The newest ID seen so far. It may be saved and passed to a new service
+        later to carry on from there.
+    """
+
+    INTERVAL_INITIAL = 60
+    INTERVAL_MIN = 5
+    INTERVAL_MAX = 60 * 15
+    INTERVAL_SPEEDUP = 0.5
+    INTERVAL_SLOWDOWN = 1.5
+    INTERVAL_ERROR_MULTIPLIER = 2
+
+    clock = None
+
+    _poll_d = None
+    _poll_delayedcall = None
+
+    error_callback = None
+    rate_limit_func = None
+
+    def __init__(self, poll_func, delegate, since_id=None,
+                 rate_limit_func=None, interval=None):
+        self.poll_func = poll_func
+        self.delegate = delegate
+        if since_id is not None:
+            since_id = int(since_id)
+        self.since_id = since_id
+        if rate_limit_func is not None:
+            self.rate_limit_func = rate_limit_func
+        if interval is None:
+            interval = self.INTERVAL_INITIAL
+        self.interval = interval
+
+    def startService(self):
+        Service.startService(self)
+
+        if self.clock is None:
+            from twisted.internet import reactor
+            self.clock = reactor
+
+        self._poll()
+
+    def stopService(self):
+        Service.stopService(self)
+        if self._poll_delayedcall is not None:
+            self._poll_delayedcall.cancel()
+            self._poll_delayedcall = None
+        if self._poll_d is not None:
+            self._poll_d.addErrback(lambda f: f.trap(CancelledError))
+            self._poll_d.cancel()
+            self._poll_d = None
+
+    def set_error_callback(self, callback):
+        self.error_callback = callback
+
+    def _poll(self):
+        self._poll_delayedcall = None
+        since_id = None
+        if self.since_id is not None:
+            since_id = str(self.since_id)
+        self._poll_d = maybeDeferred(self.poll_func, since_id)
+        self._poll_d.addCallbacks(self._got_items, self._poll_failed)
+
+    def _got_items(self, items):
+        self._poll_d = None
+        if self.since_id is not None:
+            items = [item for item in items if item['id'] > self.since_id]
+        if items:
+            items = sorted(items, key=lambda item: item['id'])
+            self.since_id = items[-1]['id']
+            self._set_interval(self.interval * self.INTERVAL_SPEEDUP)
+        else:
+            self._set_interval(self.interval * self.INTERVAL_SLOWDOWN)
+        # The next poll is scheduled first, so that a delegate that raises
+        # doesn't stop the polling.
+        self._schedule()
+        for item in items:
+            self.delegate(item)
+
+    def _poll_failed(self, failure):
+        if not self.running:
+            # We're being stopped, so we don't want to poll again.
+            return failure
+        self._poll_d = None
+        if self.error_callback is not None:
+            self.error_callback(self, failure)
+        delay = None
+        if failure.check(RateLimitedError) and failure.value.reset:
+            delay = failure.value.reset - self.clock.seconds()
+        else:
+            self._set_interval(self.interval * self.INTERVAL_ERROR_MULTIPLIER)
+        self._schedule(delay)
+
+    def _set_interval(self, interval):
+        self.interval = min(
+            self.INTERVAL_MAX, max(self.INTERVAL_MIN, interval))
+
+    def budget_interval(self):
+        """
+        Get the shortest interval between polls that won't use up the rate
+        limit budget before the window resets.
+
+        :returns: The interval in seconds, or ``0`` if the budget is unknown.
+        """
+        if self.rate_limit_func is None:
+            return 0
+        rate_limit = self.rate_limit_func()
+        if rate_limit is None:
+            return 0
+        until_reset = max(0, rate_limit.reset - self.clock.seconds())
+        if rate_limit.remaining <= 0:
+            return until_reset
+        return until_reset / float(rate_limit.remaining)
+
+    def _schedule(self, delay=None):
+        if not self.running:
+            return
+        if delay is None:
+            delay = self.interval
+        delay = max(delay, self.budget_interval())
+        self._poll_delayedcall = self.clock.callLater(delay, self._poll)
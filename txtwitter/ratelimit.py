@@ -0,0 +1,191 @@
+"""
+Rate limit tracking for Twitter's REST API.
+
+https://dev.twitter.com/docs/rate-limiting/1.1
+"""
+
+import re
+from urlparse import urlsplit
+
+from twisted.internet.defer import succeed
+from twisted.internet.task import deferLater
+
+
+RATE_LIMIT_WINDOW = 15 * 60
+
+_VERSION_RE = re.compile(r'^\d+(\.\d+)*$')
+
+
+def normalize_endpoint(resource):
+    """
+    Turn a resource name into the endpoint name used for rate limits.
+
+    Both ``'statuses/show.json'`` (as used by :class:`TwitterClient`) and
+    ``'/statuses/show/:id'`` (as used by ``application/rate_limit_status``)
+    become ``'/statuses/show'``.
+    """
+    if resource.endswith('.json'):
+        resource = resource[:-len('.json')]
+    segments = [
+        seg for seg in resource.strip('/').split('/')
+        if not seg.startswith(':')]
+    return '/' + '/'.join(segments)
+
+
+def endpoint_for_uri(uri):
+    """
+    Get the rate limit endpoint name for a full API URI.
+    """
+    segments = urlsplit(uri).path.strip('/').split('/')
+    if segments and _VERSION_RE.match(segments[0]):
+        segments = segments[1:]
+    return normalize_endpoint('/'.join(segments))
+
+
+def _int_header(headers, name):
+    values = headers.getRawHeaders(name)
+    if not values:
+        return None
+    try:
+        return int(values[0])
+    except ValueError:
+        return None
+
+
+class RateLimit(object):
+    """
+    The rate limit budget for one endpoint and token.
+
+    :ivar int limit: The number of calls allowed in each window.
+    :ivar int remaining: The number of calls left in the current window.
+    :ivar float reset: The time (in epoch seconds) the current window ends.
+    """
+
+    def __init__(self, limit, remaining, reset):
+        self.limit = limit
+        self.remaining = remaining
+        self.reset = reset
+
+    def __repr__(self):
+        return '<RateLimit %s/%s reset=%s>' % (
+            self.remaining, self.limit, self.reset)
+
+
+class RateLimitRegistry(object):
+    """
+    Tracks rate limit budgets per endpoint and token.
+
+    Budgets are updated from the ``x-rate-limit-*`` headers on each response,
+    and can be seeded from ``application/rate_limit_status``. Calls are
+    counted against the budget as they are made, so that :meth:`acquire` can
+    hold back calls that would otherwise be rejected until the window resets.
+
+    A single registry may be shared by several clients.
+
+    :param clock:
+        The clock to use for the current time and for delays. If ``None``,
+        the reactor is used.
+    """
+
+    def __init__(self, clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self.clock = clock
+        self._limits = {}
+
+    def update(self, token, endpoint, limit, remaining, reset):
+        """
+        Set the budget for an endpoint and token.
+        """
+        endpoint = normalize_endpoint(endpoint)
+        self._limits[(token, endpoint)] = RateLimit(limit, remaining, reset)
+
+    def update_from_headers(self, token, endpoint, headers):
+        """
+        Update the budget for an endpoint and token from response headers.
+
+        :param headers:
+            The response's ``Headers``. If any of the rate limit headers are
+            missing, nothing is updated.
+        """
+        limit = _int_header(headers, 'x-rate-limit-limit')
+        remaining = _int_header(headers, 'x-rate-limit-remaining')
+        reset = _int_header(headers, 'x-rate-limit-reset')
+        if None in (limit, remaining, reset):
+            return
+        current = self._limits.get((token, normalize_endpoint(endpoint)))
+        if current is not None and current.reset == reset:
+            # Calls we've made since this response was generated have
+            # already been counted, so we don't want to add them back.
+            remaining = min(remaining, current.remaining)
+        self.update(token, endpoint, limit, remaining, reset)
+
+    def update_from_status(self, token, status):
+        """
+        Update budgets from an ``application/rate_limit_status`` response.
+
+        :param dict status: The decoded response.
+        """
+        for family in status.get('resources', {}).values():
+            for endpoint, info in family.items():
+                self.update(
+                    token, endpoint, info['limit'], info['remaining'],
+                    info['reset'])
+
+    def get(self, token, endpoint):
+        """
+        Get the current budget for an endpoint and token.
+
+        If the last known window has ended, we assume a fresh window with the
+        full budget.
+
+        :returns: A :class:`RateLimit`, or ``None`` if the budget is unknown.
+        """
+        endpoint = normalize_endpoint(endpoint)
+        rate_limit = self._limits.get((token, endpoint))
+        if rate_limit is not None:
+            now = self.clock.seconds()
+            if rate_limit.reset <= now:
+                rate_limit.remaining = rate_limit.limit
+                rate_limit.reset = now + RATE_LIMIT_WINDOW
+        return rate_limit
+
+    def remaining(self, token, endpoint):
+        """
+        Get the number of calls left for an endpoint and token.
+
+        :returns: The number of calls left, or ``None`` if it is unknown.
+        """
+        rate_limit = self.get(token, endpoint)
+        if rate_limit is None:
+            return None
+        return rate_limit.remaining
+
+    def delay(self, token, endpoint):
+        """
+        Get the time to wait before a call to an endpoint would succeed.
+
+        :returns: The number of seconds to wait, or ``0`` if there is budget.
+        """
+        rate_limit = self.get(token, endpoint)
+        if rate_limit is None or rate_limit.remaining > 0:
+            return 0
+        return max(0, rate_limit.reset - self.clock.seconds())
+
+    def acquire(self, token, endpoint):
+        """
+        Wait until there is budget for a call and count the call against it.
+
+        :returns:
+            A ``Deferred`` that fires when the call may be made. If there is
+            budget (or the budget is unknown), it has already fired.
+        """
+        delay = self.delay(token, endpoint)
+        if delay > 0:
+            return deferLater(
+                self.clock, delay, self.acquire, token, endpoint)
+        rate_limit = self.get(token, endpoint)
+        if rate_limit is not None:
+            rate_limit.remaining -= 1
+        return succeed(None)
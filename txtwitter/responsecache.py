@@ -0,0 +1,101 @@
+"""
+An in-process cache for responses from idempotent API calls.
+"""
+
+from txtwitter.lrucache import ExpiringLRUCache
+from txtwitter.ratelimit import normalize_endpoint
+
+
+class ResponseCache(ExpiringLRUCache):
+    """
+    A TTL and LRU cache of raw response bodies.
+
+    Bodies are stored undecoded, so every hit is decoded afresh and callers
+    are free to modify the objects they get back.
+
+    Entries expire after a TTL that may be set per endpoint. Once the cache
+    holds more than ``max_entries`` entries or ``max_bytes`` bytes of response
+    bodies, the least recently used entries are evicted.
+
+    A single cache may be shared by several clients, since keys include the
+    access token the response was fetched with.
+
+    :param int max_entries:
+        The maximum number of entries to keep, or ``None`` for no limit.
+
+    :param int max_bytes:
+        The maximum total size of the cached bodies, or ``None`` for no limit.
+
+    :param float default_ttl:
+        The number of seconds to keep responses from endpoints that aren't in
+        ``ttls``.
+
+    :param dict ttls:
+        A mapping of endpoint names (such as ``'statuses/show.json'`` or
+        ``'/statuses/show/:id'``) to the number of seconds to keep their
+        responses. A TTL of ``0`` stops an endpoint's responses from being
+        cached.
+
+    :param clock:
+        The clock to use for the current time. If ``None``, the reactor is
+        used.
+
+    :ivar int hits: The number of lookups that found a fresh entry.
+    :ivar int misses: The number of lookups that didn't.
+    :ivar int evictions: The number of entries evicted to make space.
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=None, default_ttl=60,
+                 ttls=None, clock=None):
+        ExpiringLRUCache.__init__(self, max_entries, max_bytes, clock)
+        self.default_ttl = default_ttl
+        self._ttls = {}
+        for endpoint, ttl in (ttls or {}).items():
+            self._ttls[normalize_endpoint(endpoint)] = ttl
+
+    def ttl(self, endpoint):
+        """
+        Get the number of seconds to keep responses from an endpoint.
+        """
+        return self._ttls.get(normalize_endpoint(endpoint), self.default_ttl)
+
+    def get(self, key):
+        """
+        Look up a response body.
+
+        :returns: The cached body, or ``None`` if there is no fresh entry.
+        """
+        return self._lookup(key)
+
+    def set(self, key, endpoint, body):
+        """
+        Store a response body.
+
+        :param key: The cache key.
+
+        :param str endpoint: The endpoint the response came from.
+
+        :param str body: The raw response body.
+        """
+        ttl = self.ttl(endpoint)
+        if ttl <= 0:
+            return
+        if self.max_bytes is not None and len(body) > self.max_bytes:
+            return
+        self._store(key, body, self.clock.seconds() + ttl, len(body))
+
+    def stats(self):
+        """
+        Get usage statistics for this cache.
+
+        :returns:
+            A dict with ``hits``, ``misses``, ``evictions``, ``entries`` and
+            ``bytes`` fields.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.size,
+        }
@@ -0,0 +1,143 @@
+"""
+Retrying failed API calls.
+"""
+
+import random
+
+from twisted.internet.defer import Deferred, maybeDeferred
+
+from txtwitter.error import RateLimitedError, ServerError
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and when to retry a failed API call.
+
+    Calls that were rate limited are retried when the rate limit window
+    resets, as given by the ``x-rate-limit-reset`` header. Calls that failed
+    with a server error are retried with exponential backoff. Other failures
+    are not retried.
+
+    Every delay has some random jitter added so that many clients limited at
+    the same time don't all retry at the same moment. The jitter is never
+    more than ``backoff_initial`` seconds, so that a long wait for a rate
+    limit window to reset isn't stretched past ``max_wait``.
+
+    :param int max_retries: The maximum number of times to retry a call.
+
+    :param float max_wait:
+        The maximum total time (in seconds) to spend waiting between attempts.
+        A retry that would take us over this is not made.
+
+    :param float backoff_initial: The delay before the first backoff retry.
+
+    :param float backoff_max: The longest delay between backoff retries.
+
+    :param float jitter:
+        The largest fraction of each delay that may be added as jitter (up to
+        ``backoff_initial`` seconds).
+
+    :param clock:
+        The clock to schedule retries with. If ``None``, the reactor is used.
+    """
+    _random = staticmethod(random.random)
+
+    def __init__(self, max_retries=3, max_wait=16 * 60, backoff_initial=1,
+                 backoff_max=60, jitter=0.1, clock=None):
+        if clock is None:
+            from twisted.internet import reactor
+            clock = reactor
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.clock = clock
+
+    def delay(self, failure, retries):
+        """
+        Get the time to wait before retrying a failed call.
+
+        :param failure: The ``Failure`` the call failed with.
+
+        :param int retries: The number of times the call has been retried.
+
+        :returns:
+            The number of seconds to wait, or ``None`` if the call should not
+            be retried.
+        """
+        if retries >= self.max_retries:
+            return None
+        if failure.check(RateLimitedError) and failure.value.reset is not None:
+            delay = max(0, failure.value.reset - self.clock.seconds())
+        elif failure.check(RateLimitedError, ServerError):
+            delay = self.backoff(retries)
+        else:
+            return None
+        return self.add_jitter(delay)
+
+    def add_jitter(self, delay):
+        """
+        Add random jitter to a delay.
+
+        :param float delay: The delay without jitter.
+        """
+        return delay + min(
+            delay * self.jitter, self.backoff_initial) * self._random()
+
+    def backoff(self, retries):
+        """
+        Get the exponential backoff delay (without jitter) for a retry.
+
+        :param int retries: The number of times the call has been retried.
+        """
+        return min(self.backoff_initial * 2 ** retries, self.backoff_max)
+
+    def call(self, func):
+        """
+        Call a function that returns a ``Deferred``, retrying it on failure.
+
+        :param func:
+            A callable that makes the API call. It is called again for each
+            retry.
+
+        :returns:
+            A ``Deferred`` that fires with the result of the first successful
+            call, or with the last failure if the call is not retried again.
+            Cancelling it cancels any pending retry.
+        """
+        state = {'retries': 0, 'waited': 0, 'delayed': None, 'current': None}
+
+        def cancel(d):
+            if state['delayed'] is not None:
+                state['delayed'].cancel()
+                state['delayed'] = None
+            elif state['current'] is not None:
+                state['current'].cancel()
+
+        result = Deferred(cancel)
+
+        def attempt():
+            state['delayed'] = None
+            d = state['current'] = maybeDeferred(func)
+            d.addCallbacks(succeeded, failed)
+
+        def succeeded(r):
+            state['current'] = None
+            if not result.called:
+                result.callback(r)
+
+        def failed(f):
+            state['current'] = None
+            if result.called:
+                return
+            delay = self.delay(f, state['retries'])
+            if delay is None or state['waited'] + delay > self.max_wait:
+                result.errback(f)
+                return
+            state['retries'] += 1
+            state['waited'] += delay
+            state['delayed'] = self.clock.callLater(delay, attempt)
+
+        attempt()
+        return result
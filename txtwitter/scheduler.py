@@ -0,0 +1,220 @@
+"""
+Concurrency limits and prioritisation for API requests.
+"""
+
+from heapq import heappop, heappush
+from itertools import count
+
+from twisted.internet.defer import Deferred, maybeDeferred
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class _QueuedRequest(object):
+    cancelled = False
+    running_d = None
+
+    def __init__(self, endpoint, func, cancelled_callback):
+        self.endpoint = endpoint
+        self.func = func
+        self.d = Deferred(self._cancel)
+        self._cancelled_callback = cancelled_callback
+
+    def _cancel(self, d):
+        if self.running_d is not None:
+            self.running_d.cancel()
+        else:
+            self.cancelled = True
+            self._cancelled_callback()
+
+
+class RequestScheduler(object):
+    """
+    Limits the number of API requests in flight and queues the rest.
+
+    Requests are started in priority order (lower numbers first, and in
+    submission order within a priority) as long as neither the global nor the
+    per-endpoint limit has been reached. A request that is held back by its
+    endpoint's limit does not block requests for other endpoints.
+
+    Each endpoint has its own queue. Endpoints that are at their limit are
+    set aside until one of their requests finishes, so starting a request
+    takes logarithmic time however many requests are held back.
+
+    A single scheduler may be shared by several clients.
+
+    :param int max_in_flight:
+        The maximum number of requests in flight across all endpoints.
+
+    :param int max_in_flight_per_endpoint:
+        The maximum number of requests in flight for any single endpoint.
+    """
+
+    def __init__(self, max_in_flight=16, max_in_flight_per_endpoint=4):
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_endpoint = max_in_flight_per_endpoint
+        self.in_flight = 0
+        self._in_flight_per_endpoint = {}
+        # A heap of (priority, counter, request) for each endpoint.
+        self._queues = {}
+        # A heap of (priority, counter, endpoint) holding the first request
+        # of each endpoint that is below its limit. Entries for requests that
+        # are no longer first are skipped when they come up.
+        self._ready = []
+        # The (priority, counter) of each endpoint's live entry in _ready.
+        self._ready_heads = {}
+        self._queued = 0
+        self._counter = count()
+        self._dispatching = False
+        self._dispatch_again = False
+
+    @property
+    def queued(self):
+        return self._queued
+
+    def in_flight_for(self, endpoint):
+        return self._in_flight_per_endpoint.get(endpoint, 0)
+
+    def submit(self, endpoint, func, priority=PRIORITY_NORMAL):
+        """
+        Submit a request to be made when there is capacity for it.
+
+        :param str endpoint: The endpoint the request is for.
+
+        :param func:
+            A callable that makes the request and returns a ``Deferred`` that
+            fires when it has finished.
+
+        :param int priority:
+            The request priority. Lower numbers are more urgent.
+
+        :returns:
+            A ``Deferred`` that fires with the result of the request.
+            Cancelling it removes a queued request from the queue or cancels
+            a request in flight.
+        """
+        request = _QueuedRequest(endpoint, func, self._request_cancelled)
+        entry = (priority, next(self._counter), request)
+        heappush(self._queues.setdefault(endpoint, []), entry)
+        self._queued += 1
+        head = self._ready_heads.get(endpoint)
+        if self._endpoint_has_room(endpoint) and (
+                head is None or entry[:2] < head):
+            self._make_ready(endpoint, entry)
+        self._run_queued()
+        return request.d
+
+    def try_submit(self, endpoint, func):
+        """
+        Make a request straight away if there is capacity for it, without
+        queueing it otherwise.
+
+        :param str endpoint: The endpoint the request is for.
+
+        :param func:
+            A callable that makes the request and returns a ``Deferred`` that
+            fires when it has finished.
+
+        :returns:
+            A ``Deferred`` that fires with the result of the request (and that
+            cancels it if cancelled), or ``None`` if there is no capacity for
+            it.
+        """
+        if self.in_flight >= self.max_in_flight:
+            return None
+        if not self._endpoint_has_room(endpoint):
+            return None
+        request = _QueuedRequest(endpoint, func, self._request_cancelled)
+        self._run(request)
+        return request.d
+
+    def _request_cancelled(self):
+        self._queued -= 1
+
+    def _endpoint_has_room(self, endpoint):
+        return self.in_flight_for(endpoint) < self.max_in_flight_per_endpoint
+
+    def _make_ready(self, endpoint, entry):
+        self._ready_heads[endpoint] = entry[:2]
+        heappush(self._ready, (entry[0], entry[1], endpoint))
+
+    def _first_entry(self, endpoint):
+        """
+        Get the first request queued for an endpoint that hasn't been
+        cancelled, dropping any cancelled ones in front of it.
+        """
+        queue = self._queues.get(endpoint)
+        while queue and queue[0][2].cancelled:
+            heappop(queue)
+        if not queue:
+            self._queues.pop(endpoint, None)
+            return None
+        return queue[0]
+
+    def _run_queued(self):
+        # Requests that finish synchronously call back into this method, so
+        # we make sure we only have one dispatch loop at a time.
+        if self._dispatching:
+            self._dispatch_again = True
+            return
+        self._dispatching = True
+        try:
+            self._dispatch_again = True
+            while self._dispatch_again:
+                self._dispatch_again = False
+                self._dispatch()
+        finally:
+            self._dispatching = False
+
+    def _dispatch(self):
+        while self._ready and self.in_flight < self.max_in_flight:
+            priority, counter, endpoint = heappop(self._ready)
+            if self._ready_heads.get(endpoint) != (priority, counter):
+                # A request with a higher priority has been queued since.
+                continue
+            del self._ready_heads[endpoint]
+            entry = self._first_entry(endpoint)
+            if entry is None:
+                continue
+            if entry[1] != counter:
+                # The request this entry was for has been cancelled.
+                self._make_ready(endpoint, entry)
+                continue
+            heappop(self._queues[endpoint])
+            self._queued -= 1
+            self._run(entry[2])
+            self._endpoint_changed(endpoint)
+
+    def _endpoint_changed(self, endpoint):
+        """
+        Make sure an endpoint's first request is ready if the endpoint has
+        room for it.
+        """
+        if endpoint in self._ready_heads:
+            return
+        if not self._endpoint_has_room(endpoint):
+            return
+        entry = self._first_entry(endpoint)
+        if entry is not None:
+            self._make_ready(endpoint, entry)
+
+    def _run(self, request):
+        endpoint = request.endpoint
+        self.in_flight += 1
+        self._in_flight_per_endpoint[endpoint] = self.in_flight_for(
+            endpoint) + 1
+
+        def finished(result):
+            self.in_flight -= 1
+            self._in_flight_per_endpoint[endpoint] -= 1
+            if not self._in_flight_per_endpoint[endpoint]:
+                del self._in_flight_per_endpoint[endpoint]
+            self._endpoint_changed(endpoint)
+            self._run_queued()
+            return result
+
+        request.running_d = maybeDeferred(request.func)
+        request.running_d.addBoth(finished).chainDeferred(request.d)
@@ -17,7 +17,7 @@ class TwitterStreamProtocol(LineOnlyReceiver, TimeoutMixin):
 
     def lineReceived(self, line):
         if line:
-            self.service.delegate(json.loads(line))
+            self.service.delegate(self.service.json_decoder(line))
 
     def connectionLost(self, reason):
         self.service.connection_lost(reason)
@@ -52,6 +52,14 @@ class TwitterStreamService(Service):
     For now, we just do an exponential backoff starting at one second and
     doubling every time we reconnect to a maximum of ten minutes. For explicit
     rate limiting, we start at 30 seconds instead of one second.
+
+    Messages are decoded with ``json_decoder``, which defaults to
+    ``json.loads``. (:func:`txtwitter.jsondecoder.find_json_decoder` can be
+    used to find a faster one.)
+
+    If ``connect_timeout`` is set, a connection attempt that hasn't received
+    response headers after that many seconds is cancelled and retried like any
+    other failed connection.
     """
 
     RECONNECT_DELAY_INITIAL = 1
@@ -70,9 +78,17 @@ class TwitterStreamService(Service):
     disconnect_callback = None
     reconnect_delay = 0
 
-    def __init__(self, connect_func, delegate):
+    json_decoder = staticmethod(json.loads)
+    connect_timeout = None
+
+    def __init__(self, connect_func, delegate, json_decoder=None,
+                 connect_timeout=None):
         self.connect_func = connect_func
         self.delegate = delegate
+        if json_decoder is not None:
+            self.json_decoder = json_decoder
+        if connect_timeout is not None:
+            self.connect_timeout = connect_timeout
 
     def startService(self):
         Service.startService(self)
@@ -134,10 +150,24 @@ class TwitterStreamService(Service):
             # General HTTP error.
             self.connection_lost(Failure(TwitterAPIError(response.code)))
 
+    def _connect_failed(self, failure):
+        if not self.running:
+            # We're being stopped, so we don't want to reconnect.
+            return failure
+        self._connect_d = None
+        if failure.check(RateLimitedError):
+            if self.reconnect_delay < self.RECONNECT_DELAY_RATE_LIMIT:
+                self.reconnect_delay = self.RECONNECT_DELAY_RATE_LIMIT
+        self.connection_lost(failure)
+
     def _connect(self):
         self._reconnect_delayedcall = None
         self._connect_d = self.connect_func()
-        self._connect_d.addCallback(self._setup_stream)
+        if self.connect_timeout is not None:
+            # The connection is cancelled if we don't get response headers in
+            # time, and the resulting TimeoutError leads to a reconnect.
+            self._connect_d.addTimeout(self.connect_timeout, self.clock)
+        self._connect_d.addCallbacks(self._setup_stream, self._connect_failed)
 
     def _reconnect(self):
         if not self.running:
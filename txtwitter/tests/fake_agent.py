@@ -5,6 +5,7 @@ from twisted.internet.defer import inlineCallbacks, returnValue
 from twisted.python.failure import Failure
 from twisted.web.client import ResponseDone
 from twisted.web.http import PotentialDataLoss, RESPONSES
+from twisted.web.http_headers import Headers
 
 
 class FakeTransport(object):
@@ -21,10 +22,13 @@ class FakeResponse(object):
     finished_callback = None
     _protocol = None
 
-    def __init__(self, body, code=200):
+    def __init__(self, body, code=200, headers=None):
         self.code = code
+        self.headers = Headers(headers)
         if code == 420:
             self.phrase = 'Rate Limited'
+        elif code == 429:
+            self.phrase = 'Too Many Requests'
         else:
             self.phrase = RESPONSES[code]
 
@@ -60,6 +64,7 @@ class FakeResponse(object):
 class FakeAgent(object):
     def __init__(self):
         self.expected_requests = {}
+        self.request_headers = []
 
     def add_expected_request(self, method, uri, params, response):
         key = (method, urlsplit(uri).geturl(), tuple(sorted(params.items())))
@@ -74,6 +79,7 @@ class FakeAgent(object):
         scheme, netloc, path, query, fragment = urlsplit(uri)
         uri = urlunsplit([scheme, netloc, path, '', ''])
         params = parse_qsl(query)
+        self.request_headers.append(headers)
 
         if bodyProducer is not None:
             ctypes = headers.getRawHeaders('Content-Type')
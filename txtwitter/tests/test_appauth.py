@@ -0,0 +1,167 @@
+import json
+from base64 import b64decode
+
+from twisted.internet.defer import inlineCallbacks
+from twisted.trial.unittest import TestCase
+
+from txtwitter.tests.fake_agent import FakeAgent, FakeResponse
+
+
+TOKEN_URI = 'https://api.twitter.com/oauth2/token'
+SHOW_URI = 'https://api.twitter.com/1.1/statuses/show.json'
+
+
+def from_appauth(name):
+    @property
+    def prop(self):
+        from txtwitter import appauth
+        return getattr(appauth, name)
+    return prop
+
+
+class TestTwitterAppClient(TestCase):
+    timeout = 1
+
+    _TwitterAppClient = from_appauth('TwitterAppClient')
+
+    def _agent_and_client(self, **kw):
+        agent = FakeAgent()
+        client = self._TwitterAppClient(
+            'consumer key', 'consumer-secret', agent=agent, **kw)
+        return agent, client
+
+    def _expect_token(self, agent, body=None, code=200):
+        if body is None:
+            body = {"token_type": "bearer", "access_token": "bearer-token"}
+        agent.add_expected_request(
+            'POST', TOKEN_URI, {'grant_type': 'client_credentials'},
+            FakeResponse(json.dumps(body), code))
+
+    def _expect_statuses_show(self, agent, code=200, id_str='123'):
+        agent.add_expected_request(
+            'GET', SHOW_URI, {'id': id_str},
+            FakeResponse(json.dumps({"id_str": id_str}), code))
+
+    def _authorizations(self, agent):
+        return [headers.getRawHeaders('Authorization')[0]
+                for headers in agent.request_headers]
+
+    def test_token_url(self):
+        """
+        The token URL should be on the API host unless one is given.
+        """
+        agent, client = self._agent_and_client()
+        self.assertEqual(client.bearer_token.token_url, TOKEN_URI)
+        agent, client = self._agent_and_client(
+            api_url='http://localhost:8080/1.1/')
+        self.assertEqual(
+            client.bearer_token.token_url,
+            'http://localhost:8080/oauth2/token')
+        agent, client = self._agent_and_client(token_url='http://token/')
+        self.assertEqual(client.bearer_token.token_url, 'http://token/')
+
+    def test_given_token(self):
+        """
+        A token given to the client should be used without requesting one.
+        """
+        agent, client = self._agent_and_client(bearer_token='given-token')
+        self._expect_statuses_show(agent)
+        resp = self.successResultOf(client.statuses_show('123'))
+        self.assertEqual(resp, {"id_str": "123"})
+        self.assertEqual(self._authorizations(agent), ['Bearer given-token'])
+
+    @inlineCallbacks
+    def test_obtain_token(self):
+        """
+        The token should be requested with the consumer credentials on the
+        first call, and then reused.
+        """
+        agent, client = self._agent_and_client()
+        self._expect_token(agent)
+        self._expect_statuses_show(agent)
+        resp = yield client.statuses_show('123')
+        self.assertEqual(resp, {"id_str": "123"})
+        self._expect_statuses_show(agent)
+        yield client.statuses_show('123')
+
+        [basic, bearer1, bearer2] = self._authorizations(agent)
+        self.assertEqual(basic[:len('Basic ')], 'Basic ')
+        self.assertEqual(
+            b64decode(basic[len('Basic '):]), 'consumer%20key:consumer-secret')
+        self.assertEqual(bearer1, 'Bearer bearer-token')
+        self.assertEqual(bearer2, 'Bearer bearer-token')
+        self.assertEqual(client.bearer_token.access_token, 'bearer-token')
+
+    @inlineCallbacks
+    def test_concurrent_calls(self):
+        """
+        Calls made while the token is being requested should wait for the same
+        request.
+        """
+        agent, client = self._agent_and_client()
+        self._expect_token(agent)
+        self._expect_statuses_show(agent, id_str='123')
+        self._expect_statuses_show(agent, id_str='124')
+        d1 = client.statuses_show('123')
+        d2 = client.statuses_show('124')
+        yield d1
+        yield d2
+        self.assertEqual(self._authorizations(agent)[1:], [
+            'Bearer bearer-token', 'Bearer bearer-token'])
+        self.assertEqual(len(agent.request_headers), 3)
+
+    @inlineCallbacks
+    def test_token_error(self):
+        """
+        A failed token request should fail the call, and the next call should
+        request a token again.
+        """
+        from txtwitter.error import TwitterAPIError
+        agent, client = self._agent_and_client()
+        self._expect_token(agent, {"errors": []}, 403)
+        err = yield client.statuses_show('123').addErrback(lambda f: f.value)
+        self.assertIsInstance(err, TwitterAPIError)
+        self.assertEqual(client.bearer_token.access_token, None)
+
+        self._expect_token(agent, {"token_type": "other"})
+        err = yield client.statuses_show('123').addErrback(lambda f: f.value)
+        self.assertIsInstance(err, TwitterAPIError)
+        self.assertEqual(len(agent.request_headers), 2)
+
+    @inlineCallbacks
+    def test_token_rejected(self):
+        """
+        A rejected token should be forgotten.
+        """
+        from txtwitter.error import UnauthorizedError
+        agent, client = self._agent_and_client(bearer_token='old-token')
+        self._expect_statuses_show(agent, 401)
+        err = yield client.statuses_show('123').addErrback(lambda f: f.value)
+        self.assertIsInstance(err, UnauthorizedError)
+        self.assertEqual(client.bearer_token.access_token, None)
+
+        self._expect_token(agent)
+        self._expect_statuses_show(agent)
+        yield client.statuses_show('123')
+        self.assertEqual(
+            self._authorizations(agent)[-1], 'Bearer bearer-token')
+
+    def test_rate_limit_key(self):
+        """
+        Rate limits should be tracked for the application.
+        """
+        from twisted.internet.task import Clock
+        from txtwitter.ratelimit import RateLimitRegistry
+        registry = RateLimitRegistry(Clock())
+        agent, client = self._agent_and_client(
+            bearer_token='token', rate_limits=registry)
+        agent.add_expected_request(
+            'GET', SHOW_URI, {'id': '123'}, FakeResponse(
+                json.dumps({"id_str": "123"}), headers={
+                    'x-rate-limit-limit': ['300'],
+                    'x-rate-limit-remaining': ['299'],
+                    'x-rate-limit-reset': ['900'],
+                }))
+        self.successResultOf(client.statuses_show('123'))
+        self.assertEqual(
+            registry.remaining('app:consumer key', '/statuses/show'), 299)
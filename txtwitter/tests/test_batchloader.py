@@ -0,0 +1,134 @@
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txtwitter.error import NotFoundError
+
+
+def from_batchloader(name):
+    @property
+    def prop(self):
+        from txtwitter import batchloader
+        return getattr(batchloader, name)
+    return prop
+
+
+class TestBatchLoader(TestCase):
+    BatchLoader = from_batchloader('BatchLoader')
+
+    def _loader(self, result=None, **kw):
+        batches = []
+
+        def batch(values):
+            batches.append(values)
+            if result is not None:
+                return result
+            return succeed([{'id': v} for v in reversed(values)])
+
+        clock = Clock()
+        loader = self.BatchLoader(
+            batch, lambda obj: obj['id'], clock=clock, **kw)
+        return batches, clock, loader
+
+    def test_batches_loads(self):
+        """
+        BatchLoader should look up the values asked for in the same turn
+        together, and give each caller its own object.
+        """
+        batches, clock, loader = self._loader()
+        d1 = loader.load(1)
+        d2 = loader.load(2)
+        self.assertEqual(batches, [])
+        self.assertNoResult(d1)
+        clock.advance(0)
+        self.assertEqual(batches, [[1, 2]])
+        self.assertEqual(self.successResultOf(d1), {'id': 1})
+        self.assertEqual(self.successResultOf(d2), {'id': 2})
+        self.assertEqual((loader.batches, loader.loads), (1, 2))
+
+    def test_delay(self):
+        """
+        BatchLoader should collect values for the given delay.
+        """
+        batches, clock, loader = self._loader(delay=0.5)
+        loader.load(1)
+        clock.advance(0.4)
+        loader.load(2)
+        self.assertEqual(batches, [])
+        clock.advance(0.1)
+        self.assertEqual(batches, [[1, 2]])
+        loader.load(3)
+        clock.advance(0.5)
+        self.assertEqual(batches, [[1, 2], [3]])
+
+    def test_duplicates(self):
+        """
+        BatchLoader should only look up a value once per batch.
+        """
+        batches, clock, loader = self._loader()
+        d1 = loader.load(1)
+        d2 = loader.load(1)
+        clock.advance(0)
+        self.assertEqual(batches, [[1]])
+        self.assertEqual(self.successResultOf(d1), {'id': 1})
+        self.assertEqual(self.successResultOf(d2), {'id': 1})
+
+    def test_max_batch(self):
+        """
+        BatchLoader should look values up as soon as a full batch is waiting.
+        """
+        batches, clock, loader = self._loader(max_batch=2)
+        loader.load(1)
+        loader.load(2)
+        self.assertEqual(batches, [[1, 2]])
+        loader.load(3)
+        self.assertEqual(batches, [[1, 2]])
+        clock.advance(0)
+        self.assertEqual(batches, [[1, 2], [3]])
+        self.assertEqual(clock.getDelayedCalls(), [])
+
+    def test_not_found(self):
+        """
+        BatchLoader should fail loads for values that aren't found.
+        """
+        batches, clock, loader = self._loader(result=succeed([{'id': 1}]))
+        d1 = loader.load(1)
+        d2 = loader.load(2)
+        clock.advance(0)
+        self.assertEqual(self.successResultOf(d1), {'id': 1})
+        self.failureResultOf(d2, NotFoundError)
+
+    def test_batch_failure(self):
+        """
+        BatchLoader should fail every load in a batch that fails.
+        """
+        batches, clock, loader = self._loader(result=fail(ValueError()))
+        d1 = loader.load(1)
+        d2 = loader.load(2)
+        clock.advance(0)
+        self.failureResultOf(d1, ValueError)
+        self.failureResultOf(d2, ValueError)
+
+    def test_loads_during_batch(self):
+        """
+        BatchLoader should start a new batch for values asked for while a
+        batch is in flight.
+        """
+        pending = []
+
+        def batch(values):
+            pending.append(Deferred())
+            return pending[-1]
+
+        clock = Clock()
+        loader = self.BatchLoader(batch, lambda obj: obj['id'], clock=clock)
+        d1 = loader.load(1)
+        clock.advance(0)
+        d2 = loader.load(1)
+        clock.advance(0)
+        self.assertEqual(len(pending), 2)
+        pending[0].callback([{'id': 1}])
+        self.assertEqual(self.successResultOf(d1), {'id': 1})
+        self.assertNoResult(d2)
+        pending[1].callback([{'id': 1}])
+        self.assertEqual(self.successResultOf(d2), {'id': 1})
@@ -0,0 +1,199 @@
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.trial.unittest import TestCase
+
+
+def from_bulk(name):
+    @property
+    def prop(self):
+        from txtwitter import bulk
+        return getattr(bulk, name)
+    return prop
+
+
+class TestChunks(TestCase):
+    chunks = from_bulk('chunks')
+
+    def test_chunks(self):
+        """
+        chunks should split an iterable into lists of at most the given size.
+        """
+        self.assertEqual(
+            list(self.chunks(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(
+            list(self.chunks(range(6), 3)), [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(list(self.chunks([], 3)), [])
+
+    def test_chunks_lazy(self):
+        """
+        chunks should only take items from the iterable as chunks are needed.
+        """
+        taken = []
+
+        def items():
+            for i in range(10):
+                taken.append(i)
+                yield i
+
+        chunks = self.chunks(items(), 3)
+        self.assertEqual(next(chunks), [0, 1, 2])
+        self.assertEqual(taken, [0, 1, 2])
+
+
+class TestFanOut(TestCase):
+    fan_out = from_bulk('fan_out')
+
+    def test_concurrency(self):
+        """
+        fan_out should make at most the given number of calls at once, and
+        fire once they have all finished.
+        """
+        calls = []
+
+        def func(index, item):
+            d = Deferred()
+            calls.append((index, item, d))
+            return d
+
+        d = self.fan_out(func, 'abcde', 2)
+        self.assertEqual([(i, x) for i, x, _ in calls], [(0, 'a'), (1, 'b')])
+
+        calls[1][2].callback(None)
+        self.assertEqual([(i, x) for i, x, _ in calls][2:], [(2, 'c')])
+        calls[0][2].callback(None)
+        calls[2][2].callback(None)
+        self.assertNoResult(d)
+        self.assertEqual(len(calls), 5)
+        calls[3][2].callback(None)
+        calls[4][2].callback(None)
+        self.assertEqual(self.successResultOf(d), None)
+
+    def test_no_items(self):
+        """
+        fan_out should fire immediately if there is nothing to do.
+        """
+        d = self.fan_out(lambda i, x: succeed(None), [], 4)
+        self.assertEqual(self.successResultOf(d), None)
+
+    def test_failure(self):
+        """
+        fan_out should fail with the first failure, and make no new calls
+        after it.
+        """
+        calls = []
+        pending = []
+
+        def func(index, item):
+            calls.append(item)
+            if item == 'b':
+                return fail(ValueError(item))
+            d = Deferred()
+            pending.append(d)
+            return d
+
+        d = self.fan_out(func, 'abcde', 2)
+        self.assertEqual(calls, ['a', 'b'])
+        pending[0].callback(None)
+        self.assertEqual(calls, ['a', 'b'])
+        f = self.failureResultOf(d, ValueError)
+        self.assertEqual(f.value.args, ('b',))
+
+
+class TestLookupAll(TestCase):
+    lookup_all = from_bulk('lookup_all')
+
+    def _lookup(self, missing=()):
+        requests = []
+
+        def lookup(values):
+            requests.append(values)
+            return succeed([
+                {'id': v} for v in reversed(values) if v not in missing])
+
+        return requests, lookup
+
+    def test_ordered(self):
+        """
+        lookup_all should look values up in chunks, and fire with the objects
+        found in the order of the values.
+        """
+        requests, lookup = self._lookup(missing=[4])
+        d = self.lookup_all(
+            lookup, range(10), lambda obj: obj['id'], chunk_size=3)
+        self.assertEqual(
+            requests, [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(
+            [obj['id'] for obj in self.successResultOf(d)],
+            [0, 1, 2, 3, 5, 6, 7, 8, 9])
+
+    def test_not_found(self):
+        """
+        lookup_all should treat a chunk that fails with NotFoundError as
+        finding nothing, and still look up the other chunks.
+        """
+        from txtwitter.error import NotFoundError
+        requests, found = self._lookup()
+
+        def lookup(values):
+            if values == [2, 3]:
+                requests.append(values)
+                return fail(NotFoundError(404, "Not Found"))
+            return found(values)
+
+        d = self.lookup_all(
+            lookup, range(6), lambda obj: obj['id'], chunk_size=2,
+            concurrency=1)
+        self.assertEqual(requests, [[0, 1], [2, 3], [4, 5]])
+        self.assertEqual(
+            [obj['id'] for obj in self.successResultOf(d)], [0, 1, 4, 5])
+
+    def test_ordered_out_of_order_responses(self):
+        """
+        lookup_all should merge chunks in order even if they finish out of
+        order.
+        """
+        pending = {}
+
+        def lookup(values):
+            d = pending[values[0]] = Deferred()
+            return d
+
+        d = self.lookup_all(
+            lookup, range(4), lambda obj: obj['id'], chunk_size=2)
+        pending[2].callback([{'id': 3}, {'id': 2}])
+        pending[0].callback([{'id': 0}, {'id': 1}])
+        self.assertEqual(
+            self.successResultOf(d),
+            [{'id': 0}, {'id': 1}, {'id': 2}, {'id': 3}])
+
+    def test_callback(self):
+        """
+        lookup_all should pass objects to the callback as each chunk finishes,
+        and fire with the number of objects found.
+        """
+        pending = []
+
+        def lookup(values):
+            d = Deferred()
+            pending.append((values, d))
+            return d
+
+        found = []
+        d = self.lookup_all(
+            lookup, range(4), lambda obj: obj['id'], found.append,
+            concurrency=1, chunk_size=2)
+        values, chunk_d = pending.pop()
+        chunk_d.callback([{'id': 1}])
+        self.assertEqual(found, [{'id': 1}])
+        self.assertNoResult(d)
+        values, chunk_d = pending.pop()
+        chunk_d.callback([{'id': 3}, {'id': 2}])
+        self.assertEqual(found, [{'id': 1}, {'id': 2}, {'id': 3}])
+        self.assertEqual(self.successResultOf(d), 3)
+
+    def test_failure(self):
+        """
+        lookup_all should fail if a lookup fails.
+        """
+        d = self.lookup_all(
+            lambda values: fail(ValueError()), range(4), lambda obj: obj)
+        self.failureResultOf(d, ValueError)
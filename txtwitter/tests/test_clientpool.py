@@ -0,0 +1,202 @@
+import json
+from StringIO import StringIO
+
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txtwitter.ratelimit import RateLimitRegistry
+from txtwitter.tests.fake_agent import FakeAgent, FakeResponse
+
+
+def from_clientpool(name):
+    @property
+    def prop(self):
+        from txtwitter import clientpool
+        return getattr(clientpool, name)
+    return prop
+
+
+class TestTwitterClientPool(TestCase):
+    _TwitterClientPool = from_clientpool('TwitterClientPool')
+
+    def _agent_and_pool(self, tokens=3, **kw):
+        agent = FakeAgent()
+        registry = RateLimitRegistry(Clock())
+        pool = self._TwitterClientPool(
+            'consumer-key', 'consumer-secret',
+            [('token-%s' % i, 'secret-%s' % i) for i in range(tokens)],
+            agent=agent, rate_limits=registry, **kw)
+        return agent, pool
+
+    def _expect_statuses_show(self, agent):
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            json.dumps({"id_str": "123"})))
+
+    def _token_used(self, agent):
+        [auth] = agent.request_headers[-1].getRawHeaders('Authorization')
+        [token] = [part for part in auth.split(', ')
+                   if part.startswith('oauth_token=')]
+        return token.split('"')[1]
+
+    def test_no_tokens(self):
+        """
+        A pool needs at least one token.
+        """
+        self.assertRaises(
+            ValueError, self._TwitterClientPool, 'key', 'secret', [])
+
+    def test_shared(self):
+        """
+        The clients in a pool should share an agent and rate limit registry.
+        """
+        agent, pool = self._agent_and_pool()
+        self.assertEqual(len(pool.clients), 3)
+        self.assertEqual(
+            [client._token_key for client in pool.clients],
+            ['token-0', 'token-1', 'token-2'])
+        for client in pool.clients:
+            self.assertIdentical(client._agent, agent)
+            self.assertIdentical(client._rate_limits, pool._rate_limits)
+
+    def test_default_connection_pool(self):
+        """
+        Without an agent, the clients should share one connection pool.
+        """
+        pool = self._TwitterClientPool(
+            'consumer-key', 'consumer-secret',
+            [('token-0', 'secret-0'), ('token-1', 'secret-1')])
+        for client in pool.clients:
+            self.assertIdentical(client._agent, pool._agent)
+            self.assertIdentical(client._pool, pool._pool)
+        self.assertEqual(pool.connection_pool_stats()['requests'], 0)
+
+    def test_round_robin(self):
+        """
+        Tokens with the same budget should be used in turn.
+        """
+        agent, pool = self._agent_and_pool()
+        used = []
+        for _ in range(4):
+            self._expect_statuses_show(agent)
+            self.successResultOf(pool.statuses_show('123'))
+            used.append(self._token_used(agent))
+        self.assertEqual(used, ['token-0', 'token-1', 'token-2', 'token-0'])
+
+    def test_most_budget(self):
+        """
+        Calls should be made with the token with the most budget left.
+        """
+        agent, pool = self._agent_and_pool()
+        registry = pool._rate_limits
+        registry.update('token-0', '/statuses/show', 180, 10, 900)
+        registry.update('token-1', '/statuses/show', 180, 50, 900)
+        registry.update('token-2', '/statuses/show', 180, 20, 900)
+        registry.update('token-2', '/users/show', 180, 170, 900)
+        self.assertEqual(
+            pool.client_for('statuses/show.json')._token_key, 'token-1')
+        self.assertEqual(pool.rate_limit('statuses/show.json').remaining, 50)
+        self._expect_statuses_show(agent)
+        self.successResultOf(pool.statuses_show('123'))
+        self.assertEqual(self._token_used(agent), 'token-1')
+        self.assertEqual(registry.remaining('token-1', '/statuses/show'), 49)
+
+    def test_unknown_budget_preferred(self):
+        """
+        Tokens we haven't used for an endpoint yet should be preferred over
+        tokens that have used some of their budget.
+        """
+        agent, pool = self._agent_and_pool()
+        pool._rate_limits.update('token-0', '/statuses/show', 180, 179, 900)
+        pool._rate_limits.update('token-1', '/statuses/show', 180, 179, 900)
+        self.assertEqual(
+            pool.client_for('statuses/show.json')._token_key, 'token-2')
+
+    def test_with_item_callback(self):
+        """
+        Per-call options should be passed on to the client that makes the
+        call.
+        """
+        agent, pool = self._agent_and_pool()
+        uri = 'https://api.twitter.com/1.1/statuses/home_timeline.json'
+        agent.add_expected_request('GET', uri, {}, FakeResponse(
+            json.dumps([{"id_str": "1"}, {"id_str": "2"}])))
+        items = []
+        d = pool.with_item_callback(items.append).statuses_home_timeline()
+        self.assertEqual(self.successResultOf(d), 2)
+        self.assertEqual(items, [{"id_str": "1"}, {"id_str": "2"}])
+
+    def test_base_initialised(self):
+        """
+        The pool should be set up like any other client.
+        """
+        agent, pool = self._agent_and_pool(batch_window=0.5)
+        self.assertIdentical(pool._agent, agent)
+        self.assertEqual(pool._batch_window, 0.5)
+        self.assertEqual(pool._loaders, {})
+        self.assertEqual(pool._in_flight, {})
+
+    def test_coalesce(self):
+        """
+        Identical GET requests made while one is in flight should share its
+        response, even though they would be made with different tokens.
+        """
+        agent, pool = self._agent_and_pool()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        resp = FakeResponse(None)
+        agent.add_expected_request('GET', uri, {'id': '123'}, resp)
+        d1 = pool.statuses_show('123')
+        d2 = pool.statuses_show('123')
+        self.assertEqual(len(agent.request_headers), 1)
+
+        resp.deliver_data(json.dumps({"id_str": "123"}))
+        resp.finished()
+        self.assertEqual(self.successResultOf(d1), {"id_str": "123"})
+        self.assertEqual(self.successResultOf(d2), {"id_str": "123"})
+
+        self._expect_statuses_show(agent)
+        self.successResultOf(pool.statuses_show('123'))
+        self.assertEqual(len(agent.request_headers), 2)
+        self.assertEqual(self._token_used(agent), 'token-1')
+
+    def test_writes_not_pooled(self):
+        """
+        Calls that act as a particular account should raise ValueError.
+        """
+        agent, pool = self._agent_and_pool()
+        self.assertRaises(ValueError, pool.statuses_update, 'Tweet!')
+        self.assertRaises(ValueError, pool.userstream_user, None)
+        self.assertEqual(agent.request_headers, [])
+
+    def test_uploads_not_pooled(self):
+        """
+        Media uploads (chunked or not) act as a particular account, so they
+        should raise ValueError.
+        """
+        agent, pool = self._agent_and_pool()
+        media = StringIO('abcdef')
+        media.name = 'video.mp4'
+        self.assertRaises(ValueError, pool.media_upload, media)
+        self.assertRaises(
+            ValueError, pool.media_upload_init, 6, 'video/mp4')
+        self.assertRaises(ValueError, pool.media_upload_append, '1', 0, 'abc')
+        self.assertRaises(
+            ValueError, pool.media_upload_append, '1', 0, media, offset=3,
+            size=3)
+        self.assertRaises(ValueError, pool.media_upload_finalize, '1')
+        self.assertRaises(ValueError, pool.media_upload_status, '1')
+        self.assertRaises(
+            ValueError, pool.media_upload_chunked, media, 'video/mp4')
+        self.assertEqual(agent.request_headers, [])
+
+    def test_stream_filter(self):
+        """
+        Filter streams are read-only, so they should be routed to a token.
+        """
+        agent, pool = self._agent_and_pool()
+        svc = pool.stream_filter(None, track=['foo'])
+        uri = 'https://stream.twitter.com/1.1/statuses/filter.json'
+        agent.add_expected_request(
+            'POST', uri, {'track': 'foo'}, FakeResponse(None))
+        svc.connect_func()
+        self.assertEqual(len(agent.request_headers), 1)
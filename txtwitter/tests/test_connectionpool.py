@@ -0,0 +1,105 @@
+from twisted.internet.defer import succeed
+from twisted.internet.task import Clock
+from twisted.test.proto_helpers import StringTransport
+from twisted.trial.unittest import TestCase
+
+
+def from_connectionpool(name):
+    @property
+    def prop(self):
+        from txtwitter import connectionpool
+        return getattr(connectionpool, name)
+    return prop
+
+
+class FakeEndpoint(object):
+    def __init__(self):
+        self.protocols = []
+
+    def connect(self, factory):
+        protocol = factory.buildProtocol(None)
+        protocol.makeConnection(StringTransport())
+        self.protocols.append(protocol)
+        return succeed(protocol)
+
+
+class TestTwitterConnectionPool(TestCase):
+    _TwitterConnectionPool = from_connectionpool('TwitterConnectionPool')
+
+    KEY = ('https', 'api.twitter.com', 443)
+
+    def test_defaults(self):
+        """
+        A new pool should be persistent and have no statistics.
+        """
+        pool = self._TwitterConnectionPool(Clock())
+        self.assertEqual(pool.persistent, True)
+        self.assertEqual(pool.maxPersistentPerHost, 4)
+        self.assertEqual(pool.cachedConnectionTimeout, 90)
+        self.assertEqual(pool.stats(), {
+            'requests': 0,
+            'created': 0,
+            'reused': 0,
+            'expired': 0,
+            'idle': {},
+        })
+
+    def test_limits(self):
+        """
+        The per-host limit and idle timeout should be configurable.
+        """
+        pool = self._TwitterConnectionPool(
+            Clock(), max_per_host=10, idle_timeout=30)
+        self.assertEqual(pool.maxPersistentPerHost, 10)
+        self.assertEqual(pool.cachedConnectionTimeout, 30)
+
+    def test_new_connection(self):
+        """
+        A request with no cached connection should create a new one.
+        """
+        pool = self._TwitterConnectionPool(Clock())
+        endpoint = FakeEndpoint()
+        conn = self.successResultOf(pool.getConnection(self.KEY, endpoint))
+        self.assertEqual(endpoint.protocols, [conn])
+        stats = pool.stats()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 0)
+
+    def test_reused_connection(self):
+        """
+        A request with a cached connection should reuse it.
+        """
+        pool = self._TwitterConnectionPool(Clock())
+        endpoint = FakeEndpoint()
+        conn = self.successResultOf(pool.getConnection(self.KEY, endpoint))
+        pool._putConnection(self.KEY, conn)
+        self.assertEqual(pool.stats()['idle'], {
+            'https://api.twitter.com:443': 1,
+        })
+
+        self.successResultOf(pool.getConnection(self.KEY, endpoint))
+        self.assertEqual(len(endpoint.protocols), 1)
+        stats = pool.stats()
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['idle'], {})
+
+    def test_expired_connection(self):
+        """
+        An idle connection should be closed after the idle timeout.
+        """
+        clock = Clock()
+        pool = self._TwitterConnectionPool(clock, idle_timeout=30)
+        endpoint = FakeEndpoint()
+        conn = self.successResultOf(pool.getConnection(self.KEY, endpoint))
+        pool._putConnection(self.KEY, conn)
+
+        clock.advance(29)
+        self.assertEqual(pool.stats()['expired'], 0)
+        clock.advance(1)
+        stats = pool.stats()
+        self.assertEqual(stats['expired'], 1)
+        self.assertEqual(stats['idle'], {})
+        self.assertEqual(conn.transport.disconnecting, True)
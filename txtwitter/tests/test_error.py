@@ -0,0 +1,98 @@
+import json
+
+from twisted.trial.unittest import TestCase
+from twisted.web.http_headers import Headers
+
+
+def from_error(name):
+    @property
+    def prop(self):
+        from txtwitter import error
+        return getattr(error, name)
+    return prop
+
+
+def error_body(*codes):
+    return json.dumps({"errors": [
+        {"code": code, "message": "Error %s" % (code,)} for code in codes]})
+
+
+class TestTwitterAPIError(TestCase):
+    _TwitterAPIError = from_error('TwitterAPIError')
+
+    def test_errors(self):
+        """
+        Errors in the response body should be parsed.
+        """
+        err = self._TwitterAPIError(404, response=error_body(34))
+        self.assertEqual(err.errors, [{"code": 34, "message": "Error 34"}])
+        self.assertEqual(err.codes, [34])
+
+    def test_no_errors(self):
+        """
+        A response body without errors in it should have no errors.
+        """
+        for body in [None, '', 'Not JSON', '[]', '{}', '{"errors": "x"}']:
+            err = self._TwitterAPIError(500, response=body)
+            self.assertEqual(err.errors, [])
+            self.assertEqual(err.codes, [])
+
+
+class TestMakeAPIError(TestCase):
+    _make_api_error = from_error('make_api_error')
+    _TwitterAPIError = from_error('TwitterAPIError')
+    _RateLimitedError = from_error('RateLimitedError')
+    _ServerError = from_error('ServerError')
+    _NotFoundError = from_error('NotFoundError')
+    _UnauthorizedError = from_error('UnauthorizedError')
+    _ForbiddenError = from_error('ForbiddenError')
+
+    def assert_error(self, err, cls, code, body):
+        self.assertEqual(type(err), cls)
+        self.assertEqual(err.status, str(code))
+        self.assertEqual(err.response, body)
+
+    def test_http_status(self):
+        """
+        Without error codes, the error type should depend on the HTTP status.
+        """
+        for code, cls in [
+                (400, self._TwitterAPIError),
+                (401, self._UnauthorizedError),
+                (403, self._ForbiddenError),
+                (404, self._NotFoundError),
+                (420, self._RateLimitedError),
+                (429, self._RateLimitedError),
+                (500, self._ServerError),
+                (503, self._ServerError)]:
+            self.assert_error(self._make_api_error(code, ''), cls, code, '')
+
+    def test_error_codes(self):
+        """
+        Twitter error codes should be used to pick the error type if they are
+        present.
+        """
+        for code, twitter_codes, cls in [
+                (400, [88], self._RateLimitedError),
+                (403, [130], self._ServerError),
+                (400, [32], self._UnauthorizedError),
+                (403, [144], self._NotFoundError),
+                (403, [187], self._ForbiddenError),
+                (403, [187, 88], self._RateLimitedError)]:
+            body = error_body(*twitter_codes)
+            err = self._make_api_error(code, body)
+            self.assert_error(err, cls, code, body)
+            self.assertEqual(err.codes, twitter_codes)
+
+    def test_rate_limit_reset(self):
+        """
+        The reset time for a rate limited request should be taken from the
+        headers.
+        """
+        err = self._make_api_error(429, error_body(88), Headers({
+            'x-rate-limit-reset': ['1900']}))
+        self.assertEqual(err.reset, 1900)
+        err = self._make_api_error(429, error_body(88), Headers({}))
+        self.assertEqual(err.reset, None)
+        err = self._make_api_error(429, error_body(88))
+        self.assertEqual(err.reset, None)
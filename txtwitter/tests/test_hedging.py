@@ -0,0 +1,223 @@
+from twisted.internet.defer import CancelledError, Deferred
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+
+def from_hedging(name):
+    @property
+    def prop(self):
+        from txtwitter import hedging
+        return getattr(hedging, name)
+    return prop
+
+
+class TestLatencyTracker(TestCase):
+    _LatencyTracker = from_hedging('LatencyTracker')
+
+    def test_percentile(self):
+        """
+        Percentiles should be calculated from the recorded latencies.
+        """
+        tracker = self._LatencyTracker()
+        self.assertEqual(tracker.percentile(95), None)
+        for latency in range(100, 0, -1):
+            tracker.record(latency)
+        self.assertEqual(len(tracker), 100)
+        self.assertEqual(tracker.percentile(0), 1)
+        self.assertEqual(tracker.percentile(50), 51)
+        self.assertEqual(tracker.percentile(95), 95)
+        self.assertEqual(tracker.percentile(100), 100)
+
+    def test_size(self):
+        """
+        Only the most recent latencies should be kept.
+        """
+        tracker = self._LatencyTracker(size=3)
+        for latency in [10, 1, 2, 3]:
+            tracker.record(latency)
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(tracker.percentile(100), 3)
+        self.assertEqual(tracker.percentile(0), 1)
+        tracker.record(0)
+        tracker.record(0)
+        self.assertEqual(tracker.percentile(0), 0)
+        self.assertEqual(tracker.percentile(100), 3)
+        tracker.record(0)
+        self.assertEqual(tracker.percentile(100), 0)
+
+
+class TestHedgePolicy(TestCase):
+    _HedgePolicy = from_hedging('HedgePolicy')
+
+    def _policy(self, **kw):
+        kw.setdefault('min_samples', 10)
+        kw.setdefault('budget', 1)
+        policy = self._HedgePolicy(clock=Clock(), **kw)
+        for _ in range(10):
+            policy.tracker('statuses/show.json').record(2)
+        return policy
+
+    def _requests(self):
+        requests = []
+        cancelled = []
+
+        def func():
+            d = Deferred(cancelled.append)
+            requests.append(d)
+            return d
+
+        return requests, cancelled, func
+
+    def test_delay(self):
+        """
+        Requests should be hedged at the latency percentile once there are
+        enough samples.
+        """
+        policy = self._HedgePolicy(min_samples=3, min_delay=0.5)
+        self.assertEqual(policy.delay('statuses/show.json'), None)
+        for latency in [3, 1, 2]:
+            policy.tracker('statuses/show.json').record(latency)
+        self.assertEqual(policy.delay('statuses/show.json'), 3)
+        self.assertEqual(policy.delay('/statuses/show/:id'), 3)
+        self.assertEqual(policy.delay('users/show.json'), None)
+        policy.tracker('users/show.json').record(0.1)
+        policy.tracker('users/show.json').record(0.1)
+        policy.tracker('users/show.json').record(0.1)
+        self.assertEqual(policy.delay('users/show.json'), 0.5)
+
+    def test_fast_request(self):
+        """
+        A request that answers in time should not be hedged.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        policy.clock.advance(1)
+        requests[0].callback('ok')
+        self.assertEqual(self.successResultOf(d), 'ok')
+        policy.clock.advance(10)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(policy.hedges, 0)
+        self.assertEqual(len(policy.tracker('statuses/show.json')), 11)
+
+    def test_hedge_wins(self):
+        """
+        A slow request should be hedged, and the first response used. The
+        cancelled request's time so far should be recorded.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        self.assertEqual(len(requests), 2)
+        policy.clock.advance(1)
+        requests[1].callback('hedge')
+        self.assertEqual(self.successResultOf(d), 'hedge')
+        self.assertEqual(cancelled, [requests[0]])
+        self.assertEqual((policy.hedges, policy.hedges_won), (1, 1))
+        tracker = policy.tracker('statuses/show.json')
+        self.assertEqual(len(tracker), 12)
+        self.assertEqual(tracker.percentile(0), 1)
+        self.assertEqual(tracker.percentile(100), 3)
+
+    def test_original_wins(self):
+        """
+        If the original request answers first, the hedge should be cancelled.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        requests[0].callback('original')
+        self.assertEqual(self.successResultOf(d), 'original')
+        self.assertEqual(cancelled, [requests[1]])
+        self.assertEqual((policy.hedges, policy.hedges_won), (1, 0))
+        # The hedge hadn't taken as long as the original, so it tells us
+        # nothing.
+        self.assertEqual(len(policy.tracker('statuses/show.json')), 11)
+
+    def test_failure_waits_for_other(self):
+        """
+        If one request fails, the other should still be able to succeed.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        requests[0].errback(ValueError())
+        self.assertNoResult(d)
+        requests[1].callback('hedge')
+        self.assertEqual(self.successResultOf(d), 'hedge')
+
+    def test_all_fail(self):
+        """
+        If every request fails, the last failure should be returned.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        requests[1].errback(KeyError())
+        requests[0].errback(ValueError())
+        self.failureResultOf(d, ValueError)
+
+    def test_fast_failure(self):
+        """
+        A request that fails before it would be hedged should not be hedged.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        requests[0].errback(ValueError())
+        self.failureResultOf(d, ValueError)
+        self.assertEqual(policy.clock.getDelayedCalls(), [])
+
+    def test_budget(self):
+        """
+        Requests should not be hedged when the budget has run out.
+        """
+        policy = self._policy(budget=0.5)
+        requests, cancelled, func = self._requests()
+        policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        self.assertEqual(len(requests), 1)
+        policy.call('statuses/show.json', func)
+        policy.clock.advance(2)
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(policy.available, 0)
+        self.assertEqual(policy.hedges, 1)
+
+    def test_hedge_func(self):
+        """
+        Hedges should be sent with the hedge function if there is one, and
+        should cost no budget if it can't send them.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        hedges = []
+        policy.call('statuses/show.json', func, lambda: hedges.pop(0))
+        hedges.append(None)
+        policy.clock.advance(2)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual((policy.hedges, policy.available), (0, 1))
+
+        hedge = Deferred()
+        hedges.append(hedge)
+        d = policy.call('statuses/show.json', func, lambda: hedges.pop(0))
+        policy.clock.advance(2)
+        self.assertEqual(policy.hedges, 1)
+        hedge.callback('hedge')
+        self.assertEqual(self.successResultOf(d), 'hedge')
+        self.assertEqual(len(requests), 2)
+
+    def test_cancel(self):
+        """
+        Cancelling the call should cancel every request and the pending hedge.
+        """
+        policy = self._policy()
+        requests, cancelled, func = self._requests()
+        d = policy.call('statuses/show.json', func)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(cancelled, requests)
+        self.assertEqual(policy.clock.getDelayedCalls(), [])
@@ -0,0 +1,38 @@
+import json
+
+from twisted.trial.unittest import TestCase
+
+
+def from_jsondecoder(name):
+    @property
+    def prop(self):
+        from txtwitter import jsondecoder
+        return getattr(jsondecoder, name)
+    return prop
+
+
+class TestFindJSONDecoder(TestCase):
+    _find_json_decoder = from_jsondecoder('find_json_decoder')
+
+    def test_default(self):
+        """
+        find_json_decoder() should always find a decoder that works.
+        """
+        decoder = self._find_json_decoder()
+        self.assertEqual(decoder('{"id_str": "1"}'), {"id_str": "1"})
+
+    def test_preference_order(self):
+        """
+        find_json_decoder() should skip backends that aren't installed.
+        """
+        decoder = self._find_json_decoder(
+            ['txtwitter_missing_json', 'json'])
+        self.assertEqual(decoder, json.loads)
+
+    def test_fallback(self):
+        """
+        find_json_decoder() should fall back to the stdlib if none of the
+        backends are installed.
+        """
+        decoder = self._find_json_decoder(['txtwitter_missing_json'])
+        self.assertEqual(decoder, json.loads)
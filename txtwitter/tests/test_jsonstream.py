@@ -0,0 +1,171 @@
+import json
+
+from twisted.internet.defer import CancelledError, Deferred
+from twisted.python.failure import Failure
+from twisted.trial.unittest import TestCase
+from twisted.web.client import ResponseFailed
+from twisted.web.http import PotentialDataLoss
+
+from txtwitter.tests.fake_agent import FakeResponse
+
+
+def from_jsonstream(name):
+    @property
+    def prop(self):
+        from txtwitter import jsonstream
+        return getattr(jsonstream, name)
+    return prop
+
+
+class TestParseJSONArray(TestCase):
+    _parse_json_array = from_jsonstream('parse_json_array')
+
+    def _parse(self, resp):
+        items = []
+        d = self._parse_json_array(resp, items.append)
+        return items, d
+
+    def test_complete_body(self):
+        """
+        All elements of a body that has already arrived should be delivered.
+        """
+        data = [{"id_str": "1"}, {"id_str": "2"}, [3, "]"], "x,y", None]
+        items, d = self._parse(FakeResponse(json.dumps(data)))
+        self.assertEqual(self.successResultOf(d), 5)
+        self.assertEqual(items, data)
+
+    def test_empty_array(self):
+        """
+        An empty array should deliver nothing.
+        """
+        items, d = self._parse(FakeResponse(' [ ] '))
+        self.assertEqual(self.successResultOf(d), 0)
+        self.assertEqual(items, [])
+
+    def test_incremental(self):
+        """
+        Elements should be delivered before the whole response has arrived.
+        """
+        resp = FakeResponse(None)
+        items, d = self._parse(resp)
+        resp.deliver_data('[{"id_str": "1", "text": "a}')
+        self.assertEqual(items, [])
+        resp.deliver_data('\\"b"}, {"id_str": "2"}, {"id_str"')
+        self.assertEqual(items, [
+            {"id_str": "1", "text": 'a}"b'},
+            {"id_str": "2"},
+        ])
+        resp.deliver_data(': "3"}\n]')
+        self.assertNoResult(d)
+        resp.finished()
+        self.assertEqual(self.successResultOf(d), 3)
+        self.assertEqual(items[2], {"id_str": "3"})
+
+    def test_bytewise(self):
+        """
+        Data arriving a byte at a time should be parsed correctly.
+        """
+        data = [{"a": [1, 2, {"b": "c, d"}]}, 123, 45.5, "e", True]
+        body = json.dumps(data)
+        resp = FakeResponse(None)
+        items, d = self._parse(resp)
+        for char in body:
+            resp.deliver_data(char)
+        resp.finished()
+        self.assertEqual(self.successResultOf(d), 5)
+        self.assertEqual(items, data)
+
+    def test_split_number(self):
+        """
+        A number split across chunks should not be delivered early.
+        """
+        resp = FakeResponse(None)
+        items, d = self._parse(resp)
+        resp.deliver_data('[12')
+        self.assertEqual(items, [])
+        resp.deliver_data('34, 5')
+        self.assertEqual(items, [1234])
+        resp.deliver_data(']')
+        resp.finished()
+        self.assertEqual(items, [1234, 5])
+
+    def test_non_array(self):
+        """
+        A body that isn't an array should be decoded once it's complete.
+        """
+        resp = FakeResponse(None)
+        items, d = self._parse(resp)
+        resp.deliver_data('{"id_str": ')
+        resp.deliver_data('"1"}')
+        self.assertNoResult(d)
+        resp.finished()
+        self.assertEqual(self.successResultOf(d), {"id_str": "1"})
+        self.assertEqual(items, [])
+
+    def test_invalid(self):
+        """
+        Invalid data should fail the Deferred.
+        """
+        items, d = self._parse(FakeResponse('[{"a": 1} {"b": 2}]'))
+        self.failureResultOf(d, ValueError)
+        self.assertEqual(items, [{"a": 1}])
+
+    def test_truncated(self):
+        """
+        A truncated array should fail the Deferred.
+        """
+        items, d = self._parse(FakeResponse('[{"a": 1}, {"b": '))
+        self.failureResultOf(d, ValueError)
+        self.assertEqual(items, [{"a": 1}])
+
+    def test_trailing_data(self):
+        """
+        Data after the end of the array should fail the Deferred.
+        """
+        items, d = self._parse(FakeResponse('[1] 2'))
+        self.failureResultOf(d, ValueError)
+
+    def test_connection_failure(self):
+        """
+        A failed response should fail the Deferred.
+        """
+        resp = FakeResponse(None)
+        items, d = self._parse(resp)
+        resp.deliver_data('[1, ')
+        resp.finished(Failure(ResponseFailed([])))
+        self.failureResultOf(d, ResponseFailed)
+        self.assertEqual(items, [1])
+
+    def test_callback_error(self):
+        """
+        An exception raised by the callback should fail the Deferred and stop
+        the response.
+        """
+        stopped = Deferred()
+        resp = FakeResponse(None)
+        resp.finished_callback = stopped.callback
+
+        def callback(item):
+            raise ValueError("bad")
+
+        d = self._parse_json_array(resp, callback)
+        resp.deliver_data('[1, ')
+        self.failureResultOf(d, ValueError)
+        self.failureResultOf(stopped, PotentialDataLoss)
+
+    def test_cancel(self):
+        """
+        Cancelling the Deferred should stop the response, and no more
+        elements should be delivered.
+        """
+        stopped = Deferred()
+        resp = FakeResponse(None)
+        resp.finished_callback = stopped.callback
+        items, d = self._parse(resp)
+        resp.deliver_data('[1, ')
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.failureResultOf(stopped, PotentialDataLoss)
+
+        resp.deliver_data('2, 3]')
+        self.assertEqual(items, [1])
@@ -0,0 +1,56 @@
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+
+def from_lrucache(name):
+    @property
+    def prop(self):
+        from txtwitter import lrucache
+        return getattr(lrucache, name)
+    return prop
+
+
+class TestExpiringLRUCache(TestCase):
+    _ExpiringLRUCache = from_lrucache('ExpiringLRUCache')
+
+    def test_expiry(self):
+        """
+        Entries should be looked up until they expire, and lookups should be
+        counted.
+        """
+        cache = self._ExpiringLRUCache(clock=Clock())
+        cache._store('a', 1, 10)
+        cache.clock.advance(9)
+        self.assertEqual(cache._lookup('a'), 1)
+        cache.clock.advance(1)
+        self.assertEqual(cache._lookup('a'), None)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evict(self):
+        """
+        The least recently used entries should be evicted once there are too
+        many of them or they are too big.
+        """
+        cache = self._ExpiringLRUCache(
+            max_entries=2, max_bytes=10, clock=Clock())
+        cache._store('a', 1, 10, size=4)
+        cache._store('b', 2, 10, size=4)
+        cache._lookup('a')
+        cache._store('c', 3, 10, size=1)
+        self.assertEqual((list(cache._entries), cache.size), (['a', 'c'], 5))
+        cache._store('d', 4, 10, size=9)
+        self.assertEqual((list(cache._entries), cache.size), (['c', 'd'], 10))
+        self.assertEqual(cache.evictions, 2)
+
+    def test_replace(self):
+        """
+        Storing a value with the same key should replace the old one and its
+        size.
+        """
+        cache = self._ExpiringLRUCache(clock=Clock())
+        cache._store('a', 1, 10, size=4)
+        cache._store('a', 2, 10, size=2)
+        self.assertEqual((cache._lookup('a'), cache.size), (2, 2))
+        cache.invalidate('a')
+        self.assertEqual((len(cache), cache.size), (0, 0))
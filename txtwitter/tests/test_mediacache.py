@@ -0,0 +1,158 @@
+from StringIO import StringIO
+
+from twisted.internet.defer import inlineCallbacks
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+
+def from_mediacache(name):
+    @property
+    def prop(self):
+        from txtwitter import mediacache
+        return getattr(mediacache, name)
+    return prop
+
+
+SHA256_ABC = (
+    'ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad')
+
+
+class ReadOnly(object):
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class TestContentHash(TestCase):
+    content_hash = from_mediacache('content_hash')
+
+    def test_string(self):
+        """
+        content_hash should hash a string straight away.
+        """
+        self.assertEqual(
+            self.successResultOf(self.content_hash('abc')),
+            (SHA256_ABC, 'abc'))
+
+    @inlineCallbacks
+    def test_seekable(self):
+        """
+        content_hash should hash a file from its current position and move it
+        back there.
+        """
+        f = StringIO('xxabc')
+        f.seek(2)
+        digest, media = yield self.content_hash(f, chunk_size=2)
+        self.assertEqual((digest, media), (SHA256_ABC, f))
+        self.assertEqual(f.tell(), 2)
+
+    @inlineCallbacks
+    def test_read_only(self):
+        """
+        content_hash should return the content of files it can't seek.
+        """
+        result = yield self.content_hash(ReadOnly('abc'))
+        self.assertEqual(result, (SHA256_ABC, 'abc'))
+
+
+class TestMediaCache(TestCase):
+    _MediaCache = from_mediacache('MediaCache')
+
+    def _cache(self, **kw):
+        return self._MediaCache(clock=Clock(), **kw)
+
+    def test_get_set(self):
+        """
+        Stored uploads should be returned by lookups as copies, and lookups
+        should be counted.
+        """
+        cache = self._cache()
+        key = cache.key('token', SHA256_ABC)
+        self.assertEqual(cache.get(key), None)
+        response = {'media_id_string': '1', 'expires_after_secs': 86400}
+        cache.set(key, response)
+        cached = cache.get(key)
+        self.assertEqual(cached, response)
+        cached['media_id_string'] = '2'
+        self.assertEqual(cache.get(key), response)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_remaining_expiry(self):
+        """
+        Lookups should say how long is actually left before the upload
+        expires.
+        """
+        cache = self._cache(margin=100)
+        cache.set('k', {'media_id_string': '1', 'expires_after_secs': 1000})
+        cache.clock.advance(300)
+        self.assertEqual(cache.get('k'), {
+            'media_id_string': '1',
+            'expires_after_secs': 700,
+        })
+        cache.clock.advance(0.5)
+        self.assertEqual(cache.get('k')['expires_after_secs'], 699)
+
+    def test_key(self):
+        """
+        Keys should depend on the token, content and set of additional
+        owners.
+        """
+        key = self._MediaCache.key
+        self.assertEqual(key('t', 'd', [2, '1']), key('t', 'd', ['1', 2]))
+        self.assertNotEqual(key('t', 'd'), key('t', 'd', [1]))
+        self.assertNotEqual(key('t', 'd'), key('u', 'd'))
+        self.assertEqual(key('t', 'd'), key('t', 'd', []))
+
+    def test_expiry(self):
+        """
+        Uploads should be forgotten ``margin`` seconds before Twitter lets
+        them expire.
+        """
+        cache = self._cache(margin=100)
+        cache.set('k', {'media_id_string': '1', 'expires_after_secs': 1000})
+        cache.clock.advance(899)
+        self.assertIn('k', cache)
+        cache.clock.advance(1)
+        self.assertNotIn('k', cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_no_expiry(self):
+        """
+        Uploads that don't say when they expire, or that expire too soon,
+        should not be stored.
+        """
+        cache = self._cache(margin=100)
+        cache.set('a', {'media_id_string': '1'})
+        cache.set('b', {'media_id_string': '1', 'expires_after_secs': 100})
+        self.assertEqual(len(cache), 0)
+
+    def test_evict(self):
+        """
+        The least recently used uploads should be evicted once the cache is
+        full.
+        """
+        cache = self._cache(max_entries=2)
+        response = {'media_id_string': '1', 'expires_after_secs': 86400}
+        cache.set('a', response)
+        cache.set('b', response)
+        cache.get('a')
+        cache.set('c', response)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_invalidate_and_clear(self):
+        """
+        Uploads should be forgotten when invalidated or cleared.
+        """
+        cache = self._cache()
+        response = {'media_id_string': '1', 'expires_after_secs': 86400}
+        cache.set('a', response)
+        cache.set('b', response)
+        cache.invalidate('a')
+        cache.invalidate('missing')
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
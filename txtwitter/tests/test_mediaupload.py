@@ -0,0 +1,284 @@
+from StringIO import StringIO
+from tempfile import TemporaryFile
+
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.error import ConnectionLost
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txtwitter.error import ForbiddenError, MediaProcessingError
+
+
+def from_mediaupload(name):
+    @property
+    def prop(self):
+        from txtwitter import mediaupload
+        return getattr(mediaupload, name)
+    return prop
+
+
+class FakeUploadClient(object):
+    """
+    Records the chunked upload commands it is given.
+    """
+
+    def __init__(self, finalize=None, statuses=()):
+        self.calls = []
+        self.finalize = finalize or {'media_id_string': '7'}
+        self.statuses = list(statuses)
+        self.append_results = []
+
+    def media_upload_init(self, total_bytes, media_type, media_category=None,
+                          additional_owners=None):
+        self.calls.append(('INIT', total_bytes, media_type, media_category))
+        return succeed({'media_id_string': '7', 'expires_after_secs': 60})
+
+    def media_upload_append(self, media_id, segment_index, data,
+                            filename='media', offset=None, size=None):
+        if not isinstance(data, str):
+            # A segment of a file, which would be streamed from it.
+            data.seek(offset)
+            data = data.read(size)
+        self.calls.append(('APPEND', media_id, segment_index, data))
+        if self.append_results:
+            return self.append_results.pop(0)
+        return succeed(None)
+
+    def media_upload_finalize(self, media_id):
+        self.calls.append(('FINALIZE', media_id))
+        return succeed(self.finalize)
+
+    def media_upload_status(self, media_id):
+        self.calls.append(('STATUS', media_id))
+        return succeed(self.statuses.pop(0))
+
+
+class TestFileSize(TestCase):
+    file_size = from_mediaupload('file_size')
+
+    def test_real_file(self):
+        """
+        file_size should find the bytes left in a real file.
+        """
+        f = TemporaryFile()
+        self.addCleanup(f.close)
+        f.write('0123456789')
+        f.seek(3)
+        self.assertEqual(self.file_size(f), 7)
+
+    def test_file_like(self):
+        """
+        file_size should find the bytes left in a file-like object without
+        moving it.
+        """
+        f = StringIO('0123456789')
+        f.seek(4)
+        self.assertEqual(self.file_size(f), 6)
+        self.assertEqual(f.tell(), 4)
+
+
+class TestChunkedUpload(TestCase):
+    ChunkedUpload = from_mediaupload('ChunkedUpload')
+
+    def test_upload(self):
+        """
+        ChunkedUpload should send INIT, an APPEND for each segment and
+        FINALIZE, and fire with the FINALIZE response.
+        """
+        client = FakeUploadClient()
+        upload = self.ChunkedUpload(
+            client, StringIO('abcdefg'), 'video/mp4', segment_size=3,
+            media_category='tweet_video', clock=Clock())
+        d = upload.start()
+        self.assertEqual(
+            self.successResultOf(d), {'media_id_string': '7'})
+        self.assertEqual(client.calls, [
+            ('INIT', 7, 'video/mp4', 'tweet_video'),
+            ('APPEND', '7', 0, 'abc'),
+            ('APPEND', '7', 1, 'def'),
+            ('APPEND', '7', 2, 'g'),
+            ('FINALIZE', '7'),
+        ])
+        self.assertEqual((upload.bytes_sent, upload.segments_sent), (7, 3))
+
+    def test_real_file(self):
+        """
+        ChunkedUpload should send segments of a real file without reading
+        them, and leave the file at its end.
+        """
+        client = FakeUploadClient()
+        media = TemporaryFile()
+        self.addCleanup(media.close)
+        media.write('xxabcdefg')
+        media.seek(2)
+        upload = self.ChunkedUpload(
+            client, media, 'video/mp4', segment_size=4, clock=Clock())
+        self.successResultOf(upload.start())
+        self.assertEqual(client.calls[1:3], [
+            ('APPEND', '7', 0, 'abcd'),
+            ('APPEND', '7', 1, 'efg'),
+        ])
+        self.assertEqual(media.tell(), 9)
+        self.assertEqual(upload.bytes_sent, 7)
+
+    def test_one_segment_at_a_time(self):
+        """
+        ChunkedUpload should only read a segment once the one before it has
+        been sent.
+        """
+        client = FakeUploadClient()
+        first = Deferred()
+        client.append_results.append(first)
+        media = StringIO('abcdef')
+        upload = self.ChunkedUpload(
+            client, media, 'video/mp4', segment_size=3, clock=Clock())
+        d = upload.start()
+        self.assertNoResult(d)
+        self.assertEqual(media.tell(), 3)
+        first.callback(None)
+        self.successResultOf(d)
+        self.assertEqual(media.tell(), 6)
+
+    def test_progress_and_throughput(self):
+        """
+        ChunkedUpload should report progress after each segment, and measure
+        its throughput.
+        """
+        clock = Clock()
+        client = FakeUploadClient()
+        pending = [Deferred(), Deferred()]
+        client.append_results.extend(pending)
+        reports = []
+        upload = self.ChunkedUpload(
+            client, StringIO('abcdef'), 'video/mp4', segment_size=3,
+            progress=lambda u: reports.append((u.bytes_sent, u.throughput)),
+            clock=clock)
+        d = upload.start()
+        self.assertEqual(upload.throughput, None)
+        clock.advance(2)
+        pending[0].callback(None)
+        clock.advance(1)
+        pending[1].callback(None)
+        self.successResultOf(d)
+        self.assertEqual(reports, [(3, 1.5), (6, 2.0)])
+        clock.advance(10)
+        self.assertEqual(upload.throughput, 2.0)
+
+    def test_processing(self):
+        """
+        ChunkedUpload should poll STATUS as Twitter asks until the media has
+        been processed.
+        """
+        clock = Clock()
+        client = FakeUploadClient(
+            finalize={'processing_info': {
+                'state': 'pending', 'check_after_secs': 5}},
+            statuses=[
+                {'processing_info': {
+                    'state': 'in_progress', 'check_after_secs': 10}},
+                {'media_id_string': '7',
+                 'processing_info': {'state': 'succeeded'}},
+            ])
+        upload = self.ChunkedUpload(
+            client, StringIO('abc'), 'video/mp4', clock=clock)
+        d = upload.start()
+        self.assertNoResult(d)
+        clock.advance(5)
+        self.assertEqual(client.calls[-1], ('STATUS', '7'))
+        self.assertNoResult(d)
+        clock.advance(10)
+        self.assertEqual(
+            self.successResultOf(d)['processing_info']['state'], 'succeeded')
+
+    def test_processing_failed(self):
+        """
+        ChunkedUpload should fail if Twitter can't process the media.
+        """
+        client = FakeUploadClient(finalize={'processing_info': {
+            'state': 'failed',
+            'error': {'code': 1, 'name': 'InvalidMedia',
+                      'message': 'Unsupported video format'},
+        }})
+        upload = self.ChunkedUpload(
+            client, StringIO('abc'), 'video/mp4', clock=Clock())
+        f = self.failureResultOf(upload.start(), MediaProcessingError)
+        self.assertEqual(str(f.value), 'Unsupported video format')
+
+    def test_concurrent_segments(self):
+        """
+        ChunkedUpload should send up to ``concurrency`` segments at once, and
+        only finalize once they have all been sent.
+        """
+        client = FakeUploadClient()
+        pending = [Deferred() for _ in range(3)]
+        client.append_results.extend(pending)
+        upload = self.ChunkedUpload(
+            client, StringIO('abcdefg'), 'video/mp4', segment_size=3,
+            concurrency=2, clock=Clock())
+        d = upload.start()
+        self.assertEqual(
+            [call[2] for call in client.calls if call[0] == 'APPEND'], [0, 1])
+        pending[1].callback(None)
+        self.assertEqual(
+            [call[2:] for call in client.calls if call[0] == 'APPEND'],
+            [(0, 'abc'), (1, 'def'), (2, 'g')])
+        pending[2].callback(None)
+        self.assertNoResult(d)
+        self.assertNotIn(('FINALIZE', '7'), client.calls)
+        pending[0].callback(None)
+        self.successResultOf(d)
+        self.assertEqual(client.calls[-1], ('FINALIZE', '7'))
+
+    def test_segment_retry(self):
+        """
+        ChunkedUpload should retry a segment that fails because of the
+        network.
+        """
+        clock = Clock()
+        client = FakeUploadClient()
+        client.append_results.append(fail(ConnectionLost()))
+        upload = self.ChunkedUpload(
+            client, StringIO('abcdef'), 'video/mp4', segment_size=3,
+            concurrency=2, clock=clock)
+        upload.retry_policy._random = lambda: 0
+        d = upload.start()
+        self.assertNoResult(d)
+        clock.advance(1)
+        self.successResultOf(d)
+        appends = [call[2:] for call in client.calls if call[0] == 'APPEND']
+        self.assertEqual(appends, [(0, 'abc'), (1, 'def'), (0, 'abc')])
+        self.assertEqual(upload.bytes_sent, 6)
+
+    def test_segment_failure(self):
+        """
+        ChunkedUpload should fail without finalizing if a segment can't be
+        sent.
+        """
+        client = FakeUploadClient()
+        client.append_results.append(fail(ForbiddenError(403)))
+        upload = self.ChunkedUpload(
+            client, StringIO('abcdef'), 'video/mp4', segment_size=3,
+            clock=Clock())
+        self.failureResultOf(upload.start(), ForbiddenError)
+        self.assertEqual(
+            [call[0] for call in client.calls], ['INIT', 'APPEND'])
+
+
+class TestSegmentRetryPolicy(TestCase):
+    SegmentRetryPolicy = from_mediaupload('SegmentRetryPolicy')
+
+    def test_delay(self):
+        """
+        SegmentRetryPolicy should back off for network failures as well as
+        server errors, up to its retry limit.
+        """
+        from twisted.python.failure import Failure
+        from txtwitter.error import ServerError
+        policy = self.SegmentRetryPolicy(max_retries=2, clock=Clock())
+        policy._random = lambda: 0
+        lost = Failure(ConnectionLost())
+        self.assertEqual(policy.delay(lost, 0), 1)
+        self.assertEqual(policy.delay(lost, 1), 2)
+        self.assertEqual(policy.delay(lost, 2), None)
+        self.assertEqual(policy.delay(Failure(ServerError(503)), 0), 1)
+        self.assertEqual(policy.delay(Failure(ForbiddenError(403)), 0), None)
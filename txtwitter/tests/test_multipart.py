@@ -0,0 +1,158 @@
+from StringIO import StringIO
+from tempfile import TemporaryFile
+
+from twisted.internet.defer import inlineCallbacks
+from twisted.internet.task import Cooperator
+from twisted.trial.unittest import TestCase
+
+
+def from_multipart(name):
+    @property
+    def prop(self):
+        from txtwitter import multipart
+        return getattr(multipart, name)
+    return prop
+
+
+EXPECTED_BODY = (
+    '--txtwitter\r\n'
+    'Content-Disposition: form-data, name=a\r\n'
+    '\r\n'
+    '1\r\n'
+    '--txtwitter\r\n'
+    'Content-Disposition: form-data, name=b\r\n'
+    '\r\n'
+    '2\r\n'
+    '--txtwitter\r\n'
+    'Content-Disposition: form-data; name=media; filename=image\r\n'
+    'Content-Type: application/octet-stream\r\n'
+    '\r\n'
+    '%s\r\n'
+    '--txtwitter--\r\n'
+)
+
+
+class ReadOnly(object):
+    """
+    A file-like object that can only be read all at once.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class TestMultipartBodyProducer(TestCase):
+    MultipartBodyProducer = from_multipart('MultipartBodyProducer')
+
+    def _real_file(self, data):
+        f = TemporaryFile()
+        self.addCleanup(f.close)
+        f.write(data)
+        f.seek(0)
+        return f
+
+    @inlineCallbacks
+    def _produce(self, media, data, **kw):
+        producer = self.MultipartBodyProducer(
+            {'b': 2, 'a': 1}, 'image', media, **kw)
+        consumer = StringIO()
+        yield producer.startProducing(consumer)
+        body = consumer.getvalue()
+        self.assertEqual(body, EXPECTED_BODY % (data,))
+        self.assertEqual(producer.length, len(body))
+
+    def test_string(self):
+        """
+        MultipartBodyProducer should send a string with the form fields.
+        """
+        return self._produce('media', 'media')
+
+    def test_real_file(self):
+        """
+        MultipartBodyProducer should send a real file from a memory map,
+        without moving it.
+        """
+        f = self._real_file('0123456789')
+        f.seek(2)
+        d = self._produce(f, '23456789')
+        d.addCallback(lambda _: self.assertEqual(f.tell(), 2))
+        return d
+
+    def test_real_file_window(self):
+        """
+        MultipartBodyProducer should send part of a file if asked to.
+        """
+        return self._produce(
+            self._real_file('0123456789'), '345', offset=3, size=3)
+
+    def test_empty_real_file(self):
+        """
+        MultipartBodyProducer should cope with an empty file, which can't be
+        mapped.
+        """
+        return self._produce(self._real_file(''), '')
+
+    def test_file_like(self):
+        """
+        MultipartBodyProducer should read other seekable files in a thread,
+        without moving them.
+        """
+        f = StringIO('0123456789')
+        f.seek(5)
+        self.MultipartBodyProducer({}, 'image', f)
+        self.assertEqual(f.tell(), 5)
+        d = self._produce(f, '56789')
+        d.addCallback(lambda _: self.assertEqual(f.tell(), 5))
+        return d
+
+    def test_read_only(self):
+        """
+        MultipartBodyProducer should read files it can't seek all at once.
+        """
+        return self._produce(ReadOnly('content'), 'content')
+
+    def test_big_file(self):
+        """
+        MultipartBodyProducer should send files bigger than a chunk in
+        pieces.
+        """
+        from txtwitter.multipart import CHUNK_SIZE
+        data = 'x' * (CHUNK_SIZE * 2 + 1)
+        return self._produce(self._real_file(data), data)
+
+    def test_bad_window(self):
+        """
+        MultipartBodyProducer should refuse to send more than the file has.
+        """
+        self.assertRaises(
+            ValueError, self.MultipartBodyProducer, {}, 'image', 'abc',
+            offset=2, size=2)
+
+    def test_pause_and_stop(self):
+        """
+        MultipartBodyProducer should stop writing while paused, and fail if
+        stopped.
+        """
+        from twisted.internet.task import TaskStopped
+        from txtwitter.multipart import CHUNK_SIZE
+        ticks = []
+        # Each tick of this cooperator does one step of work.
+        cooperator = Cooperator(
+            terminationPredicateFactory=lambda: lambda: True,
+            scheduler=ticks.append)
+        data = 'x' * (CHUNK_SIZE * 3)
+        producer = self.MultipartBodyProducer(
+            {}, 'image', self._real_file(data), cooperator=cooperator)
+        consumer = StringIO()
+        d = producer.startProducing(consumer)
+        ticks.pop()()
+        written = consumer.getvalue()
+        self.assertTrue(written)
+        producer.pauseProducing()
+        self.assertEqual(consumer.getvalue(), written)
+        producer.stopProducing()
+        self.failureResultOf(d, TaskStopped)
+        self.assertEqual(producer._mmap, None)
@@ -0,0 +1,101 @@
+from oauthlib import oauth1
+from twisted.trial.unittest import TestCase
+
+
+def from_oauth(name):
+    @property
+    def prop(self):
+        from txtwitter import oauth
+        return getattr(oauth, name)
+    return prop
+
+
+class TestOAuth1Signer(TestCase):
+    _OAuth1Signer = from_oauth('OAuth1Signer')
+
+    def _signer(self):
+        return self._OAuth1Signer(
+            'consumer-key', 'consumer-secret', 'token-key', 'token-secret')
+
+    def _oauthlib_header(self, method, uri, body=None):
+        headers = {}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        client = oauth1.Client(
+            'consumer-key', client_secret='consumer-secret',
+            resource_owner_key='token-key',
+            resource_owner_secret='token-secret', nonce='nonce',
+            timestamp='1234567890', encoding='utf-8', decoding='utf-8')
+        _, headers, _ = client.sign(
+            uri, http_method=method, headers=headers, body=body)
+        return headers['Authorization']
+
+    def _parse_header(self, header):
+        self.assertTrue(header.startswith('OAuth '))
+        params = {}
+        for param in header[len('OAuth '):].split(', '):
+            key, value = param.split('=', 1)
+            params[key] = value.strip('"')
+        return params
+
+    def assert_same_header(self, header, expected):
+        self.assertEqual(
+            self._parse_header(header), self._parse_header(expected))
+
+    def test_sign_get(self):
+        """
+        A GET request's signature should include the query parameters.
+        """
+        uri = 'https://api.twitter.com/1.1/statuses/show.json?id=123&b=a+b'
+        header = self._signer().sign(
+            'GET', uri, nonce='nonce', timestamp='1234567890')
+        self.assert_same_header(header, self._oauthlib_header('GET', uri))
+
+    def test_sign_post(self):
+        """
+        A POST request's signature should include the body parameters.
+        """
+        uri = 'https://api.twitter.com/1.1/statuses/update.json'
+        params = {'status': 'Hello, world! ~*', 'trim_user': 'true'}
+        header = self._signer().sign(
+            'POST', uri, params, nonce='nonce', timestamp='1234567890')
+        self.assert_same_header(header, self._oauthlib_header(
+            'POST', uri, 'status=Hello%2C+world%21+%7E%2A&trim_user=true'))
+
+    def test_sign_post_unicode(self):
+        """
+        Non-ASCII parameters should be signed as UTF-8.
+        """
+        uri = 'https://api.twitter.com/1.1/statuses/update.json'
+        status = u'Tw\xeb\xebt!'.encode('utf-8')
+        header = self._signer().sign(
+            'POST', uri, {'status': status}, nonce='nonce',
+            timestamp='1234567890')
+        self.assert_same_header(header, self._oauthlib_header(
+            'POST', uri, 'status=Tw%C3%AB%C3%ABt%21'))
+
+    def test_sign_default_port(self):
+        """
+        The default port should not be part of the signed URI.
+        """
+        signer = self._signer()
+        header = signer.sign(
+            'GET', 'https://api.twitter.com:443/1.1/help/tos.json',
+            nonce='nonce', timestamp='1234567890')
+        expected = signer.sign(
+            'GET', 'https://api.twitter.com/1.1/help/tos.json',
+            nonce='nonce', timestamp='1234567890')
+        self.assertEqual(header, expected)
+
+    def test_sign_generates_nonce_and_timestamp(self):
+        """
+        Each request should get a fresh nonce and the current timestamp.
+        """
+        signer = self._signer()
+        uri = 'https://api.twitter.com/1.1/help/tos.json'
+        params1 = self._parse_header(signer.sign('GET', uri))
+        params2 = self._parse_header(signer.sign('GET', uri))
+        self.assertNotEqual(params1['oauth_nonce'], params2['oauth_nonce'])
+        self.assertTrue(params1['oauth_timestamp'].isdigit())
+        self.assertEqual(params1['oauth_consumer_key'], 'consumer-key')
+        self.assertEqual(params1['oauth_token'], 'token-key')
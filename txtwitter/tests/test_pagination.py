@@ -0,0 +1,239 @@
+from array import array
+
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.trial.unittest import TestCase
+
+
+def from_pagination(name):
+    @property
+    def prop(self):
+        from txtwitter import pagination
+        return getattr(pagination, name)
+    return prop
+
+
+class TestPageIterator(TestCase):
+    _PageIterator = from_pagination('_PageIterator')
+
+    def test_callables(self):
+        """
+        _PageIterator should request pages and parse them with the callables
+        it is given until a page is the last one.
+        """
+        pages = [[1, 2], [3]]
+        iterator = self._PageIterator(
+            lambda: succeed(pages.pop(0)),
+            lambda page: (page, not pages), prefetch=False)
+        items = []
+        self.assertEqual(self.successResultOf(iterator.each(items.append)), 3)
+        self.assertEqual(items, [1, 2, 3])
+        self.assertEqual(iterator.pages, 2)
+
+    def test_done(self):
+        """
+        _PageIterator should not request anything if there are no pages.
+        """
+        iterator = self._PageIterator(None, None, done=True)
+        self.assertEqual(self.successResultOf(iterator.next_page()), None)
+
+
+class TestCursorIterator(TestCase):
+    CursorIterator = from_pagination('CursorIterator')
+
+    PAGES = {
+        -1: {'ids': [1, 2], 'next_cursor': 10},
+        10: {'ids': [3, 4], 'next_cursor': 20},
+        20: {'ids': [5], 'next_cursor': 0},
+    }
+
+    def _fetcher(self):
+        fetched = []
+
+        def fetch(cursor):
+            fetched.append(cursor)
+            return succeed(self.PAGES[cursor])
+
+        return fetched, fetch
+
+    def test_next_page(self):
+        """
+        CursorIterator should return each page of IDs as an array, and then
+        None.
+        """
+        fetched, fetch = self._fetcher()
+        pages = self.CursorIterator(fetch)
+        ids = self.successResultOf(pages.next_page())
+        self.assertEqual(ids, array('L', [1, 2]))
+        self.assertEqual(pages.cursor, 10)
+        self.assertEqual(
+            self.successResultOf(pages.next_page()), array('L', [3, 4]))
+        self.assertEqual(
+            self.successResultOf(pages.next_page()), array('L', [5]))
+        self.assertTrue(pages.done)
+        self.assertEqual(self.successResultOf(pages.next_page()), None)
+        self.assertEqual(fetched, [-1, 10, 20])
+        self.assertEqual(pages.pages, 3)
+
+    def test_prefetch(self):
+        """
+        CursorIterator should request the next page as soon as a page is
+        returned.
+        """
+        requests = {}
+
+        def fetch(cursor):
+            d = requests[cursor] = Deferred()
+            return d
+
+        pages = self.CursorIterator(fetch)
+        d = pages.next_page()
+        requests[-1].callback(self.PAGES[-1])
+        self.successResultOf(d)
+        self.assertEqual(sorted(requests), [-1, 10])
+        requests[10].callback(self.PAGES[10])
+        self.assertEqual(
+            self.successResultOf(pages.next_page()), array('L', [3, 4]))
+
+    def test_no_prefetch(self):
+        """
+        CursorIterator should only request pages when asked to if prefetch is
+        off.
+        """
+        fetched, fetch = self._fetcher()
+        pages = self.CursorIterator(fetch, prefetch=False)
+        self.successResultOf(pages.next_page())
+        self.assertEqual(fetched, [-1])
+
+    def test_resume(self):
+        """
+        CursorIterator should start at the cursor it is given.
+        """
+        fetched, fetch = self._fetcher()
+        pages = self.CursorIterator(fetch, cursor=10)
+        self.assertEqual(
+            self.successResultOf(pages.all()), array('L', [3, 4, 5]))
+        self.assertEqual(fetched, [10, 20])
+
+    def test_failure_keeps_cursor(self):
+        """
+        CursorIterator should leave the cursor alone when a page fails, so
+        that it can be retried.
+        """
+        responses = [succeed(self.PAGES[-1]), fail(ValueError())]
+        pages = self.CursorIterator(lambda cursor: responses.pop(0))
+        self.successResultOf(pages.next_page())
+        self.failureResultOf(pages.next_page(), ValueError)
+        self.assertEqual(pages.cursor, 10)
+        responses.extend([succeed(self.PAGES[10]), succeed(self.PAGES[20])])
+        self.assertEqual(
+            self.successResultOf(pages.next_page()), array('L', [3, 4]))
+
+    def test_one_page_at_a_time(self):
+        """
+        CursorIterator should refuse to wait for two pages at once.
+        """
+        pages = self.CursorIterator(lambda cursor: Deferred())
+        pages.next_page()
+        self.assertRaises(ValueError, pages.next_page)
+
+    def test_stop(self):
+        """
+        CursorIterator.stop should cancel a prefetched page without moving
+        the cursor.
+        """
+        cancelled = []
+        responses = [succeed(self.PAGES[-1]), Deferred(cancelled.append)]
+        pages = self.CursorIterator(lambda cursor: responses.pop(0))
+        self.successResultOf(pages.next_page())
+        pages.stop()
+        self.assertEqual(len(cancelled), 1)
+        self.assertEqual(pages.cursor, 10)
+
+    def test_each(self):
+        """
+        CursorIterator.each should call a function with every ID, and fire
+        with the number of IDs.
+        """
+        fetched, fetch = self._fetcher()
+        ids = []
+        d = self.CursorIterator(fetch).each(ids.append)
+        self.assertEqual(self.successResultOf(d), 5)
+        self.assertEqual(ids, [1, 2, 3, 4, 5])
+
+
+class TestTimelineWalker(TestCase):
+    TimelineWalker = from_pagination('TimelineWalker')
+
+    def _fetcher(self, ids, page_size=3):
+        fetched = []
+
+        def fetch(max_id):
+            fetched.append(max_id)
+            page = [i for i in ids if max_id is None or i <= max_id]
+            return succeed([{'id': i} for i in page[:page_size]])
+
+        return fetched, fetch
+
+    def _ids(self, pages):
+        return [[item['id'] for item in page] for page in pages]
+
+    def test_walk(self):
+        """
+        TimelineWalker should ask for each page with a max_id one less than
+        the oldest ID so far, and stop at an empty page.
+        """
+        fetched, fetch = self._fetcher([9, 8, 7, 5, 4, 2, 1])
+        walker = self.TimelineWalker(fetch)
+        pages = []
+        while not walker.done:
+            pages.append(self.successResultOf(walker.next_page()))
+        self.assertEqual(self._ids(pages), [[9, 8, 7], [5, 4, 2], [1], []])
+        self.assertEqual(fetched, [None, 6, 1, 0])
+        self.assertEqual(self.successResultOf(walker.next_page()), None)
+        self.assertEqual(walker.newest_id, 9)
+
+    def test_since_id(self):
+        """
+        TimelineWalker should stop at since_id without returning it or
+        anything older.
+        """
+        fetched, fetch = self._fetcher([9, 8, 7, 5, 4, 2, 1])
+        walker = self.TimelineWalker(fetch, since_id=4)
+        items = []
+        d = walker.each(items.append)
+        self.assertEqual(self.successResultOf(d), 4)
+        self.assertEqual([item['id'] for item in items], [9, 8, 7, 5])
+        self.assertEqual(fetched, [None, 6])
+
+    def test_since_id_boundary(self):
+        """
+        TimelineWalker should not ask for another page once the next max_id
+        would be at or before since_id.
+        """
+        fetched, fetch = self._fetcher([9, 8, 7, 6])
+        walker = self.TimelineWalker(fetch, since_id=6)
+        self.assertEqual(
+            self._ids([self.successResultOf(walker.next_page())]), [[9, 8, 7]])
+        self.assertTrue(walker.done)
+        self.assertEqual(fetched, [None])
+
+    def test_max_id(self):
+        """
+        TimelineWalker should start at the max_id it is given.
+        """
+        fetched, fetch = self._fetcher([9, 8, 7, 5])
+        walker = self.TimelineWalker(fetch, max_id=8, prefetch=False)
+        self.assertEqual(
+            self._ids([self.successResultOf(walker.next_page())]), [[8, 7, 5]])
+        self.assertEqual(walker.max_id, 4)
+        self.assertEqual(fetched, [8])
+
+    def test_prefetch(self):
+        """
+        TimelineWalker should request the next page as soon as a page is
+        returned.
+        """
+        fetched, fetch = self._fetcher([9, 8, 7, 5])
+        walker = self.TimelineWalker(fetch)
+        self.successResultOf(walker.next_page())
+        self.assertEqual(fetched, [None, 6])
@@ -0,0 +1,63 @@
+from twisted.trial.unittest import TestCase
+
+
+def from_params(name):
+    @property
+    def prop(self):
+        from txtwitter import params
+        return getattr(params, name)
+    return prop
+
+
+class TestEncoders(TestCase):
+    encode_float = from_params('encode_float')
+    encode_int = from_params('encode_int')
+    encode_list = from_params('encode_list')
+
+    def test_encode_int_types(self):
+        """
+        encode_int should accept ints, longs and integer strings, and reject
+        bools and floats.
+        """
+        self.assertEqual(self.encode_int('n', 42), '42')
+        self.assertEqual(self.encode_int('n', 2 ** 64), '18446744073709551616')
+        self.assertEqual(self.encode_int('n', '42'), '42')
+        self.assertRaises(ValueError, self.encode_int, 'n', True)
+        self.assertRaises(ValueError, self.encode_int, 'n', 4.2)
+
+    def test_encode_int_range(self):
+        """
+        encode_int should name the bound that was broken.
+        """
+        err = self.assertRaises(ValueError, self.encode_int, 'n', 5, max=4)
+        self.assertEqual(
+            str(err), "Parameter 'n' must not be greater than 4, got 5.")
+        err = self.assertRaises(ValueError, self.encode_int, 'n', 3, min=4)
+        self.assertEqual(
+            str(err), "Parameter 'n' must not be less than 4, got 3.")
+
+    def test_encode_float_types(self):
+        """
+        encode_float should accept floats, ints and numeric strings.
+        """
+        self.assertEqual(self.encode_float('f', 1.5), '1.5')
+        self.assertEqual(self.encode_float('f', 2), '2.0')
+        self.assertEqual(self.encode_float('f', '-1.5'), '-1.5')
+        self.assertRaises(ValueError, self.encode_float, 'f', 'x')
+        self.assertRaises(ValueError, self.encode_float, 'f', 91, max=90)
+
+    def test_encode_list(self):
+        """
+        encode_list should join strings and other values with commas, without
+        a trailing comma.
+        """
+        self.assertEqual(self.encode_list('l', ['a', 'b']), 'a,b')
+        self.assertEqual(self.encode_list('l', [1, 'b', 3L]), '1,b,3')
+        self.assertEqual(self.encode_list('l', []), '')
+
+    def test_encode_list_unicode(self):
+        """
+        encode_list should encode lists with ``unicode`` items as UTF-8.
+        """
+        self.assertEqual(
+            self.encode_list('l', [u'caf\xe9', 1]), 'caf\xc3\xa9,1')
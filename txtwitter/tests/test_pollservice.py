@@ -0,0 +1,159 @@
+import gc
+
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+from txtwitter.error import RateLimitedError, ServerError
+from txtwitter.ratelimit import RateLimit
+
+
+def from_pollservice(name):
+    @property
+    def prop(self):
+        from txtwitter import pollservice
+        return getattr(pollservice, name)
+    return prop
+
+
+class TestTwitterPollService(TestCase):
+    _TwitterPollService = from_pollservice('TwitterPollService')
+
+    def _service(self, responses, **kw):
+        polls = []
+
+        def poll(since_id):
+            polls.append(since_id)
+            return responses.pop(0)
+
+        items = []
+        svc = self._TwitterPollService(poll, items.append, **kw)
+        svc.clock = Clock()
+        self.addCleanup(svc.stopService)
+        return svc, polls, items
+
+    def test_delivers_new_items(self):
+        """
+        The service should deliver new items oldest first, and ask only for
+        items newer than the newest it has seen.
+        """
+        svc, polls, items = self._service([
+            succeed([{'id': 3}, {'id': 2}]),
+            succeed([{'id': 4}, {'id': 3}]),
+        ])
+        svc.startService()
+        self.assertEqual(items, [{'id': 2}, {'id': 3}])
+        self.assertEqual(svc.since_id, 3)
+        svc.clock.advance(svc.interval)
+        self.assertEqual(polls, [None, '3'])
+        self.assertEqual(items, [{'id': 2}, {'id': 3}, {'id': 4}])
+
+    def test_since_id(self):
+        """
+        The service should start at the since_id it is given.
+        """
+        svc, polls, items = self._service(
+            [succeed([{'id': 5}])], since_id='4')
+        svc.startService()
+        self.assertEqual(polls, ['4'])
+        self.assertEqual(items, [{'id': 5}])
+
+    def test_adaptive_interval(self):
+        """
+        The interval should shrink after polls with new items and grow after
+        polls without, within the service's limits.
+        """
+        svc, polls, items = self._service(
+            [succeed([{'id': 1}]), succeed([]), succeed([])], interval=60)
+        svc.startService()
+        self.assertEqual(svc.interval, 30)
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 30)
+        svc.clock.advance(30)
+        self.assertEqual(svc.interval, 45)
+        svc.interval = svc.INTERVAL_MAX
+        svc.clock.advance(45)
+        self.assertEqual(svc.interval, svc.INTERVAL_MAX)
+
+    def test_interval_min(self):
+        """
+        The interval should not shrink below INTERVAL_MIN.
+        """
+        svc, polls, items = self._service(
+            [succeed([{'id': 1}])], interval=1)
+        svc.startService()
+        self.assertEqual(svc.interval, svc.INTERVAL_MIN)
+
+    def test_rate_limit_budget(self):
+        """
+        Polls should be spread out so that the rate limit budget lasts until
+        the window resets.
+        """
+        svc, polls, items = self._service(
+            [succeed([{'id': 1}])], interval=10,
+            rate_limit_func=lambda: RateLimit(15, 3, 900))
+        svc.startService()
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 300)
+
+    def test_rate_limit_spent(self):
+        """
+        The service should wait for the window to reset if there is no
+        budget left.
+        """
+        svc, polls, items = self._service(
+            [succeed([])], rate_limit_func=lambda: RateLimit(15, 0, 800))
+        svc.startService()
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 800)
+
+    def test_rate_limited(self):
+        """
+        A rate limited poll should be retried when the window resets.
+        """
+        err = RateLimitedError(429)
+        err.reset = 500
+        errors = []
+        svc, polls, items = self._service([fail(err), succeed([])])
+        svc.set_error_callback(lambda s, f: errors.append(f.value))
+        svc.startService()
+        self.assertEqual(errors, [err])
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 500)
+        svc.clock.advance(500)
+        self.assertEqual(polls, [None, None])
+
+    def test_error_backoff(self):
+        """
+        Other failures should double the interval.
+        """
+        svc, polls, items = self._service(
+            [fail(ServerError(503))], interval=60)
+        svc.startService()
+        self.assertEqual(svc.interval, 120)
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 120)
+
+    def test_delegate_error(self):
+        """
+        A delegate that raises should not stop the polling.
+        """
+        def delegate(item):
+            raise ValueError()
+
+        svc = self._TwitterPollService(
+            lambda since_id: succeed([{'id': 1}]), delegate)
+        svc.clock = Clock()
+        self.addCleanup(svc.stopService)
+        svc.startService()
+        self.assertEqual(len(svc.clock.getDelayedCalls()), 1)
+        # The error is logged when the poll's Deferred is collected.
+        gc.collect()
+        self.assertEqual(len(self.flushLoggedErrors(ValueError)), 1)
+
+    def test_stop(self):
+        """
+        Stopping the service should cancel the poll in flight and the next
+        poll.
+        """
+        d = Deferred()
+        svc, polls, items = self._service([d])
+        svc.startService()
+        svc.stopService()
+        self.assertEqual(svc.clock.getDelayedCalls(), [])
+        self.assertTrue(d.called)
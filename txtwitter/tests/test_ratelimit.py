@@ -0,0 +1,162 @@
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+from twisted.web.http_headers import Headers
+
+
+def from_ratelimit(name):
+    @property
+    def prop(self):
+        from txtwitter import ratelimit
+        return getattr(ratelimit, name)
+    return prop
+
+
+def rate_limit_headers(limit, remaining, reset):
+    return Headers({
+        'x-rate-limit-limit': [str(limit)],
+        'x-rate-limit-remaining': [str(remaining)],
+        'x-rate-limit-reset': [str(reset)],
+    })
+
+
+class TestEndpointNames(TestCase):
+    _normalize_endpoint = from_ratelimit('normalize_endpoint')
+    _endpoint_for_uri = from_ratelimit('endpoint_for_uri')
+
+    def test_normalize_endpoint(self):
+        """
+        Resource names and rate limit status names should be normalized to the
+        same endpoint name.
+        """
+        for resource in ['statuses/show.json', '/statuses/show/:id',
+                         '/statuses/show']:
+            self.assertEqual(
+                self._normalize_endpoint(resource), '/statuses/show')
+
+    def test_endpoint_for_uri(self):
+        """
+        The API version and query should not be part of the endpoint name.
+        """
+        self.assertEqual(self._endpoint_for_uri(
+            'https://api.twitter.com/1.1/statuses/show.json?id=1'),
+            '/statuses/show')
+
+
+class TestRateLimitRegistry(TestCase):
+    _RateLimitRegistry = from_ratelimit('RateLimitRegistry')
+
+    def _registry(self, now=1000):
+        clock = Clock()
+        clock.advance(now)
+        return self._RateLimitRegistry(clock)
+
+    def test_unknown(self):
+        """
+        An endpoint we know nothing about has no budget and no delay.
+        """
+        registry = self._registry()
+        self.assertEqual(registry.get('token', '/statuses/show'), None)
+        self.assertEqual(registry.remaining('token', '/statuses/show'), None)
+        self.assertEqual(registry.delay('token', '/statuses/show'), 0)
+        self.successResultOf(registry.acquire('token', '/statuses/show'))
+
+    def test_update_from_headers(self):
+        """
+        Rate limit headers should update the budget for the endpoint and
+        token.
+        """
+        registry = self._registry()
+        registry.update_from_headers(
+            'token', 'statuses/show.json', rate_limit_headers(180, 179, 1900))
+        rate_limit = registry.get('token', '/statuses/show/:id')
+        self.assertEqual(
+            (rate_limit.limit, rate_limit.remaining, rate_limit.reset),
+            (180, 179, 1900))
+        self.assertEqual(registry.get('other', '/statuses/show'), None)
+
+    def test_update_from_headers_missing(self):
+        """
+        Responses without rate limit headers should be ignored.
+        """
+        registry = self._registry()
+        registry.update_from_headers(
+            'token', '/statuses/show', Headers({}))
+        self.assertEqual(registry.get('token', '/statuses/show'), None)
+
+    def test_update_from_headers_same_window(self):
+        """
+        Calls already counted in the current window should not be added back
+        by a response that was generated before they were made.
+        """
+        registry = self._registry()
+        registry.update('token', '/statuses/show', 180, 100, 1900)
+        registry.update_from_headers(
+            'token', '/statuses/show', rate_limit_headers(180, 150, 1900))
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 100)
+        registry.update_from_headers(
+            'token', '/statuses/show', rate_limit_headers(180, 150, 2800))
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 150)
+
+    def test_update_from_status(self):
+        """
+        A rate limit status response should update all the budgets in it.
+        """
+        registry = self._registry()
+        registry.update_from_status('token', {
+            'rate_limit_context': {'access_token': 'token'},
+            'resources': {
+                'statuses': {
+                    '/statuses/show/:id': {
+                        'limit': 180, 'remaining': 10, 'reset': 1900},
+                    '/statuses/user_timeline': {
+                        'limit': 180, 'remaining': 20, 'reset': 1900},
+                },
+                'friends': {
+                    '/friends/ids': {
+                        'limit': 15, 'remaining': 0, 'reset': 1500},
+                },
+            },
+        })
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 10)
+        self.assertEqual(
+            registry.remaining('token', 'statuses/user_timeline.json'), 20)
+        self.assertEqual(registry.remaining('token', '/friends/ids'), 0)
+
+    def test_window_reset(self):
+        """
+        Once a window has ended, the full budget should be available again.
+        """
+        registry = self._registry()
+        registry.update('token', '/statuses/show', 180, 0, 1900)
+        self.assertEqual(registry.delay('token', '/statuses/show'), 900)
+        registry.clock.advance(900)
+        self.assertEqual(registry.delay('token', '/statuses/show'), 0)
+        rate_limit = registry.get('token', '/statuses/show')
+        self.assertEqual(rate_limit.remaining, 180)
+        self.assertEqual(rate_limit.reset, 1900 + 15 * 60)
+
+    def test_acquire(self):
+        """
+        Acquiring budget should count the call against it.
+        """
+        registry = self._registry()
+        registry.update('token', '/statuses/show', 180, 2, 1900)
+        self.successResultOf(registry.acquire('token', '/statuses/show'))
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 1)
+        self.successResultOf(registry.acquire('token', '/statuses/show'))
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 0)
+
+    def test_acquire_throttled(self):
+        """
+        Acquiring budget when there is none left should wait until the window
+        resets.
+        """
+        registry = self._registry()
+        registry.update('token', '/statuses/show', 180, 0, 1900)
+        d = registry.acquire('token', '/statuses/show')
+        self.assertNoResult(d)
+        registry.clock.advance(899)
+        self.assertNoResult(d)
+        registry.clock.advance(1)
+        self.successResultOf(d)
+        self.assertEqual(registry.remaining('token', '/statuses/show'), 179)
@@ -0,0 +1,117 @@
+from twisted.internet.task import Clock
+from twisted.trial.unittest import TestCase
+
+
+def from_responsecache(name):
+    @property
+    def prop(self):
+        from txtwitter import responsecache
+        return getattr(responsecache, name)
+    return prop
+
+
+class TestResponseCache(TestCase):
+    _ResponseCache = from_responsecache('ResponseCache')
+
+    def _cache(self, **kw):
+        return self._ResponseCache(clock=Clock(), **kw)
+
+    def test_get_set(self):
+        """
+        Stored bodies should be returned by lookups, and lookups should be
+        counted.
+        """
+        cache = self._cache()
+        self.assertEqual(cache.get('a'), None)
+        cache.set('a', 'statuses/show.json', '{"id_str": "1"}')
+        self.assertEqual(cache.get('a'), '{"id_str": "1"}')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.stats(), {
+            'hits': 1,
+            'misses': 2,
+            'evictions': 0,
+            'entries': 1,
+            'bytes': 15,
+        })
+
+    def test_replace(self):
+        """
+        Storing a body for a key that's already cached should replace it.
+        """
+        cache = self._cache()
+        cache.set('a', 'statuses/show.json', 'abc')
+        cache.set('a', 'statuses/show.json', 'de')
+        self.assertEqual(cache.get('a'), 'de')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 2)
+
+    def test_ttl(self):
+        """
+        Entries should expire after their endpoint's TTL.
+        """
+        cache = self._cache(default_ttl=60, ttls={
+            '/statuses/show/:id': 300,
+            'statuses/home_timeline.json': 0,
+        })
+        self.assertEqual(cache.ttl('statuses/show.json'), 300)
+        self.assertEqual(cache.ttl('users/show.json'), 60)
+        cache.set('show', 'statuses/show.json', '1')
+        cache.set('user', 'users/show.json', '2')
+        cache.set('home', 'statuses/home_timeline.json', '3')
+        self.assertFalse('home' in cache)
+
+        cache.clock.advance(59)
+        self.assertTrue('user' in cache)
+        cache.clock.advance(1)
+        self.assertFalse('user' in cache)
+        self.assertEqual(cache.get('show'), '1')
+        cache.clock.advance(240)
+        self.assertEqual(cache.get('show'), None)
+        self.assertEqual(cache.size, 0)
+
+    def test_max_entries(self):
+        """
+        The least recently used entries should be evicted when there are too
+        many.
+        """
+        cache = self._cache(max_entries=2)
+        cache.set('a', 'statuses/show.json', '1')
+        cache.set('b', 'statuses/show.json', '2')
+        cache.get('a')
+        cache.set('c', 'statuses/show.json', '3')
+        self.assertFalse('b' in cache)
+        self.assertTrue('a' in cache)
+        self.assertTrue('c' in cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_max_bytes(self):
+        """
+        The least recently used entries should be evicted when the bodies take
+        up too much space, and bodies that would never fit are not stored.
+        """
+        cache = self._cache(max_entries=None, max_bytes=10)
+        cache.set('a', 'statuses/show.json', '1234')
+        cache.set('b', 'statuses/show.json', '5678')
+        cache.set('c', 'statuses/show.json', '90')
+        self.assertEqual(cache.size, 10)
+        cache.set('d', 'statuses/show.json', '1')
+        self.assertFalse('a' in cache)
+        self.assertEqual(cache.size, 7)
+        cache.set('e', 'statuses/show.json', '12345678901')
+        self.assertFalse('e' in cache)
+        self.assertEqual(len(cache), 3)
+
+    def test_invalidate(self):
+        """
+        Invalidated entries should be removed.
+        """
+        cache = self._cache()
+        cache.set('a', 'statuses/show.json', '1')
+        cache.set('b', 'statuses/show.json', '2')
+        cache.invalidate('a')
+        cache.invalidate('c')
+        self.assertFalse('a' in cache)
+        self.assertTrue('b' in cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
@@ -0,0 +1,173 @@
+from twisted.internet.defer import CancelledError, Deferred, fail, succeed
+from twisted.internet.task import Clock
+from twisted.python.failure import Failure
+from twisted.trial.unittest import TestCase
+
+from txtwitter.error import NotFoundError, RateLimitedError, ServerError
+
+
+def from_retry(name):
+    @property
+    def prop(self):
+        from txtwitter import retry
+        return getattr(retry, name)
+    return prop
+
+
+def rate_limited(reset=None):
+    err = RateLimitedError(429)
+    err.reset = reset
+    return err
+
+
+class TestRetryPolicy(TestCase):
+    _RetryPolicy = from_retry('RetryPolicy')
+
+    def _policy(self, now=1000, **kw):
+        clock = Clock()
+        clock.advance(now)
+        kw.setdefault('jitter', 0)
+        return self._RetryPolicy(clock=clock, **kw)
+
+    def _calls(self, *results):
+        results = list(results)
+        calls = []
+
+        def func():
+            calls.append(None)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                return fail(result)
+            return succeed(result)
+
+        return calls, func
+
+    def test_delay_rate_limited(self):
+        """
+        A rate limited call should be retried when the window resets.
+        """
+        policy = self._policy()
+        self.assertEqual(policy.delay(Failure(rate_limited(1900)), 0), 900)
+        self.assertEqual(policy.delay(Failure(rate_limited(900)), 0), 0)
+
+    def test_delay_backoff(self):
+        """
+        Server errors and rate limited calls without a reset time should be
+        retried with exponential backoff.
+        """
+        policy = self._policy(max_retries=10, backoff_max=10)
+        delays = [policy.delay(Failure(ServerError(503)), retries)
+                  for retries in range(5)]
+        self.assertEqual(delays, [1, 2, 4, 8, 10])
+        self.assertEqual(policy.delay(Failure(rate_limited()), 2), 4)
+
+    def test_delay_not_retried(self):
+        """
+        Other failures should not be retried, and no failure should be retried
+        too many times.
+        """
+        policy = self._policy(max_retries=2)
+        self.assertEqual(policy.delay(Failure(NotFoundError(404)), 0), None)
+        self.assertEqual(policy.delay(Failure(ValueError()), 0), None)
+        self.assertEqual(policy.delay(Failure(ServerError(500)), 2), None)
+
+    def test_delay_jitter(self):
+        """
+        Jitter should add up to the given fraction of the delay.
+        """
+        policy = self._policy(jitter=0.5, backoff_initial=4)
+        policy._random = lambda: 1.0
+        self.assertEqual(policy.delay(Failure(rate_limited(1006)), 0), 9)
+        self.assertEqual(policy.delay(Failure(ServerError(503)), 0), 6)
+        policy._random = lambda: 0.0
+        self.assertEqual(policy.delay(Failure(rate_limited(1006)), 0), 6)
+
+    def test_delay_jitter_bounded(self):
+        """
+        Jitter should be no more than ``backoff_initial`` seconds, so that a
+        long rate limit wait isn't pushed past ``max_wait``.
+        """
+        policy = self._policy(jitter=0.1, backoff_initial=1, max_wait=960)
+        policy._random = lambda: 1.0
+        self.assertEqual(policy.delay(Failure(rate_limited(1900)), 0), 901)
+
+        calls, func = self._calls(rate_limited(1950), 'done')
+        d = policy.call(func)
+        policy.clock.advance(951)
+        self.assertEqual(self.successResultOf(d), 'done')
+        self.assertEqual(len(calls), 2)
+
+    def test_call_success(self):
+        """
+        A call that succeeds should not be retried.
+        """
+        policy = self._policy()
+        calls, func = self._calls('ok')
+        self.assertEqual(self.successResultOf(policy.call(func)), 'ok')
+        self.assertEqual(len(calls), 1)
+
+    def test_call_retry(self):
+        """
+        A failed call should be retried after the delay.
+        """
+        policy = self._policy()
+        calls, func = self._calls(rate_limited(1060), ServerError(502), 'ok')
+        d = policy.call(func)
+        self.assertEqual(len(calls), 1)
+        policy.clock.advance(59)
+        self.assertEqual(len(calls), 1)
+        policy.clock.advance(1)
+        self.assertEqual(len(calls), 2)
+        self.assertNoResult(d)
+        policy.clock.advance(2)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.successResultOf(d), 'ok')
+
+    def test_call_gives_up(self):
+        """
+        The last failure should be returned once the call won't be retried.
+        """
+        policy = self._policy(max_retries=1)
+        calls, func = self._calls(ServerError(500), ServerError(503))
+        d = policy.call(func)
+        policy.clock.advance(1)
+        f = self.failureResultOf(d, ServerError)
+        self.assertEqual(f.value.status, '503')
+        self.assertEqual(len(calls), 2)
+
+    def test_call_max_wait(self):
+        """
+        A retry that would take the total wait over the maximum should not be
+        made.
+        """
+        policy = self._policy(max_wait=600)
+        calls, func = self._calls(ServerError(500), rate_limited(1900))
+        d = policy.call(func)
+        policy.clock.advance(1)
+        self.failureResultOf(d, RateLimitedError)
+        self.assertEqual(len(calls), 2)
+
+    def test_call_cancel_pending_retry(self):
+        """
+        Cancelling the call while a retry is pending should cancel the retry.
+        """
+        policy = self._policy()
+        calls, func = self._calls(ServerError(500), 'ok')
+        d = policy.call(func)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(policy.clock.getDelayedCalls(), [])
+        self.assertEqual(len(calls), 1)
+
+    def test_call_cancel_in_flight(self):
+        """
+        Cancelling the call while an attempt is in flight should cancel the
+        attempt.
+        """
+        policy = self._policy()
+        cancelled = []
+        d = policy.call(lambda: Deferred(cancelled.append))
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(len(cancelled), 1)
+        self.assertEqual(policy.clock.getDelayedCalls(), [])
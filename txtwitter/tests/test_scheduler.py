@@ -0,0 +1,196 @@
+from twisted.internet.defer import CancelledError, Deferred, succeed
+from twisted.trial.unittest import TestCase
+
+
+def from_scheduler(name):
+    @property
+    def prop(self):
+        from txtwitter import scheduler
+        return getattr(scheduler, name)
+    return prop
+
+
+class RecordingRequests(object):
+    def __init__(self):
+        self.started = []
+        self.pending = {}
+
+    def make(self, name):
+        def func():
+            self.started.append(name)
+            d = Deferred()
+            self.pending[name] = d
+            return d
+        return func
+
+    def finish(self, name, result=None):
+        self.pending.pop(name).callback(result)
+
+
+class TestRequestScheduler(TestCase):
+    _RequestScheduler = from_scheduler('RequestScheduler')
+    _PRIORITY_HIGH = from_scheduler('PRIORITY_HIGH')
+    _PRIORITY_LOW = from_scheduler('PRIORITY_LOW')
+
+    def test_runs_immediately(self):
+        """
+        A request should be started immediately if there is capacity.
+        """
+        scheduler = self._RequestScheduler()
+        d = scheduler.submit('a', lambda: succeed('result'))
+        self.assertEqual(self.successResultOf(d), 'result')
+        self.assertEqual(scheduler.in_flight, 0)
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_failure(self):
+        """
+        A failing request should release its slot and fail its Deferred.
+        """
+        scheduler = self._RequestScheduler(max_in_flight=1)
+
+        def fail():
+            raise ValueError("bad")
+
+        d = scheduler.submit('a', fail)
+        self.failureResultOf(d, ValueError)
+        self.assertEqual(scheduler.in_flight, 0)
+
+    def test_global_limit(self):
+        """
+        No more than ``max_in_flight`` requests should run at once.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(max_in_flight=2)
+        ds = [scheduler.submit(name, reqs.make(name)) for name in 'abc']
+        self.assertEqual(reqs.started, ['a', 'b'])
+        self.assertEqual(scheduler.in_flight, 2)
+        self.assertEqual(scheduler.queued, 1)
+
+        reqs.finish('a', 'A')
+        self.assertEqual(self.successResultOf(ds[0]), 'A')
+        self.assertEqual(reqs.started, ['a', 'b', 'c'])
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_endpoint_limit(self):
+        """
+        No more than ``max_in_flight_per_endpoint`` requests should run at once
+        for any endpoint, but other endpoints should not be held up.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(
+            max_in_flight=10, max_in_flight_per_endpoint=1)
+        scheduler.submit('a', reqs.make('a1'))
+        scheduler.submit('a', reqs.make('a2'))
+        scheduler.submit('b', reqs.make('b1'))
+        self.assertEqual(reqs.started, ['a1', 'b1'])
+        self.assertEqual(scheduler.in_flight_for('a'), 1)
+
+        reqs.finish('a1')
+        self.assertEqual(reqs.started, ['a1', 'b1', 'a2'])
+
+    def test_try_submit(self):
+        """
+        try_submit should start a request if there is capacity for it, and
+        leave it alone otherwise.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(
+            max_in_flight=2, max_in_flight_per_endpoint=1)
+        d = scheduler.try_submit('a', reqs.make('a1'))
+        self.assertEqual(scheduler.try_submit('a', reqs.make('a2')), None)
+        scheduler.try_submit('b', reqs.make('b1'))
+        self.assertEqual(scheduler.try_submit('c', reqs.make('c1')), None)
+        self.assertEqual(reqs.started, ['a1', 'b1'])
+        self.assertEqual(scheduler.in_flight, 2)
+        self.assertEqual(scheduler.queued, 0)
+
+        reqs.finish('a1', 'A')
+        self.assertEqual(self.successResultOf(d), 'A')
+        self.assertEqual(scheduler.in_flight_for('a'), 0)
+
+    def test_priority(self):
+        """
+        Queued requests should be started in priority order, and in submission
+        order within a priority.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(max_in_flight=1)
+        scheduler.submit('x', reqs.make('first'))
+        scheduler.submit('x', reqs.make('low'), self._PRIORITY_LOW)
+        scheduler.submit('x', reqs.make('normal1'))
+        scheduler.submit('x', reqs.make('high'), self._PRIORITY_HIGH)
+        scheduler.submit('x', reqs.make('normal2'))
+
+        for name in ['first', 'high', 'normal1', 'normal2']:
+            reqs.finish(name)
+        self.assertEqual(reqs.started, [
+            'first', 'high', 'normal1', 'normal2', 'low'])
+
+    def test_cancel_queued(self):
+        """
+        Cancelling a queued request should remove it from the queue.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(max_in_flight=1)
+        scheduler.submit('x', reqs.make('a'))
+        d = scheduler.submit('x', reqs.make('b'))
+        self.assertEqual(scheduler.queued, 1)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(scheduler.queued, 0)
+
+        reqs.finish('a')
+        self.assertEqual(reqs.started, ['a'])
+
+    def test_cancel_in_flight(self):
+        """
+        Cancelling a request in flight should cancel the request and release
+        its slot.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(max_in_flight=1)
+        d = scheduler.submit('x', reqs.make('a'))
+        scheduler.submit('x', reqs.make('b'))
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(reqs.started, ['a', 'b'])
+        self.assertEqual(scheduler.in_flight, 1)
+
+    def test_cancel_first_of_endpoint(self):
+        """
+        Cancelling the first queued request for an endpoint should let the
+        next one for that endpoint start in its place.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(max_in_flight=1)
+        scheduler.submit('x', reqs.make('a'))
+        d = scheduler.submit('y', reqs.make('b'))
+        scheduler.submit('y', reqs.make('c'))
+        scheduler.submit('x', reqs.make('d'))
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+
+        reqs.finish('a')
+        reqs.finish('c')
+        self.assertEqual(reqs.started, ['a', 'c', 'd'])
+        self.assertEqual(scheduler.queued, 0)
+
+    def test_many_held_back(self):
+        """
+        A long queue for an endpoint at its limit should drain in order
+        without holding up other endpoints.
+        """
+        reqs = RecordingRequests()
+        scheduler = self._RequestScheduler(
+            max_in_flight=4, max_in_flight_per_endpoint=1)
+        for i in range(2000):
+            scheduler.submit('slow', reqs.make(i))
+        scheduler.submit('other', reqs.make('other'))
+        self.assertEqual(reqs.started, [0, 'other'])
+        self.assertEqual(scheduler.queued, 1999)
+
+        for i in range(2000):
+            reqs.finish(i)
+        self.assertEqual(reqs.started, [0, 'other'] + range(1, 2000))
+        self.assertEqual(scheduler.queued, 0)
+        self.assertEqual(scheduler.in_flight, 1)
@@ -227,6 +227,82 @@ class TestTwitterClient(TestCase):
         d.callback(FakeResponse(None, 420))
         self.assertEqual(svc.reconnect_delay, 120)
 
+    def test_connect_failure_reconnects(self):
+        """
+        A failed connection attempt should schedule a reconnection attempt.
+        """
+        from twisted.internet.error import ConnectionRefusedError
+        d1 = Deferred()
+        d2 = Deferred()
+        connect_deferreds = [d1, d2]
+        called = []
+        svc = self._TwitterStreamService(
+            lambda: connect_deferreds.pop(0), None)
+        svc.set_disconnect_callback(lambda s, r: called.append(r))
+        svc.clock = Clock()
+        svc.startService()
+
+        d1.errback(ConnectionRefusedError())
+        [failure] = called
+        self.assertEqual(ConnectionRefusedError, type(failure.value))
+        self.assertEqual(svc._connect_d, None)
+        svc.clock.advance(svc.reconnect_delay)
+        self.assertEqual(connect_deferreds, [])
+
+    def test_connect_failure_rate_limited(self):
+        """
+        A connection attempt that fails because we've been rate limited should
+        wait at least a minute before reconnecting.
+        """
+        from txtwitter.error import RateLimitedError
+        d = Deferred()
+        svc = self._TwitterStreamService(lambda: d, None)
+        svc.clock = Clock()
+        svc.startService()
+
+        d.errback(RateLimitedError(420))
+        self.assertEqual(svc.reconnect_delay, 60)
+
+    def test_connect_timeout(self):
+        """
+        A connection attempt that takes too long should be cancelled and
+        retried.
+        """
+        from twisted.internet.defer import TimeoutError
+        d1 = Deferred()
+        d2 = Deferred()
+        connect_deferreds = [d1, d2]
+        called = []
+        svc = self._TwitterStreamService(
+            lambda: connect_deferreds.pop(0), None, connect_timeout=30)
+        svc.set_disconnect_callback(lambda s, r: called.append(r))
+        svc.clock = Clock()
+        svc.startService()
+
+        svc.clock.advance(29)
+        self.assertEqual(called, [])
+        svc.clock.advance(1)
+        [failure] = called
+        self.assertEqual(TimeoutError, type(failure.value))
+        svc.clock.advance(svc.reconnect_delay)
+        self.assertEqual(connect_deferreds, [])
+
+        d2.callback(FakeResponse(None))
+        svc.clock.advance(30)
+        self.assertEqual(len(called), 1)
+        self.assertNotEqual(svc._stream_response, None)
+
+    def test_connect_timeout_stop_service(self):
+        """
+        Stopping a connecting service should cancel the connection timeout.
+        """
+        d = Deferred()
+        svc = self._TwitterStreamService(lambda: d, None, connect_timeout=30)
+        svc.clock = Clock()
+        svc.startService()
+        svc.stopService()
+        self.assertEqual(svc.clock.getDelayedCalls(), [])
+
     def test_stop_service_not_started(self):
         """
         Stopping an unstarted service should do nothing.
@@ -289,3 +365,30 @@ class TestTwitterClient(TestCase):
         self.assertEqual(svc.running, False)
         self.assertEqual(svc._reconnect_delayedcall, None)
         self.assertEqual(svc.reconnect_delay, 0)
+
+    def test_default_json_decoder(self):
+        """
+        Messages should be decoded with json.loads by default.
+        """
+        d = Deferred()
+        messages = []
+        svc = self._TwitterStreamService(lambda: d, messages.append)
+        svc.startService()
+        stream = FakeResponse(None)
+        d.callback(stream)
+        stream.deliver_data('{"id_str": "1"}\r\n\r\n')
+        self.assertEqual(messages, [{"id_str": "1"}])
+
+    def test_custom_json_decoder(self):
+        """
+        Messages should be decoded with the service's JSON decoder.
+        """
+        d = Deferred()
+        messages = []
+        svc = self._TwitterStreamService(
+            lambda: d, messages.append, json_decoder=lambda line: line[::-1])
+        svc.startService()
+        stream = FakeResponse(None)
+        d.callback(stream)
+        stream.deliver_data('abc\r\n')
+        self.assertEqual(messages, ['cba'])
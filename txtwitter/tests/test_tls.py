@@ -0,0 +1,133 @@
+from twisted.internet.interfaces import (
+    IHandshakeListener, IOpenSSLClientConnectionCreator)
+from twisted.internet.protocol import Protocol
+from twisted.trial.unittest import TestCase
+from zope.interface import implementer
+
+
+def from_tls(name):
+    @property
+    def prop(self):
+        from txtwitter import tls
+        return getattr(tls, name)
+    return prop
+
+
+class FakeTLSProtocol(object):
+    disconnecting = False
+
+    def __init__(self, wrappedProtocol):
+        self.wrappedProtocol = wrappedProtocol
+
+    def handshake(self):
+        if IHandshakeListener.providedBy(self.wrappedProtocol):
+            self.wrappedProtocol.handshakeCompleted()
+
+
+class FakeSSLConnection(object):
+    def __init__(self, session=None):
+        self.session = session
+        self.set_sessions = []
+
+    def get_session(self):
+        return self.session
+
+    def set_session(self, session):
+        self.set_sessions.append(session)
+
+
+@implementer(IOpenSSLClientConnectionCreator)
+class FakeCreator(object):
+    def __init__(self):
+        self.sessions = []
+        self.connections = []
+
+    def clientConnectionForTLS(self, tlsProtocol):
+        connection = FakeSSLConnection(self.sessions.pop(0))
+        self.connections.append(connection)
+        return connection
+
+
+@implementer(IHandshakeListener)
+class HandshakeListeningProtocol(Protocol):
+    handshakes = 0
+
+    def handshakeCompleted(self):
+        self.handshakes += 1
+
+
+class TestResumingTLSOptions(TestCase):
+    _ResumingTLSOptions = from_tls('ResumingTLSOptions')
+
+    def _connect(self, options, session, protocol=None):
+        options.creator.sessions.append(session)
+        tls_protocol = FakeTLSProtocol(protocol or Protocol())
+        connection = options.clientConnectionForTLS(tls_protocol)
+        return tls_protocol, connection
+
+    def test_first_connection(self):
+        """
+        There is no session to resume for the first connection.
+        """
+        options = self._ResumingTLSOptions(FakeCreator())
+        _, connection = self._connect(options, 'session-1')
+        self.assertEqual(connection.set_sessions, [])
+
+    def test_resume_session(self):
+        """
+        New connections should resume the last session once its handshake is
+        complete.
+        """
+        options = self._ResumingTLSOptions(FakeCreator())
+        tls_protocol, _ = self._connect(options, 'session-1')
+        _, connection = self._connect(options, 'session-2')
+        self.assertEqual(connection.set_sessions, [])
+
+        tls_protocol.handshake()
+        _, connection = self._connect(options, 'session-3')
+        self.assertEqual(connection.set_sessions, ['session-1'])
+
+    def test_failed_verification(self):
+        """
+        Sessions with servers that failed verification (and so were
+        disconnected during the handshake) should not be resumed.
+        """
+        options = self._ResumingTLSOptions(FakeCreator())
+        tls_protocol, _ = self._connect(options, 'session-1')
+        tls_protocol.disconnecting = True
+        tls_protocol.handshake()
+        _, connection = self._connect(options, 'session-2')
+        self.assertEqual(connection.set_sessions, [])
+
+    def test_wrapped_protocol(self):
+        """
+        The wrapped protocol should still get its own attributes and
+        handshake notifications.
+        """
+        options = self._ResumingTLSOptions(FakeCreator())
+        protocol = HandshakeListeningProtocol()
+        tls_protocol, _ = self._connect(options, 'session-1', protocol)
+        tls_protocol.wrappedProtocol.makeConnection(tls_protocol)
+        self.assertIdentical(protocol.transport, tls_protocol)
+        tls_protocol.handshake()
+        self.assertEqual(protocol.handshakes, 1)
+
+
+class TestTwitterTLSPolicy(TestCase):
+    _TwitterTLSPolicy = from_tls('TwitterTLSPolicy')
+    _ResumingTLSOptions = from_tls('ResumingTLSOptions')
+
+    def test_creator_per_host(self):
+        """
+        The same connection creator should be used for every connection to a
+        host.
+        """
+        policy = self._TwitterTLSPolicy()
+        creator = policy.creatorForNetloc('api.twitter.com', 443)
+        self.assertIsInstance(creator, self._ResumingTLSOptions)
+        self.assertTrue(
+            IOpenSSLClientConnectionCreator.providedBy(creator.creator))
+        self.assertIdentical(
+            policy.creatorForNetloc('api.twitter.com', 443), creator)
+        other = policy.creatorForNetloc('upload.twitter.com', 443)
+        self.assertNotIdentical(other, creator)
@@ -1,12 +1,26 @@
 import json
+import zlib
+from StringIO import StringIO
 
-from twisted.internet.defer import Deferred, inlineCallbacks
+from twisted.internet.defer import (
+    Deferred, fail, gatherResults, inlineCallbacks, succeed)
+from twisted.internet.error import DNSLookupError
+from twisted.internet.task import Clock
 from twisted.trial.unittest import TestCase
 
 from txtwitter.tests.fake_agent import FakeAgent, FakeResponse
 from txtwitter.tests.fake_twitter import FakeImage
 
 
+def gzip_compressor():
+    return zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def gzip_data(data):
+    compressor = gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
 def from_twitter(name):
     @property
     def prop(self):
@@ -220,7 +234,7 @@ class TestParamHelpers(TestCase):
         """
         params = {}
         self._set_list_param(params, 'list', [1, 2, 3])
-        self.assertEqual(params, {'list': '1,2,3,'})
+        self.assertEqual(params, {'list': '1,2,3'})
 
     def test_set_list_param_min_len(self):
         """
@@ -259,10 +273,10 @@ class TestParamHelpers(TestCase):
         self._set_list_param(params, 'frozenset', frozenset({1, 2, 3}))
         self._set_list_param(params, 'string', 'foo')
         self.assertEqual(params, {
-            'set': '1,2,3,',
-            'tuple': '1,2,3,',
-            'frozenset': '1,2,3,',
-            'string': 'f,o,o,',
+            'set': '1,2,3',
+            'tuple': '1,2,3',
+            'frozenset': '1,2,3',
+            'string': 'f,o,o',
         })
 
 
@@ -274,13 +288,762 @@ class TestTwitterClient(TestCase):
     def _resp_json(self, data, code=200):
         return FakeResponse(json.dumps(data), code)
 
-    def _agent_and_TwitterClient(self):
+    def _agent_and_TwitterClient(self, **kw):
         agent = FakeAgent()
         client = self._TwitterClient(
             'token-key', 'token-secret', 'consumer-key', 'consumer-secret',
-            agent=agent)
+            agent=agent, **kw)
         return agent, client
 
+    def test_default_connection_pool(self):
+        """
+        A client without an agent should use a persistent connection pool.
+        """
+        from txtwitter.connectionpool import TwitterConnectionPool
+        client = self._TwitterClient(
+            'token-key', 'token-secret', 'consumer-key', 'consumer-secret')
+        self.assertIsInstance(client._pool, TwitterConnectionPool)
+        self.assertEqual(client._pool.persistent, True)
+        self.assertEqual(client._agent._pool, client._pool)
+        self.assertEqual(client.connection_pool_stats()['requests'], 0)
+
+    def test_shared_connection_pool(self):
+        """
+        Clients given the same pool should share it.
+        """
+        from txtwitter.connectionpool import TwitterConnectionPool
+        pool = TwitterConnectionPool(None)
+        client1 = self._TwitterClient(
+            'token-key', 'token-secret', 'consumer-key', 'consumer-secret',
+            pool=pool)
+        client2 = self._TwitterClient(
+            'token-key', 'token-secret', 'consumer-key', 'consumer-secret',
+            pool=pool)
+        self.assertEqual(client1._agent._pool, pool)
+        self.assertEqual(client2._agent._pool, pool)
+
+    def test_default_tls_policy(self):
+        """
+        A client without an agent should resume TLS sessions.
+        """
+        from txtwitter.tls import TwitterTLSPolicy
+        client = self._TwitterClient(
+            'token-key', 'token-secret', 'consumer-key', 'consumer-secret')
+        self.assertIsInstance(
+            client._agent._endpointFactory._policyForHTTPS, TwitterTLSPolicy)
+
+        policy = TwitterTLSPolicy()
+        client = self._TwitterClient(
+            'token-key', 'token-secret', 'consumer-key', 'consumer-secret',
+            tls_policy=policy)
+        self.assertIdentical(
+            client._agent._endpointFactory._policyForHTTPS, policy)
+
+    def test_warm_up(self):
+        """
+        Warming up should open a connection to each host.
+        """
+        agent, client = self._agent_and_TwitterClient(
+            stream_url='https://api.twitter.com/stream/')
+        agent.add_expected_request(
+            'HEAD', 'https://api.twitter.com/', {}, FakeResponse(''))
+        agent.add_expected_request(
+            'HEAD', 'https://upload.twitter.com/', {}, FakeResponse(''))
+        self.assertEqual(self.successResultOf(client.warm_up()), {
+            'https://api.twitter.com/': 1,
+            'https://upload.twitter.com/': 1,
+        })
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_warm_up_failure(self):
+        """
+        Failing to connect to a host should not fail the warm-up.
+        """
+        agent, client = self._agent_and_TwitterClient()
+
+        def request(method, uri, headers=None, bodyProducer=None):
+            if uri == 'https://api.twitter.com/':
+                return succeed(FakeResponse(''))
+            return fail(DNSLookupError())
+
+        agent.request = request
+        self.assertEqual(self.successResultOf(client.warm_up(2)), {
+            'https://api.twitter.com/': 2,
+            'https://upload.twitter.com/': 0,
+            'https://stream.twitter.com/': 0,
+        })
+
+    def test_connection_pool_stats_custom_agent(self):
+        """
+        A client with a custom agent has no pool statistics.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        self.assertEqual(client.connection_pool_stats(), None)
+
+    @inlineCallbacks
+    def test_scheduler_priority(self):
+        """
+        Scheduled writes should go ahead of reads, and reads from a client
+        with a lower priority should go last.
+        """
+        from txtwitter.scheduler import RequestScheduler, PRIORITY_LOW
+        scheduler = RequestScheduler(max_in_flight=1)
+        agent, client = self._agent_and_TwitterClient(scheduler=scheduler)
+        api = 'https://api.twitter.com/1.1/'
+        agent.add_expected_request(
+            'GET', api + 'statuses/user_timeline.json', {},
+            self._resp_json([]))
+        agent.add_expected_request(
+            'GET', api + 'statuses/show.json', {'id': '123'},
+            self._resp_json({}))
+        agent.add_expected_request(
+            'POST', api + 'statuses/update.json', {'status': 'Tweet!'},
+            self._resp_json({}))
+        requests = []
+        agent_request = agent.request
+
+        def request(method, uri, *args, **kw):
+            requests.append((method, uri.split('?')[0][len(api):]))
+            return agent_request(method, uri, *args, **kw)
+        agent.request = request
+
+        blocker = Deferred()
+        scheduler.submit('blocker', lambda: blocker)
+        d1 = client.with_priority(PRIORITY_LOW).statuses_user_timeline()
+        d2 = client.statuses_show('123')
+        d3 = client.statuses_update('Tweet!')
+        self.assertEqual(requests, [])
+        self.assertEqual(scheduler.queued, 3)
+
+        blocker.callback(None)
+        yield d1
+        yield d2
+        yield d3
+        self.assertEqual(requests, [
+            ('POST', 'statuses/update.json'),
+            ('GET', 'statuses/show.json'),
+            ('GET', 'statuses/user_timeline.json'),
+        ])
+
+    @inlineCallbacks
+    def test_gzip_response(self):
+        """
+        A gzip client should ask for compressed responses and decompress them.
+        """
+        agent, client = self._agent_and_TwitterClient(gzip=True)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        response_dict = {"id_str": "123", "text": "Tweet!"}
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            gzip_data(json.dumps(response_dict)),
+            headers={'Content-Encoding': ['gzip']}))
+        resp = yield client.statuses_show("123")
+        self.assertEqual(resp, response_dict)
+        [headers] = agent.request_headers
+        self.assertEqual(headers.getRawHeaders('Accept-Encoding'), ['gzip'])
+
+    @inlineCallbacks
+    def test_gzip_uncompressed_response(self):
+        """
+        A gzip client should handle uncompressed responses.
+        """
+        agent, client = self._agent_and_TwitterClient(gzip=True)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        response_dict = {"id_str": "123", "text": "Tweet!"}
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json(response_dict))
+        resp = yield client.statuses_show("123")
+        self.assertEqual(resp, response_dict)
+
+    @inlineCallbacks
+    def test_gzip_error_response(self):
+        """
+        A gzip client should decompress error response bodies.
+        """
+        agent, client = self._agent_and_TwitterClient(gzip=True)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        err_dict = {"errors": [
+            {"message": "Sorry, that page does not exist", "code": 34},
+        ]}
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            gzip_data(json.dumps(err_dict)), 404,
+            headers={'Content-Encoding': ['gzip']}))
+        err = yield client.statuses_show("123").addErrback(lambda f: f.value)
+        code, _phrase, body = err.args
+        self.assertEqual((404, err_dict), (code, json.loads(body)))
+
+    @inlineCallbacks
+    def test_gzip_stream(self):
+        """
+        A gzip client should decompress stream data as it arrives.
+        """
+        agent, client = self._agent_and_TwitterClient(gzip=True)
+        uri = 'https://stream.twitter.com/1.1/statuses/filter.json'
+        stream = FakeResponse(None, headers={'Content-Encoding': ['gzip']})
+        agent.add_expected_request('POST', uri, {'track': 'foo'}, stream)
+
+        connected = Deferred()
+        tweets = []
+        svc = client.stream_filter(tweets.append, track=['foo'])
+        svc.set_connect_callback(connected.callback)
+        svc.startService()
+        yield connected
+
+        compressor = gzip_compressor()
+        stream.deliver_data(compressor.compress(
+            '{"id_str": "1", "text": "Tweet 1", "user": {}}\r\n{"id_str"'))
+        stream.deliver_data(compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.assertEqual(tweets, [
+            {"id_str": "1", "text": "Tweet 1", "user": {}},
+        ])
+        stream.deliver_data(compressor.compress(
+            ': "2", "text": "Tweet 2", "user": {}}\r\n'))
+        stream.deliver_data(compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.assertEqual(tweets, [
+            {"id_str": "1", "text": "Tweet 1", "user": {}},
+            {"id_str": "2", "text": "Tweet 2", "user": {}},
+        ])
+        yield svc.stopService()
+        stream.finished()
+
+    @inlineCallbacks
+    def test_with_item_callback(self):
+        """
+        A client with an item callback should deliver the elements of array
+        responses to the callback.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/home_timeline.json'
+        response_list = [
+            {"id_str": "123", "text": "Tweet!"},
+            {"id_str": "122", "text": "Tweet!"},
+        ]
+        agent.add_expected_request(
+            'GET', uri, {}, self._resp_json(response_list))
+        tweets = []
+        resp = yield client.with_item_callback(
+            tweets.append).statuses_home_timeline()
+        self.assertEqual(resp, 2)
+        self.assertEqual(tweets, response_list)
+
+    @inlineCallbacks
+    def test_with_item_callback_non_array(self):
+        """
+        A client with an item callback should return non-array responses as
+        usual.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        response_dict = {"id_str": "123", "text": "Tweet!"}
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json(response_dict))
+        tweets = []
+        resp = yield client.with_item_callback(
+            tweets.append).statuses_show('123')
+        self.assertEqual(resp, response_dict)
+        self.assertEqual(tweets, [])
+
+    @inlineCallbacks
+    def test_json_decoder(self):
+        """
+        A client with a custom JSON decoder should use it for responses.
+        """
+        decoded = []
+
+        def decoder(data):
+            decoded.append(data)
+            return json.loads(data)
+
+        agent, client = self._agent_and_TwitterClient(json_decoder=decoder)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        response_dict = {"id_str": "123", "text": "Tweet!"}
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json(response_dict))
+        resp = yield client.statuses_show('123')
+        self.assertEqual(resp, response_dict)
+        self.assertEqual(decoded, [json.dumps(response_dict)])
+
+    def test_json_decoder_stream(self):
+        """
+        A client with a custom JSON decoder should pass it to its streams.
+        """
+        agent, client = self._agent_and_TwitterClient(json_decoder=len)
+        svc = client.stream_filter(lambda tweet: None, track=['foo'])
+        self.assertEqual(svc.json_decoder, len)
+        svc = client.userstream_user(lambda tweet: None)
+        self.assertEqual(svc.json_decoder, len)
+
+    @inlineCallbacks
+    def test_rate_limit_headers(self):
+        """
+        Rate limit headers on responses should update the client's rate limit
+        registry.
+        """
+        from txtwitter.ratelimit import RateLimitRegistry
+        registry = RateLimitRegistry(Clock())
+        agent, client = self._agent_and_TwitterClient(rate_limits=registry)
+        self.assertEqual(client.rate_limit('statuses/show.json'), None)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            json.dumps({"id_str": "123"}), headers={
+                'x-rate-limit-limit': ['180'],
+                'x-rate-limit-remaining': ['179'],
+                'x-rate-limit-reset': ['1900'],
+            }))
+        yield client.statuses_show('123')
+        rate_limit = client.rate_limit('statuses/show.json')
+        self.assertEqual(
+            (rate_limit.limit, rate_limit.remaining, rate_limit.reset),
+            (180, 179, 1900))
+        self.assertEqual(
+            registry.remaining('token-key', '/statuses/show'), 179)
+
+    def test_rate_limit_no_registry(self):
+        """
+        A client without a rate limit registry knows nothing about limits.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        self.assertEqual(client.rate_limit('statuses/show.json'), None)
+
+    def test_rate_limit_throttle(self):
+        """
+        Calls to an endpoint with no budget left should wait until the window
+        resets.
+        """
+        from txtwitter.ratelimit import RateLimitRegistry
+        clock = Clock()
+        registry = RateLimitRegistry(clock)
+        registry.update('token-key', '/statuses/show', 180, 0, 60)
+        agent, client = self._agent_and_TwitterClient(rate_limits=registry)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json({"id_str": "123"}))
+        d = client.statuses_show('123')
+        self.assertNoResult(d)
+        self.assertEqual(agent.request_headers, [])
+        clock.advance(60)
+        self.assertEqual(self.successResultOf(d), {"id_str": "123"})
+
+    def test_error_types(self):
+        """
+        Error responses should fail with the most specific error type.
+        """
+        from txtwitter.error import NotFoundError
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        err_dict = {"errors": [{"message": "No status found", "code": 144}]}
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json(err_dict, 404))
+        f = self.failureResultOf(client.statuses_show('123'), NotFoundError)
+        self.assertEqual(f.value.codes, [144])
+
+    def test_rate_limited_no_retry_policy(self):
+        """
+        Without a retry policy, rate limited requests should fail.
+        """
+        from txtwitter.error import RateLimitedError
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            json.dumps({"errors": [{"message": "Rate limit exceeded",
+                                    "code": 88}]}),
+            429, headers={'x-rate-limit-reset': ['60']}))
+        f = self.failureResultOf(
+            client.statuses_show('123'), RateLimitedError)
+        self.assertEqual(f.value.reset, 60)
+
+    def test_retry_policy(self):
+        """
+        With a retry policy, rate limited GET requests should be retried when
+        the window resets.
+        """
+        from txtwitter.retry import RetryPolicy
+        clock = Clock()
+        agent, client = self._agent_and_TwitterClient(
+            retry_policy=RetryPolicy(jitter=0, clock=clock))
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request('GET', uri, {'id': '123'}, FakeResponse(
+            json.dumps({"errors": [{"message": "Rate limit exceeded",
+                                    "code": 88}]}),
+            429, headers={'x-rate-limit-reset': ['60']}))
+        d = client.statuses_show('123')
+        self.assertNoResult(d)
+        self.assertEqual(len(agent.request_headers), 1)
+
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json({"id_str": "123"}))
+        clock.advance(60)
+        self.assertEqual(len(agent.request_headers), 2)
+        self.assertEqual(self.successResultOf(d), {"id_str": "123"})
+
+    @inlineCallbacks
+    def test_retry_policy_post(self):
+        """
+        POST requests should never be retried.
+        """
+        from txtwitter.error import ServerError
+        from txtwitter.retry import RetryPolicy
+        clock = Clock()
+        agent, client = self._agent_and_TwitterClient(
+            retry_policy=RetryPolicy(jitter=0, clock=clock))
+        uri = 'https://api.twitter.com/1.1/statuses/update.json'
+        agent.add_expected_request(
+            'POST', uri, {'status': 'Tweet!'}, FakeResponse('', 503))
+        err = yield client.statuses_update('Tweet!').addErrback(
+            lambda f: f.value)
+        self.assertIsInstance(err, ServerError)
+        self.assertEqual(clock.getDelayedCalls(), [])
+        self.assertEqual(len(agent.request_headers), 1)
+
+    def _expect_statuses_show(self, agent, response_dict):
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123', 'trim_user': 'true'},
+            self._resp_json(response_dict))
+
+    def _cached_client(self):
+        from txtwitter.responsecache import ResponseCache
+        cache = ResponseCache(clock=Clock())
+        agent, client = self._agent_and_TwitterClient(cache=cache)
+        self._expect_statuses_show(agent, {"id_str": "123"})
+        return agent, client, cache
+
+    def test_cache(self):
+        """
+        Repeated GET requests should be answered from the cache.
+        """
+        agent, client, cache = self._cached_client()
+        resp = self.successResultOf(
+            client.statuses_show('123', trim_user=True))
+        self.assertEqual(resp, {"id_str": "123"})
+        resp['text'] = 'changed'
+
+        resp = self.successResultOf(
+            client.statuses_show('123', trim_user=True))
+        self.assertEqual(resp, {"id_str": "123"})
+        self.assertEqual(len(agent.request_headers), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cache_expired(self):
+        """
+        Requests for expired entries should be made again.
+        """
+        agent, client, cache = self._cached_client()
+        self.successResultOf(client.statuses_show('123', trim_user=True))
+        cache.clock.advance(cache.default_ttl)
+        self._expect_statuses_show(agent, {"id_str": "123", "text": "new"})
+        resp = self.successResultOf(
+            client.statuses_show('123', trim_user=True))
+        self.assertEqual(resp, {"id_str": "123", "text": "new"})
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_cache_invalidate(self):
+        """
+        Invalidated responses should be fetched again.
+        """
+        agent, client, cache = self._cached_client()
+        self.successResultOf(client.statuses_show('123', trim_user=True))
+        client.invalidate_cache(
+            'statuses/show.json', {'trim_user': 'true', 'id': '123'})
+        self.assertEqual(len(cache), 0)
+        self._expect_statuses_show(agent, {"id_str": "123"})
+        self.successResultOf(client.statuses_show('123', trim_user=True))
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_cache_error(self):
+        """
+        Error responses should not be cached.
+        """
+        from txtwitter.error import NotFoundError
+        agent, client, cache = self._cached_client()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '404'}, self._resp_json({}, 404))
+        self.failureResultOf(client.statuses_show('404'), NotFoundError)
+        self.assertEqual(len(cache), 0)
+
+    def test_coalesce(self):
+        """
+        Identical GET requests made while one is in flight should share its
+        response.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        resp = FakeResponse(None)
+        agent.add_expected_request('GET', uri, {'id': '123'}, resp)
+        d1 = client.statuses_show('123')
+        d2 = client.statuses_show('123')
+        self.assertEqual(len(agent.request_headers), 1)
+        self.assertNoResult(d1)
+        self.assertNoResult(d2)
+
+        resp.deliver_data(json.dumps({"id_str": "123"}))
+        resp.finished()
+        resp1 = self.successResultOf(d1)
+        resp2 = self.successResultOf(d2)
+        self.assertEqual(resp1, {"id_str": "123"})
+        self.assertEqual(resp2, {"id_str": "123"})
+        self.assertFalse(resp1 is resp2)
+
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json({"id_str": "123"}))
+        self.successResultOf(client.statuses_show('123'))
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_coalesce_different_requests(self):
+        """
+        GET requests with different parameters should not be coalesced.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, FakeResponse(None))
+        agent.add_expected_request(
+            'GET', uri, {'id': '124'}, FakeResponse(None))
+        client.statuses_show('123')
+        client.statuses_show('124')
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_coalesce_error(self):
+        """
+        A failed request should fail all the callers waiting for it.
+        """
+        from txtwitter.error import NotFoundError
+        agent, client = self._agent_and_TwitterClient()
+        d = Deferred()
+        agent.request = lambda *args: d
+        d1 = client.statuses_show('123')
+        d2 = client.statuses_show('123')
+        d.callback(self._resp_json({}, 404))
+        self.failureResultOf(d1, NotFoundError)
+        self.failureResultOf(d2, NotFoundError)
+
+    def _agent_with_pending_request(self, **kw):
+        agent, client = self._agent_and_TwitterClient(**kw)
+        requests = []
+
+        def request(method, uri, *args, **kw):
+            d = Deferred(lambda d: requests.remove(d))
+            requests.append(d)
+            return d
+        agent.request = request
+        return requests, client
+
+    def test_coalesce_cancel(self):
+        """
+        Cancelling the only caller waiting for a coalesced GET request should
+        cancel the request.
+        """
+        from twisted.internet.defer import CancelledError
+        requests, client = self._agent_with_pending_request()
+        d = client.statuses_show('123')
+        self.assertEqual(len(requests), 1)
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        self.assertEqual(requests, [])
+        self.assertEqual(client._in_flight, {})
+
+    def test_coalesce_cancel_one(self):
+        """
+        Cancelling one of the callers waiting for a coalesced GET request
+        should leave the request to the others.
+        """
+        from twisted.internet.defer import CancelledError
+        requests, client = self._agent_with_pending_request()
+        d1 = client.statuses_show('123')
+        d2 = client.statuses_show('123')
+        d1.cancel()
+        self.failureResultOf(d1, CancelledError)
+        self.assertEqual(len(requests), 1)
+
+        requests[0].callback(self._resp_json({"id_str": "123"}))
+        self.assertEqual(self.successResultOf(d2), {"id_str": "123"})
+        self.assertEqual(client._in_flight, {})
+
+    def test_coalesce_disabled(self):
+        """
+        Clients with coalescing disabled should send every request.
+        """
+        agent, client = self._agent_and_TwitterClient(coalesce=False)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, FakeResponse(None))
+        client.statuses_show('123')
+        client.statuses_show('123')
+        self.assertEqual(len(agent.request_headers), 2)
+
+    def test_timeout(self):
+        """
+        A REST request that takes longer than its timeout should be cancelled.
+        """
+        from twisted.internet.defer import TimeoutError
+        agent, client = self._agent_and_TwitterClient(timeouts={'rest': 10})
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        resp = FakeResponse(None)
+        agent.add_expected_request('GET', uri, {'id': '123'}, resp)
+        d = client.statuses_show('123')
+        client.reactor.advance(9)
+        self.assertNoResult(d)
+        client.reactor.advance(1)
+        self.failureResultOf(d, TimeoutError)
+
+    def test_timeout_item_callback(self):
+        """
+        A REST request with an item callback that takes longer than its
+        timeout should stop its response, and no more items should be
+        delivered.
+        """
+        from twisted.internet.defer import TimeoutError
+        agent, client = self._agent_and_TwitterClient(timeouts={'rest': 5})
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/statuses/home_timeline.json'
+        resp = FakeResponse(None)
+        stopped = []
+        resp.finished_callback = stopped.append
+        agent.add_expected_request('GET', uri, {}, resp)
+        items = []
+        d = client.with_item_callback(items.append).statuses_home_timeline()
+        resp.deliver_data('[{"id": 1}, ')
+        client.reactor.advance(6)
+        self.failureResultOf(d, TimeoutError)
+        self.assertEqual(len(stopped), 1)
+
+        resp.deliver_data('{"id": 2}]')
+        self.assertEqual(items, [{"id": 1}])
+
+    def test_timeout_not_reached(self):
+        """
+        A REST request that finishes in time should not be affected by its
+        timeout.
+        """
+        agent, client = self._agent_and_TwitterClient(timeouts={'rest': 10})
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json({"id_str": "123"}))
+        d = client.statuses_show('123')
+        self.assertEqual(self.successResultOf(d), {"id_str": "123"})
+        self.assertEqual(client.reactor.getDelayedCalls(), [])
+
+    def test_stream_timeout(self):
+        """
+        The stream timeout should be used to connect to streams.
+        """
+        agent, client = self._agent_and_TwitterClient(
+            timeouts={'rest': 10, 'stream': 60})
+        svc = client.stream_filter(None, track=['foo'])
+        self.assertEqual(svc.connect_timeout, 60)
+        agent, client = self._agent_and_TwitterClient()
+        svc = client.stream_filter(None, track=['foo'])
+        self.assertEqual(svc.connect_timeout, None)
+
+    def test_hedge_policy(self):
+        """
+        Slow GET requests should be hedged, and the first response used.
+        """
+        from txtwitter.hedging import HedgePolicy
+        policy = HedgePolicy(min_samples=1, budget=1, clock=Clock())
+        policy.tracker('statuses/show.json').record(1)
+        agent, client = self._agent_and_TwitterClient(hedge_policy=policy)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        slow = FakeResponse(None)
+        agent.add_expected_request('GET', uri, {'id': '123'}, slow)
+        d = client.statuses_show('123')
+        self.assertNoResult(d)
+
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, self._resp_json({"id_str": "123"}))
+        policy.clock.advance(1)
+        self.assertEqual(len(agent.request_headers), 2)
+        self.assertEqual(self.successResultOf(d), {"id_str": "123"})
+        self.assertEqual(policy.hedges_won, 1)
+
+    def test_hedge_rate_limit(self):
+        """
+        Hedges should count against the token's rate limit, and should not be
+        sent if they would leave too little of it.
+        """
+        from txtwitter.hedging import HedgePolicy
+        from txtwitter.ratelimit import RateLimitRegistry
+        policy = HedgePolicy(
+            min_samples=1, budget=1, min_remaining=2, clock=Clock())
+        policy.tracker('statuses/show.json').record(1)
+        registry = RateLimitRegistry(Clock())
+        registry.update('token-key', '/statuses/show', 180, 4, 900)
+        agent, client = self._agent_and_TwitterClient(
+            hedge_policy=policy, rate_limits=registry)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, FakeResponse(None))
+        client.statuses_show('123')
+        policy.clock.advance(1)
+        self.assertEqual(len(agent.request_headers), 2)
+        self.assertEqual(registry.remaining('token-key', '/statuses/show'), 2)
+
+        agent.add_expected_request(
+            'GET', uri, {'id': '124'}, FakeResponse(None))
+        client.statuses_show('124')
+        policy.clock.advance(1)
+        self.assertEqual(len(agent.request_headers), 3)
+        self.assertEqual(policy.hedges, 1)
+        self.assertEqual(registry.remaining('token-key', '/statuses/show'), 1)
+
+    def test_hedge_scheduler(self):
+        """
+        Hedges should take a scheduler slot, and should not be sent if there
+        isn't one free.
+        """
+        from txtwitter.hedging import HedgePolicy
+        from txtwitter.scheduler import RequestScheduler
+        policy = HedgePolicy(min_samples=1, budget=1, clock=Clock())
+        policy.tracker('statuses/show.json').record(1)
+        scheduler = RequestScheduler(max_in_flight_per_endpoint=2)
+        agent, client = self._agent_and_TwitterClient(
+            hedge_policy=policy, scheduler=scheduler)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, FakeResponse(None))
+        client.statuses_show('123')
+        policy.clock.advance(1)
+        self.assertEqual(len(agent.request_headers), 2)
+        self.assertEqual(scheduler.in_flight_for('statuses/show.json'), 2)
+
+        agent.add_expected_request(
+            'GET', uri, {'id': '124'}, FakeResponse(None))
+        client.statuses_show('124')
+        self.assertEqual(scheduler.queued, 1)
+
+    def test_hedge_scheduler_full(self):
+        """
+        Hedges should not be sent if the scheduler has no slot for them.
+        """
+        from txtwitter.hedging import HedgePolicy
+        from txtwitter.scheduler import RequestScheduler
+        policy = HedgePolicy(min_samples=1, budget=1, clock=Clock())
+        policy.tracker('statuses/show.json').record(1)
+        scheduler = RequestScheduler(max_in_flight_per_endpoint=1)
+        agent, client = self._agent_and_TwitterClient(
+            hedge_policy=policy, scheduler=scheduler)
+        uri = 'https://api.twitter.com/1.1/statuses/show.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '123'}, FakeResponse(None))
+        client.statuses_show('123')
+        policy.clock.advance(1)
+        self.assertEqual(len(agent.request_headers), 1)
+        self.assertEqual((policy.hedges, policy.available), (0, 1))
+
+    def test_with_priority(self):
+        """
+        with_priority() should return a copy of the client with the given
+        priority and leave the original alone.
+        """
+        agent, client = self._agent_and_TwitterClient()
+        low = client.with_priority(20)
+        self.assertNotEqual(low, client)
+        self.assertEqual(low._priority, 20)
+        self.assertEqual(client._priority, None)
+        self.assertEqual(low._agent, agent)
+
     # Timelines
 
     @inlineCallbacks
@@ -329,6 +1092,50 @@ class TestTwitterClient(TestCase):
             contributor_details=True, include_entities=False)
         self.assertEqual(resp, response_list)
 
+    def test_statuses_mentions_timeline_poller(self):
+        from txtwitter.ratelimit import RateLimitRegistry
+        registry = RateLimitRegistry(Clock())
+        agent, client = self._agent_and_TwitterClient(rate_limits=registry)
+        uri = 'https://api.twitter.com/1.1/statuses/mentions_timeline.json'
+        agent.add_expected_request(
+            'GET', uri, {'since_id': '1', 'count': '200'},
+            self._resp_json([{"id": 3}, {"id": 2}]))
+        registry.update(
+            'token-key', 'statuses/mentions_timeline.json', 15, 2, 600)
+        tweets = []
+        svc = client.statuses_mentions_timeline_poller(
+            tweets.append, since_id='1')
+        svc.clock = Clock()
+        self.addCleanup(svc.stopService)
+        svc.startService()
+        self.assertEqual(tweets, [{"id": 2}, {"id": 3}])
+        self.assertEqual(svc.since_id, 3)
+        # One call is left, so the next poll waits for the window to reset.
+        self.assertEqual(svc.clock.getDelayedCalls()[0].getTime(), 600)
+
+    @inlineCallbacks
+    def test_statuses_user_timeline_walker(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/user_timeline.json'
+        agent.add_expected_request(
+            'GET', uri,
+            {'screen_name': 'bob', 'since_id': '1', 'count': '200'},
+            self._resp_json([{"id": 5}, {"id": 4}]))
+        agent.add_expected_request(
+            'GET', uri,
+            {'screen_name': 'bob', 'since_id': '1', 'max_id': '3',
+             'count': '200'},
+            self._resp_json([{"id": 3}, {"id": 2}]))
+        # The walker needs whole pages even if the client streams items.
+        client = client.with_item_callback(self.fail)
+        walker = client.statuses_user_timeline_walker(
+            since_id=1, screen_name='bob')
+        tweets = []
+        count = yield walker.each(tweets.append)
+        self.assertEqual(count, 4)
+        self.assertEqual(
+            tweets, [{"id": 5}, {"id": 4}, {"id": 3}, {"id": 2}])
+
     @inlineCallbacks
     def test_statuses_user_timeline(self):
         agent, client = self._agent_and_TwitterClient()
@@ -615,7 +1422,7 @@ class TestTwitterClient(TestCase):
             'place_id': 'abc123',
             'display_coordinates': 'true',
             'trim_user': 'true',
-            'media_ids': '1,2,',
+            'media_ids': '1,2',
         }
         agent.add_expected_request(
             'POST', uri, expected_params, self._resp_json(response_dict))
@@ -685,7 +1492,7 @@ class TestTwitterClient(TestCase):
             '--txtwitter\r\n'
             'Content-Disposition: form-data, name=additional_owners\r\n'
             '\r\n'
-            '1,2,\r\n'
+            '1,2\r\n'
             '--txtwitter\r\n'
             'Content-Disposition: form-data; name=media; filename=image\r\n'
             'Content-Type: application/octet-stream\r\n'
@@ -698,6 +1505,208 @@ class TestTwitterClient(TestCase):
         resp = yield client.media_upload(media, additional_owners=[1, 2])
         self.assertEqual(resp, response_dict)
 
+    @inlineCallbacks
+    def test_media_upload_cached(self):
+        from txtwitter.mediacache import MediaCache
+        cache = MediaCache(clock=Clock())
+        agent, client = self._agent_and_TwitterClient(media_cache=cache)
+        uri = 'https://upload.twitter.com/1.1/media/upload.json'
+        response_dict = {
+            'media_id_string': '123',
+            'expires_after_secs': 86400,
+        }
+        expected_body = (
+            '--txtwitter\r\n'
+            'Content-Disposition: form-data; name=media; filename=image\r\n'
+            'Content-Type: application/octet-stream\r\n'
+            '\r\n'
+            'raw_binary_content\r\n'
+            '--txtwitter--\r\n'
+        )
+        agent.add_expected_multipart(
+            uri, expected_body, self._resp_json(response_dict))
+        resp = yield client.media_upload(
+            FakeImage('image', 'raw_binary_content'))
+        self.assertEqual(resp, response_dict)
+
+        # The response can only be read once, so a second upload would fail.
+        cache.clock.advance(60)
+        resp = yield client.media_upload(
+            FakeImage('image', 'raw_binary_content'))
+        self.assertEqual(resp, {
+            'media_id_string': '123',
+            'expires_after_secs': 86340,
+        })
+        self.assertEqual(cache.hits, 1)
+
+    @inlineCallbacks
+    def test_statuses_lookup(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/lookup.json'
+        response_list = [
+            {"id_str": "2", "text": "Tweet 2!"},
+            {"id_str": "1", "text": "Tweet 1!"},
+        ]
+        agent.add_expected_request(
+            'GET', uri, {'id': '1,2'}, self._resp_json(response_list))
+        resp = yield client.statuses_lookup(["1", "2"])
+        self.assertEqual(resp, response_list)
+
+    def test_statuses_lookup_too_many(self):
+        agent, client = self._agent_and_TwitterClient()
+        self.assertRaises(
+            ValueError, client.statuses_lookup, [str(i) for i in range(101)])
+
+    @inlineCallbacks
+    def test_statuses_lookup_all(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/lookup.json'
+        ids = range(1, 251)
+        for start, end in [(1, 101), (101, 201), (201, 251)]:
+            chunk = range(start, end)
+            # Twitter doesn't return tweets in order, or missing tweets.
+            tweets = [{"id_str": str(i)} for i in reversed(chunk) if i != 150]
+            expected_params = {
+                'id': ','.join('%s' % i for i in chunk),
+                'trim_user': 'false',
+            }
+            agent.add_expected_request(
+                'GET', uri, expected_params, self._resp_json(tweets))
+        resp = yield client.statuses_lookup_all(ids, trim_user=False)
+        self.assertEqual(
+            [tweet['id_str'] for tweet in resp],
+            [str(i) for i in ids if i != 150])
+
+    @inlineCallbacks
+    def test_statuses_lookup_all_callback(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/statuses/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '1,2'},
+            self._resp_json([{"id_str": "2"}, {"id_str": "1"}]))
+        tweets = []
+        count = yield client.statuses_lookup_all([1, 2], tweets.append)
+        self.assertEqual(count, 2)
+        self.assertEqual(tweets, [{"id_str": "1"}, {"id_str": "2"}])
+
+    def test_load_status(self):
+        """
+        load_status should look up the tweets asked for in the same turn with
+        one request.
+        """
+        from txtwitter.error import NotFoundError
+        agent, client = self._agent_and_TwitterClient()
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/statuses/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '1,2,3'},
+            self._resp_json([{"id_str": "2"}, {"id_str": "1"}]))
+        d1 = client.load_status(1)
+        d2 = client.load_status("2")
+        d3 = client.load_status(3)
+        self.assertNoResult(d1)
+        client.reactor.advance(0)
+        self.assertEqual(self.successResultOf(d1), {"id_str": "1"})
+        self.assertEqual(self.successResultOf(d2), {"id_str": "2"})
+        self.failureResultOf(d3, NotFoundError)
+
+    @inlineCallbacks
+    def test_load_status_priority(self):
+        """
+        load_status should batch lookups made with different priorities
+        separately, and schedule each batch at its own priority.
+        """
+        from txtwitter.scheduler import (
+            PRIORITY_HIGH, PRIORITY_LOW, RequestScheduler)
+        scheduler = RequestScheduler(max_in_flight=1)
+        agent, client = self._agent_and_TwitterClient(scheduler=scheduler)
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/statuses/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'id': '2'}, self._resp_json([{"id_str": "2"}]))
+        agent.add_expected_request(
+            'GET', uri, {'id': '1,3'},
+            self._resp_json([{"id_str": "1"}, {"id_str": "3"}]))
+        requests = []
+        agent_request = agent.request
+
+        def request(method, uri, *args, **kw):
+            requests.append(uri.split('?')[1])
+            return agent_request(method, uri, *args, **kw)
+        agent.request = request
+
+        blocker = Deferred()
+        scheduler.submit('blocker', lambda: blocker)
+        low = client.with_priority(PRIORITY_LOW)
+        high = client.with_priority(PRIORITY_HIGH)
+        d1 = low.load_status(1)
+        d2 = high.load_status(2)
+        d3 = low.load_status(3)
+        client.reactor.advance(0)
+        self.assertEqual(scheduler.queued, 2)
+
+        blocker.callback(None)
+        tweets = yield gatherResults([d1, d2, d3])
+        self.assertEqual(
+            tweets, [{"id_str": "1"}, {"id_str": "2"}, {"id_str": "3"}])
+        self.assertEqual(requests, ['id=2', 'id=1%2C3'])
+
+    @inlineCallbacks
+    def test_media_upload_chunked(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://upload.twitter.com/1.1/media/upload.json'
+        agent.add_expected_request(
+            'POST', uri, {
+                'command': 'INIT', 'total_bytes': '6',
+                'media_type': 'video/mp4',
+            }, self._resp_json({"media_id_string": "9"}))
+        for index, data in enumerate(['abc', 'def']):
+            expected_body = (
+                '--txtwitter\r\n'
+                'Content-Disposition: form-data, name=command\r\n'
+                '\r\n'
+                'APPEND\r\n'
+                '--txtwitter\r\n'
+                'Content-Disposition: form-data, name=media_id\r\n'
+                '\r\n'
+                '9\r\n'
+                '--txtwitter\r\n'
+                'Content-Disposition: form-data, name=segment_index\r\n'
+                '\r\n'
+                '%d\r\n'
+                '--txtwitter\r\n'
+                'Content-Disposition: form-data; name=media; '
+                'filename=video.mp4\r\n'
+                'Content-Type: application/octet-stream\r\n'
+                '\r\n'
+                '%s\r\n'
+                '--txtwitter--\r\n'
+            ) % (index, data)
+            agent.add_expected_multipart(
+                uri, expected_body, FakeResponse('', 204))
+        agent.add_expected_request(
+            'POST', uri, {'command': 'FINALIZE', 'media_id': '9'},
+            self._resp_json({"media_id_string": "9", "size": 6}))
+        media = StringIO('abcdef')
+        media.name = 'video.mp4'
+        resp = yield client.media_upload_chunked(
+            media, 'video/mp4', segment_size=3)
+        self.assertEqual(resp, {"media_id_string": "9", "size": 6})
+
+    @inlineCallbacks
+    def test_media_upload_status(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://upload.twitter.com/1.1/media/upload.json'
+        response_dict = {
+            "media_id_string": "9",
+            "processing_info": {"state": "in_progress", "check_after_secs": 5},
+        }
+        agent.add_expected_request(
+            'GET', uri, {'command': 'STATUS', 'media_id': '9'},
+            self._resp_json(response_dict))
+        resp = yield client.media_upload_status('9')
+        self.assertEqual(resp, response_dict)
+
     # TODO: Tests for statuses_update_with_media()
     # TODO: Tests for statuses_oembed()
     # TODO: Tests for statuses_retweeters_ids()
@@ -1192,13 +2201,95 @@ class TestTwitterClient(TestCase):
 
     # Friends & Followers
 
-    # TODO: Tests for friendships_no_retweets_ids()
-    # TODO: Tests for friends_ids()
-    # TODO: Tests for followers_ids()
-    # TODO: Tests for friendships_lookup()
+    @inlineCallbacks
+    def test_friendships_no_retweets_ids(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/friendships/no_retweets/ids.json'
+        agent.add_expected_request(
+            'GET', uri, {'stringify_ids': 'true'}, self._resp_json(["1"]))
+        resp = yield client.friendships_no_retweets_ids(stringify_ids=True)
+        self.assertEqual(resp, ["1"])
+
+    @inlineCallbacks
+    def test_friends_ids(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/friends/ids.json'
+        response_dict = {
+            "ids": [1, 2], "next_cursor": 0, "previous_cursor": 0,
+        }
+        expected_params = {
+            'screen_name': 'bob', 'cursor': '-1', 'count': '5000',
+        }
+        agent.add_expected_request(
+            'GET', uri, expected_params, self._resp_json(response_dict))
+        resp = yield client.friends_ids(
+            screen_name='bob', cursor=-1, count=5000)
+        self.assertEqual(resp, response_dict)
+
+    def test_friends_ids_count_too_large(self):
+        agent, client = self._agent_and_TwitterClient()
+        self.assertRaises(ValueError, client.friends_ids, count=5001)
+
+    @inlineCallbacks
+    def test_friends_ids_cursor(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/friends/ids.json'
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '1', 'cursor': '-1'},
+            self._resp_json({"ids": [2, 3], "next_cursor": 5}))
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '1', 'cursor': '5'},
+            self._resp_json({"ids": [4], "next_cursor": 0}))
+        ids = yield client.friends_ids_cursor(user_id='1').all()
+        self.assertEqual(list(ids), [2, 3, 4])
+
+    @inlineCallbacks
+    def test_followers_ids_cursor(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/followers/ids.json'
+        agent.add_expected_request(
+            'GET', uri, {'screen_name': 'bob', 'cursor': '5'},
+            self._resp_json({"ids": [4], "next_cursor": 0}))
+        pages = client.followers_ids_cursor(screen_name='bob', cursor=5)
+        ids = yield pages.next_page()
+        self.assertEqual(list(ids), [4])
+        self.assertTrue(pages.done)
     # TODO: Tests for friendships_incoming()
     # TODO: Tests for friendships_outgoing()
 
+    @inlineCallbacks
+    def test_friendships_lookup(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/friendships/lookup.json'
+        response_list = [
+            {"id_str": "1", "screen_name": "a", "connections": ["none"]},
+        ]
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '1', 'screen_name': 'a'},
+            self._resp_json(response_list))
+        resp = yield client.friendships_lookup(user_id=[1], screen_name=['a'])
+        self.assertEqual(resp, response_list)
+
+    @inlineCallbacks
+    def test_friendships_lookup_all_by_screen_name(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/friendships/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'screen_name': 'bob,alice'},
+            self._resp_json([
+                {"id_str": "1", "screen_name": "Alice"},
+                {"id_str": "2", "screen_name": "Bob"},
+            ]))
+        resp = yield client.friendships_lookup_all(
+            screen_names=['Bob', 'alice'])
+        self.assertEqual([r['id_str'] for r in resp], ['2', '1'])
+
+    def test_friendships_lookup_all_needs_one_kind_of_user(self):
+        agent, client = self._agent_and_TwitterClient()
+        self.assertRaises(ValueError, client.friendships_lookup_all)
+        self.assertRaises(
+            ValueError, client.friendships_lookup_all, [1], ['a'])
+
     @inlineCallbacks
     def test_friendships_create_by_user_id(self):
         agent, client = self._agent_and_TwitterClient()
@@ -1371,10 +2462,69 @@ class TestTwitterClient(TestCase):
     # TODO: Tests for account_update_profile_colors()
     # TODO: Tests for account_update_profile_image()
     # TODO: Tests for blocks_list()
-    # TODO: Tests for blocks_ids()
+    @inlineCallbacks
+    def test_blocks_ids_cursor(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/blocks/ids.json'
+        agent.add_expected_request(
+            'GET', uri, {'cursor': '-1'},
+            self._resp_json({"ids": [7], "next_cursor": 0}))
+        ids = []
+        count = yield client.blocks_ids_cursor().each(ids.append)
+        self.assertEqual((count, ids), (1, [7]))
+
     # TODO: Tests for blocks_create()
     # TODO: Tests for blocks_destroy()
-    # TODO: Tests for users_lookup()
+
+    @inlineCallbacks
+    def test_users_lookup(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/users/lookup.json'
+        response_list = [{"id_str": "1", "screen_name": "a"}]
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '1', 'include_entities': 'false'},
+            self._resp_json(response_list))
+        resp = yield client.users_lookup(user_id=[1], include_entities=False)
+        self.assertEqual(resp, response_list)
+
+    @inlineCallbacks
+    def test_users_lookup_all(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/users/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '3,1,2', 'include_entities': 'false'},
+            self._resp_json([{"id_str": "1"}, {"id_str": "2"}]))
+        resp = yield client.users_lookup_all([3, 1, 2], include_entities=False)
+        self.assertEqual(resp, [{"id_str": "1"}, {"id_str": "2"}])
+
+    def test_load_user(self):
+        """
+        load_user should batch lookups by user ID and by screen name
+        separately.
+        """
+        agent, client = self._agent_and_TwitterClient(batch_window=0.1)
+        client.reactor = Clock()
+        uri = 'https://api.twitter.com/1.1/users/lookup.json'
+        agent.add_expected_request(
+            'GET', uri, {'user_id': '1,2'},
+            self._resp_json([{"id_str": "1"}, {"id_str": "2"}]))
+        agent.add_expected_request(
+            'GET', uri, {'screen_name': 'bob'},
+            self._resp_json([{"id_str": "3", "screen_name": "Bob"}]))
+        d1 = client.load_user(user_id=1)
+        d2 = client.load_user(user_id=2)
+        d3 = client.load_user(screen_name='Bob')
+        client.reactor.advance(0.1)
+        self.assertEqual(self.successResultOf(d1), {"id_str": "1"})
+        self.assertEqual(self.successResultOf(d2), {"id_str": "2"})
+        self.assertEqual(
+            self.successResultOf(d3), {"id_str": "3", "screen_name": "Bob"})
+
+    def test_load_user_needs_one_kind_of_user(self):
+        agent, client = self._agent_and_TwitterClient()
+        self.assertRaises(ValueError, client.load_user)
+        self.assertRaises(ValueError, client.load_user, 1, 'a')
+
     # TODO: Tests for users_show()
     # TODO: Tests for users_search()
     # TODO: Tests for users_contributees()
@@ -1448,4 +2598,58 @@ class TestTwitterClient(TestCase):
     # TODO: Tests for help_languages()
     # TODO: Tests for help_privacy()
     # TODO: Tests for help_tos()
-    # TODO: Tests for application_rate_limit_status()
+
+    @inlineCallbacks
+    def test_application_rate_limit_status(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/application/rate_limit_status.json'
+        response_dict = {
+            "rate_limit_context": {"access_token": "token-key"},
+            "resources": {},
+        }
+        agent.add_expected_request(
+            'GET', uri, {}, self._resp_json(response_dict))
+        resp = yield client.application_rate_limit_status()
+        self.assertEqual(resp, response_dict)
+
+    @inlineCallbacks
+    def test_application_rate_limit_status_all_params(self):
+        agent, client = self._agent_and_TwitterClient()
+        uri = 'https://api.twitter.com/1.1/application/rate_limit_status.json'
+        response_dict = {
+            "rate_limit_context": {"access_token": "token-key"},
+            "resources": {
+                "statuses": {
+                    "/statuses/show/:id": {
+                        "limit": 180, "remaining": 10, "reset": 1900,
+                    },
+                },
+                "users": {},
+            },
+        }
+        agent.add_expected_request(
+            'GET', uri, {'resources': 'statuses,users'},
+            self._resp_json(response_dict))
+        resp = yield client.application_rate_limit_status(
+            resources=['statuses', 'users'])
+        self.assertEqual(resp, response_dict)
+
+    @inlineCallbacks
+    def test_application_rate_limit_status_updates_registry(self):
+        from txtwitter.ratelimit import RateLimitRegistry
+        registry = RateLimitRegistry(Clock())
+        agent, client = self._agent_and_TwitterClient(rate_limits=registry)
+        uri = 'https://api.twitter.com/1.1/application/rate_limit_status.json'
+        response_dict = {
+            "resources": {
+                "statuses": {
+                    "/statuses/show/:id": {
+                        "limit": 180, "remaining": 10, "reset": 1900,
+                    },
+                },
+            },
+        }
+        agent.add_expected_request(
+            'GET', uri, {}, self._resp_json(response_dict))
+        yield client.application_rate_limit_status()
+        self.assertEqual(client.rate_limit('statuses/show.json').remaining, 10)
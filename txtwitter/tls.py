@@ -0,0 +1,106 @@
+"""
+TLS connection setup with cached contexts and session resumption.
+"""
+
+from twisted.internet.interfaces import (
+    IHandshakeListener, IOpenSSLClientConnectionCreator)
+from twisted.internet.ssl import optionsForClientTLS, platformTrust
+from twisted.web.iweb import IPolicyForHTTPS
+from zope.interface import directlyProvides, implementer, providedBy
+
+
+class _HandshakeNotifier(object):
+    """
+    Stands in for the protocol wrapped by a TLS transport, so that we are
+    told when the handshake is complete. Everything else is passed on to the
+    real protocol.
+    """
+
+    def __init__(self, protocol, callback):
+        self.__dict__['_protocol'] = protocol
+        self.__dict__['_callback'] = callback
+        directlyProvides(self, providedBy(protocol), IHandshakeListener)
+
+    def __getattr__(self, name):
+        return getattr(self._protocol, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('__'):
+            # Such as the interface declarations made by directlyProvides().
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._protocol, name, value)
+
+    def handshakeCompleted(self):
+        self._callback()
+        if IHandshakeListener.providedBy(self._protocol):
+            self._protocol.handshakeCompleted()
+
+
+@implementer(IOpenSSLClientConnectionCreator)
+class ResumingTLSOptions(object):
+    """
+    Client TLS options that resume the last session made with them.
+
+    This wraps the connection creator from
+    :func:`twisted.internet.ssl.optionsForClientTLS`, which does all the
+    certificate and hostname verification. After each successful handshake
+    the session is kept, and new connections offer it to the server. If the
+    server accepts it, the new connection skips the full handshake (and the
+    certificate exchange along with it).
+
+    :param creator: The ``IOpenSSLClientConnectionCreator`` to wrap.
+    """
+    _session = None
+
+    def __init__(self, creator):
+        self.creator = creator
+
+    def clientConnectionForTLS(self, tlsProtocol):
+        connection = self.creator.clientConnectionForTLS(tlsProtocol)
+        if self._session is not None:
+            connection.set_session(self._session)
+        tlsProtocol.wrappedProtocol = _HandshakeNotifier(
+            tlsProtocol.wrappedProtocol,
+            lambda: self._handshake_completed(tlsProtocol, connection))
+        return connection
+
+    def _handshake_completed(self, tlsProtocol, connection):
+        # A connection that failed verification has already been aborted by
+        # the time the handshake is complete, and only sessions with servers
+        # that passed verification are worth resuming.
+        if not tlsProtocol.disconnecting:
+            self._session = connection.get_session()
+
+
+@implementer(IPolicyForHTTPS)
+class TwitterTLSPolicy(object):
+    """
+    A TLS policy that reuses one context per host and resumes sessions.
+
+    :class:`twisted.web.client.BrowserLikePolicyForHTTPS` builds a new
+    context, loading the platform's trust roots, for every connection. This
+    policy builds one set of :class:`ResumingTLSOptions` per host and keeps
+    it, so later connections (and reconnects) to the same host are cheap.
+
+    A single policy may be shared by several clients.
+
+    :param trust_root:
+        The trust root to verify servers with. If ``None``, the platform's
+        trust roots are used.
+    """
+
+    def __init__(self, trust_root=None):
+        self._trust_root = trust_root
+        self._creators = {}
+
+    def creatorForNetloc(self, hostname, port):
+        creator = self._creators.get((hostname, port))
+        if creator is None:
+            trust_root = self._trust_root
+            if trust_root is None:
+                trust_root = platformTrust()
+            creator = ResumingTLSOptions(optionsForClientTLS(
+                hostname.decode('ascii'), trustRoot=trust_root))
+            self._creators[(hostname, port)] = creator
+        return creator
@@ -1,15 +1,32 @@
 import json
+from copy import copy
 from StringIO import StringIO
 from urllib import urlencode
+from urlparse import urlsplit
 
-from oauthlib import oauth1
 from twisted.internet import reactor
+from twisted.internet.defer import Deferred, DeferredList, succeed
 from twisted.python.failure import Failure
 from twisted.web.client import (
-    Agent, FileBodyProducer, PartialDownloadError, readBody)
+    Agent, ContentDecoderAgent, FileBodyProducer, GzipDecoder,
+    PartialDownloadError, readBody)
 from twisted.web.http_headers import Headers
 
-from txtwitter.error import TwitterAPIError
+from txtwitter.batchloader import BatchLoader
+from txtwitter.bulk import lookup_all
+from txtwitter.connectionpool import TwitterConnectionPool
+from txtwitter.error import make_api_error
+from txtwitter.jsonstream import parse_json_array
+from txtwitter.mediacache import content_hash
+from txtwitter.mediaupload import SEGMENT_SIZE, ChunkedUpload
+from txtwitter.multipart import BOUNDARY, MultipartBodyProducer
+from txtwitter.oauth import OAuth1Signer
+from txtwitter.pagination import CursorIterator, TimelineWalker
+from txtwitter.params import (
+    encode_bool, encode_float, encode_int, encode_list, encode_str)
+from txtwitter.pollservice import TwitterPollService
+from txtwitter.ratelimit import endpoint_for_uri, normalize_endpoint
+from txtwitter.scheduler import PRIORITY_HIGH, PRIORITY_NORMAL
 from txtwitter.streamservice import TwitterStreamService
 
 
@@ -46,16 +63,8 @@ def set_bool_param(params, name, value):
 
     :returns: ``None``
     """
-    if value is None:
-        return
-
-    if value is True:
-        params[name] = 'true'
-    elif value is False:
-        params[name] = 'false'
-    else:
-        raise ValueError("Parameter '%s' must be boolean or None, got %r." % (
-            name, value))
+    if value is not None:
+        params[name] = encode_bool(name, value)
 
 
 def set_str_param(params, name, value):
@@ -74,16 +83,8 @@ def set_str_param(params, name, value):
 
     :returns: ``None``
     """
-    if value is None:
-        return
-
-    if isinstance(value, str):
-        params[name] = value
-    elif isinstance(value, unicode):
-        params[name] = value.encode('utf-8')
-    else:
-        raise ValueError("Parameter '%s' must be a string or None, got %r." % (
-            name, value))
+    if value is not None:
+        params[name] = encode_str(name, value)
 
 
 def set_float_param(params, name, value, min=None, max=None):
@@ -108,25 +109,8 @@ def set_float_param(params, name, value, min=None, max=None):
 
     :returns: ``None``
     """
-    if value is None:
-        return
-
-    try:
-        value = float(str(value))
-    except:
-        raise ValueError(
-            "Parameter '%s' must be numeric (or a numeric string) or None,"
-            " got %r." % (name, value))
-    if min is not None and value < min:
-        raise ValueError(
-            "Parameter '%s' must not be less than %r, got %r." % (
-                name, min, value))
-    if max is not None and value > max:
-        raise ValueError(
-            "Parameter '%s' must not be greater than %r, got %r." % (
-                name, min, value))
-
-    params[name] = str(value)
+    if value is not None:
+        params[name] = encode_float(name, value, min, max)
 
 
 def set_int_param(params, name, value, min=None, max=None):
@@ -151,25 +135,8 @@ def set_int_param(params, name, value, min=None, max=None):
 
     :returns: ``None``
     """
-    if value is None:
-        return
-
-    try:
-        value = int(str(value))
-    except:
-        raise ValueError(
-            "Parameter '%s' must be an integer (or a string representation of"
-            " an integer) or None, got %r." % (name, value))
-    if min is not None and value < min:
-        raise ValueError(
-            "Parameter '%s' must not be less than %r, got %r." % (
-                name, min, value))
-    if max is not None and value > max:
-        raise ValueError(
-            "Parameter '%s' must not be greater than %r, got %r." % (
-                name, min, value))
-
-    params[name] = str(value)
+    if value is not None:
+        params[name] = encode_int(name, value, min, max)
 
 
 def set_list_param(params, name, value, min_len=None, max_len=None):
@@ -192,92 +159,349 @@ def set_list_param(params, name, value, min_len=None, max_len=None):
     :param int max_len:
         If provided, values longer than this will raise ``ValueError``.
     """
+    if value is not None:
+        params[name] = encode_list(name, value, min_len, max_len)
+
+
+def _str_or_none(value):
     if value is None:
-        return
-
-    if type(value) is dict:
-        raise ValueError(
-            "Parameter '%s' cannot be a dict." % name)
-
-    try:
-        value = list(value)
-    except:
-        raise ValueError(
-            "Parameter '%s' must be a list (or a type that can be turned into"
-            "a list) or None, got %r." % (name, value))
-
-    if min_len is not None and len(value) < min_len:
-        raise ValueError(
-            "Parameter '%s' must not be shorter than %r, got %r." % (
-                name, min_len, value))
-    if max_len is not None and len(value) > max_len:
-        raise ValueError(
-            "Parameter '%s' must not be longer than %r, got %r." % (
-                name, max_len, value))
-
-    list_str = ''
-    for item in value:
-        list_str += '%s,' % item
-    set_str_param(params, name, list_str)
+        return None
+    return str(value)
+
+
+class _InFlight(object):
+    """
+    A GET request in flight, and the Deferreds waiting for its response.
+    """
+
+    def __init__(self):
+        self.waiters = []
+        self.fetched = None
 
 
 class TwitterClient(object):
     """
-    TODO: Document this.
+    A client for Twitter's REST, streaming and upload APIs, acting as the
+    account of a single access token.
+
+    Unless an ``agent`` is provided, requests are made over persistent
+    connections from a :class:`TwitterConnectionPool`. A ``pool`` may be
+    passed in to share connections (and their statistics) between clients.
+    TLS connections are made with a :class:`txtwitter.tls.TwitterTLSPolicy`
+    (or the ``tls_policy`` given), which resumes earlier sessions with the
+    same host. :meth:`warm_up` opens connections ahead of the first call.
+
+    If a :class:`RequestScheduler` is provided as ``scheduler``, REST and
+    upload requests go through it so that the number of requests in flight is
+    limited. Writes are scheduled ahead of reads by default, and
+    :meth:`with_priority` can be used to get a client for background work.
+
+    If ``gzip`` is ``True``, responses from both the REST and streaming APIs
+    are requested with gzip compression and transparently decompressed.
+    Stream data is decompressed as it arrives, so messages are still
+    delivered as soon as their lines are complete.
+
+    Responses and stream messages are decoded with ``json_decoder``, which
+    defaults to ``json.loads``. Any ``loads``-style callable may be used, such
+    as the one returned by :func:`txtwitter.jsondecoder.find_json_decoder`.
+
+    If a :class:`RateLimitRegistry` is provided as ``rate_limits``, it is
+    updated from the rate limit headers on every response, and REST calls are
+    held back until the window resets once an endpoint's budget is spent.
+
+    If a :class:`txtwitter.retry.RetryPolicy` is provided as ``retry_policy``,
+    GET requests that are rate limited or fail with a server error are retried
+    as the policy allows. Requests that change anything are never retried.
+
+    If a :class:`txtwitter.responsecache.ResponseCache` is provided as
+    ``cache``, GET responses are cached by access token and canonical URI, and
+    repeated calls are answered from the cache until their entries expire.
+
+    Unless ``coalesce`` is ``False``, a GET request made while an identical
+    one is already in flight doesn't go out at all. Instead, both callers get
+    the same response (decoded separately for each of them), and only one
+    request is counted against the rate limit.
+
+    ``timeouts`` may map the endpoint classes ``'rest'``, ``'upload'`` and
+    ``'stream'`` to timeouts in seconds. REST and upload requests that take
+    longer than their timeout are cancelled (closing their connection) and
+    fail with ``twisted.internet.defer.TimeoutError``. For streams, the
+    timeout applies to connecting, and a stream that times out reconnects.
+
+    If a :class:`txtwitter.hedging.HedgePolicy` is provided as
+    ``hedge_policy``, slow GET requests are hedged with a duplicate request
+    and answered by whichever of the two responds first.
+
+    If a :class:`txtwitter.mediacache.MediaCache` is provided as
+    ``media_cache``, :meth:`media_upload` hashes the media and reuses an
+    earlier upload of the same content (with the same additional owners)
+    while Twitter still has it, instead of uploading it again.
+
+    :meth:`load_user` and :meth:`load_status` look up single users and tweets,
+    batching all the lookups made within ``batch_window`` seconds (by
+    default, within the same reactor turn) into bulk lookup requests. Lookups
+    made with different priorities (see :meth:`with_priority`) are batched
+    separately, and each batch is scheduled at its lookups' priority.
     """
     reactor = reactor
 
+    _pool = None
+    _scheduler = None
+    _priority = None
+    _item_callback = None
+    _json_decoder = staticmethod(json.loads)
+    _rate_limits = None
+    _retry_policy = None
+    _cache = None
+    _in_flight = None
+    _timeouts = {}
+    _hedge_policy = None
+    _batch_window = 0
+    _loaders = None
+    _media_cache = None
+
     def __init__(self, token_key, token_secret, consumer_key, consumer_secret,
                  api_url=TWITTER_API_URL, stream_url=TWITTER_STREAM_URL,
                  userstream_url=TWITTER_USERSTREAM_URL,
-                 upload_url=TWITTER_UPLOAD_URL, agent=None):
+                 upload_url=TWITTER_UPLOAD_URL, agent=None, pool=None,
+                 scheduler=None, gzip=False, json_decoder=None,
+                 rate_limits=None, retry_policy=None, cache=None,
+                 coalesce=True, tls_policy=None, timeouts=None,
+                 hedge_policy=None, batch_window=0, media_cache=None):
         self._token_key = token_key
         self._token_secret = token_secret
         self._consumer_key = consumer_key
         self._consumer_secret = consumer_secret
+        self._signer = OAuth1Signer(
+            consumer_key, consumer_secret, token_key, token_secret)
         self._api_url_base = api_url
         self._stream_url_base = stream_url
         self._userstream_url_base = userstream_url
         self._upload_url_base = upload_url
         if agent is None:
-            agent = Agent(self.reactor)
+            if pool is None:
+                pool = TwitterConnectionPool(self.reactor)
+            if tls_policy is None:
+                from txtwitter.tls import TwitterTLSPolicy
+                tls_policy = TwitterTLSPolicy()
+            agent = Agent(self.reactor, tls_policy, pool=pool)
+        if gzip:
+            agent = ContentDecoderAgent(agent, [('gzip', GzipDecoder)])
+        self._pool = pool
         self._agent = agent
+        self._scheduler = scheduler
+        if json_decoder is not None:
+            self._json_decoder = json_decoder
+        self._rate_limits = rate_limits
+        self._retry_policy = retry_policy
+        self._cache = cache
+        if coalesce:
+            self._in_flight = {}
+        if timeouts is not None:
+            self._timeouts = timeouts
+        self._hedge_policy = hedge_policy
+        self._batch_window = batch_window
+        self._media_cache = media_cache
+        # Copies of this client share its loaders, so that their lookups are
+        # batched together (if they have the same priority).
+        self._loaders = {}
+
+    def with_priority(self, priority):
+        """
+        Get a copy of this client that schedules requests at a given priority.
 
-    def _make_request(self, method, uri, body_parameters=None):
-        headers = {}
-        body = None
-        if body_parameters is not None:
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded',
-            }
-            body = urlencode(body_parameters)
-        client = oauth1.Client(
-            self._consumer_key, client_secret=self._consumer_secret,
-            resource_owner_key=self._token_key,
-            resource_owner_secret=self._token_secret, encoding='utf-8',
-            decoding='utf-8')
-        uri, headers, body = client.sign(
-            uri, http_method=method, headers=headers, body=body)
-        headers = Headers(dict((k, [v]) for k, v in headers.items()))
+        The copy shares everything else (including the agent and scheduler)
+        with this client. This has no effect if there is no scheduler.
+
+        :param int priority:
+            The priority to use for all requests, such as
+            :data:`txtwitter.scheduler.PRIORITY_LOW` for background crawls.
+
+        :returns: A :class:`TwitterClient`.
+        """
+        client = copy(self)
+        client._priority = priority
+        return client
+
+    def with_item_callback(self, callback):
+        """
+        Get a copy of this client that parses array responses incrementally.
+
+        Each element of an array response (such as a timeline) is passed to
+        ``callback`` as soon as it has arrived, and the whole response is
+        never held in memory. API calls on the copy return Deferreds that fire
+        with the number of elements delivered. Responses that aren't arrays
+        are returned as usual.
+
+        The copy shares everything else (including the agent and scheduler)
+        with this client.
 
+        :param callback: A callable to pass each array element to.
+
+        :returns: A :class:`TwitterClient`.
+        """
+        client = copy(self)
+        client._item_callback = callback
+        return client
+
+    def _without_item_callback(self):
+        # Some helpers need whole responses, whatever this client does.
+        if self._item_callback is None:
+            return self
+        client = copy(self)
+        client._item_callback = None
+        return client
+
+    def _walker(self, method, since_id, max_id, count, kw):
+        client = self._without_item_callback()
+        # The walker does arithmetic on IDs, but the API methods want them as
+        # strings.
+        if since_id is not None:
+            since_id = int(since_id)
+        if max_id is not None:
+            max_id = int(max_id)
+
+        def fetch(max_id):
+            return getattr(client, method)(
+                since_id=_str_or_none(since_id), max_id=_str_or_none(max_id),
+                count=count, **kw)
+
+        return TimelineWalker(fetch, since_id, max_id)
+
+    def _poller(self, method, resource, delegate, since_id, count, kw):
+        client = self._without_item_callback()
+        return TwitterPollService(
+            lambda since_id: getattr(client, method)(
+                since_id=since_id, count=count, **kw),
+            delegate, since_id, lambda: client.rate_limit(resource))
+
+    def _loader(self, name, lookup, key):
+        if self._loaders is None:
+            self._loaders = {}
+        # Each loader makes its lookups with the client that created it, so
+        # copies with different priorities need loaders of their own.
+        loader = self._loaders.get((name, self._priority))
+        if loader is None:
+            client = self._without_item_callback()
+            loader = BatchLoader(
+                lambda values: lookup(client, values), key,
+                delay=self._batch_window, clock=self.reactor)
+            self._loaders[name, self._priority] = loader
+        return loader
+
+    def warm_up(self, connections=1):
+        """
+        Open connections to the API hosts before they are needed.
+
+        DNS lookup, TCP connection setup and the TLS handshake for each host
+        are done now rather than on the first API call. The connections are
+        kept in the connection pool for the calls that follow, and the TLS
+        sessions are kept for any connections made later.
+
+        :param int connections:
+            The number of connections to open to each host. Connections beyond
+            the pool's per-host limit are closed again.
+
+        :returns:
+            A ``Deferred`` that fires with a dict mapping each host URL to the
+            number of connections opened to it. Failures to connect are not
+            errors; they just aren't counted.
+        """
+        hosts = []
+        for base_url in [self._api_url_base, self._upload_url_base,
+                         self._stream_url_base]:
+            scheme, netloc = urlsplit(base_url)[:2]
+            host = '%s://%s/' % (scheme, netloc)
+            if host not in hosts:
+                hosts.append(host)
+
+        requests = []
+        for host in hosts:
+            for _ in range(connections):
+                d = self._agent.request('HEAD', host)
+                # The connection only goes back to the pool once the response
+                # is finished with.
+                d.addCallback(_read_body)
+                requests.append((host, d))
+
+        def count(results):
+            opened = dict((host, 0) for host in hosts)
+            for (host, _), (success, _) in zip(requests, results):
+                if success:
+                    opened[host] += 1
+            return opened
+
+        d = DeferredList([req for _, req in requests], consumeErrors=True)
+        return d.addCallback(count)
+
+    def connection_pool_stats(self):
+        """
+        Get usage statistics for the connection pool this client uses.
+
+        :returns:
+            The dict returned by :meth:`TwitterConnectionPool.stats`, or
+            ``None`` if the client has no :class:`TwitterConnectionPool`.
+        """
+        if not isinstance(self._pool, TwitterConnectionPool):
+            return None
+        return self._pool.stats()
+
+    def _authorization(self, method, uri, body_parameters=None):
+        return self._signer.sign(method, uri, body_parameters)
+
+    def _make_request(self, method, uri, body_parameters=None):
+        headers = {
+            'Authorization': [
+                self._authorization(method, uri, body_parameters)],
+        }
         body_producer = None
-        if body is not None:
-            body_producer = FileBodyProducer(StringIO(body))
+        if body_parameters is not None:
+            headers['Content-Type'] = ['application/x-www-form-urlencoded']
+            body_producer = FileBodyProducer(
+                StringIO(urlencode(body_parameters)))
 
-        d = self._agent.request(method, uri, headers, body_producer)
+        d = self._agent.request(method, uri, Headers(headers), body_producer)
+        d.addCallback(self._update_rate_limits, uri)
         return d.addCallback(self._handle_error)
 
+    def _update_rate_limits(self, response, uri):
+        if self._rate_limits is not None:
+            self._rate_limits.update_from_headers(
+                self._token_key, endpoint_for_uri(uri), response.headers)
+        return response
+
+    def rate_limit(self, resource):
+        """
+        Get the rate limit budget this client has for an API resource.
+
+        :param str resource:
+            The resource, such as ``'statuses/show.json'`` or
+            ``'/statuses/show/:id'``.
+
+        :returns:
+            A :class:`txtwitter.ratelimit.RateLimit`, or ``None`` if the budget
+            is unknown or the client has no rate limit registry.
+        """
+        if self._rate_limits is None:
+            return None
+        return self._rate_limits.get(self._token_key, resource)
+
     def _handle_error(self, response):
         if response.code < 400:
             return response
 
         return _read_body(response).addCallback(lambda body: Failure(
-            TwitterAPIError(response.code, response=body)))
+            make_api_error(response.code, body, response.headers)))
 
     def _parse_response(self, response):
         # TODO: Better exception than this.
-        assert response.code in (200, 201)
-        return readBody(response).addCallback(json.loads)
+        assert response.code in (200, 201, 202, 204)
+        if response.code == 204:
+            # No content, as for media/upload's APPEND command.
+            return succeed(None)
+        if self._item_callback is not None:
+            return parse_json_array(response, self._item_callback)
+        return readBody(response).addCallback(self._json_decoder)
 
     def _make_uri(self, base_uri, resource, parameters=None):
         uri = "%s/%s" % (base_uri.rstrip('/'), resource.lstrip('/'))
@@ -285,15 +509,161 @@ class TwitterClient(object):
             uri = "%s?%s" % (uri, urlencode(parameters))
         return uri
 
+    def _with_timeout(self, func, timeout):
+        # Cancelling a request that is still arriving stops its response too,
+        # including one being parsed for an item callback.
+        return lambda: func().addTimeout(timeout, self.reactor)
+
+    def _schedule(self, method, resource, func):
+        if self._scheduler is None:
+            return func()
+        priority = self._priority
+        if priority is None:
+            priority = PRIORITY_HIGH if method == 'POST' else PRIORITY_NORMAL
+        return self._scheduler.submit(resource, func, priority)
+
+    def _api_call(self, method, resource, func, endpoint_class='rest'):
+        timeout = self._timeouts.get(endpoint_class)
+        if timeout is not None:
+            # The timeout starts when the request is actually made, not while
+            # it's waiting for rate limit budget or a scheduler slot.
+            func = self._with_timeout(func, timeout)
+        if self._rate_limits is None:
+            return self._schedule(method, resource, func)
+        d = self._rate_limits.acquire(
+            self._token_key, normalize_endpoint(resource))
+        return d.addCallback(
+            lambda _: self._schedule(method, resource, func))
+
+    def _cache_key(self, resource, parameters):
+        # Parameters are sorted so that the key doesn't depend on dict order.
+        if parameters is not None:
+            parameters = sorted(parameters.items())
+        return (self._token_key,
+                self._make_uri(self._api_url_base, resource, parameters))
+
+    def invalidate_cache(self, resource, parameters=None):
+        """
+        Remove a cached response, so that the next call fetches it afresh.
+
+        :param str resource: The resource, such as ``'statuses/show.json'``.
+
+        :param dict parameters: The parameters the call was made with.
+        """
+        if self._cache is not None:
+            self._cache.invalidate(self._cache_key(resource, parameters))
+
+    def _request_api(self, resource, uri, parse):
+        def send():
+            return self._make_request('GET', uri).addCallback(parse)
+
+        if self._hedge_policy is not None and self._item_callback is None:
+            # Each request is timed from when it is actually sent, so this
+            # goes inside the rate limit and scheduler wrappers. The hedge
+            # goes through them separately.
+            unhedged_send = send
+
+            def send():
+                return self._hedge_policy.call(
+                    resource, unhedged_send,
+                    lambda: self._send_hedge(resource, unhedged_send))
+
+        def call():
+            return self._api_call('GET', resource, send)
+
+        if self._retry_policy is None:
+            return call()
+        return self._retry_policy.call(call)
+
+    def _send_hedge(self, resource, send):
+        # A hedge is only worth sending if it can be sent straight away, and
+        # it mustn't use up budget that other requests need.
+        endpoint = normalize_endpoint(resource)
+        if self._rate_limits is not None:
+            remaining = self._rate_limits.remaining(self._token_key, endpoint)
+            if (remaining is not None and
+                    remaining <= self._hedge_policy.min_remaining):
+                return None
+        if self._scheduler is None:
+            d = send()
+        else:
+            d = self._scheduler.try_submit(resource, send)
+            if d is None:
+                return None
+        if self._rate_limits is not None:
+            self._rate_limits.acquire(self._token_key, endpoint)
+        return d
+
     def _get_api(self, resource, parameters):
         uri = self._make_uri(self._api_url_base, resource, parameters)
-        d = self._make_request('GET', uri)
-        return d.addCallback(self._parse_response)
+
+        def request(parse):
+            return self._request_api(resource, uri, parse)
+
+        if self._item_callback is not None or (
+                self._cache is None and self._in_flight is None):
+            return request(self._parse_response)
+
+        # From here on we deal in raw response bodies, so that they can be
+        # cached and shared between callers. Each caller decodes its own copy.
+        cache_key = self._cache_key(resource, parameters)
+        if self._cache is not None:
+            body = self._cache.get(cache_key)
+            if body is not None:
+                return succeed(self._json_decoder(body))
+
+        def fetch():
+            d = request(readBody)
+            if self._cache is not None:
+                d.addCallback(self._cache_response, cache_key, resource)
+            return d
+
+        if self._in_flight is None:
+            d = fetch()
+        else:
+            d = self._coalesce(cache_key, fetch)
+        return d.addCallback(self._json_decoder)
+
+    def _coalesce(self, key, fetch):
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            return self._wait_for(key, flight)
+        flight = self._in_flight[key] = _InFlight()
+        d = self._wait_for(key, flight)
+        flight.fetched = fetch()
+        flight.fetched.addBoth(self._land, key, flight)
+        return d
+
+    def _wait_for(self, key, flight):
+        def cancel(d):
+            flight.waiters.remove(d)
+            if not flight.waiters and self._in_flight.get(key) is flight:
+                # Nobody is waiting for the response any more.
+                del self._in_flight[key]
+                flight.fetched.cancel()
+
+        d = Deferred(cancel)
+        flight.waiters.append(d)
+        return d
+
+    def _land(self, result, key, flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        for d in flight.waiters:
+            if not d.called:
+                if isinstance(result, Failure):
+                    d.errback(result)
+                else:
+                    d.callback(result)
+
+    def _cache_response(self, body, cache_key, resource):
+        self._cache.set(cache_key, resource, body)
+        return body
 
     def _post_api(self, resource, parameters):
         uri = self._make_uri(self._api_url_base, resource)
-        d = self._make_request('POST', uri, parameters)
-        return d.addCallback(self._parse_response)
+        return self._api_call('POST', resource, lambda: self._make_request(
+            'POST', uri, parameters).addCallback(self._parse_response))
 
     def _post_stream(self, resource, parameters):
         uri = self._make_uri(self._stream_url_base, resource)
@@ -303,44 +673,39 @@ class TwitterClient(object):
         uri = self._make_uri(self._userstream_url_base, resource, parameters)
         return self._make_request('GET', uri)
 
-    def _upload_media(self, uri, media, params):
-        boundary = 'txtwitter'
-        file_field = 'media'
-
-        body = ''
-        if params:
-            for key, value in params.items():
-                body += '--%s\r\n' % boundary
-                body += 'Content-Disposition: form-data, name=%s\r\n' % key
-                body += '\r\n'
-                body += str(value)
-                body += '\r\n'
-
-        body += '--%s\r\n' % boundary
-        body += 'Content-Disposition: form-data; name=%s; filename=%s\r\n' % (
-            file_field, media.name)
-        body += 'Content-Type: application/octet-stream\r\n'
-        body += '\r\n'
-        body += media.read()
-        body += '\r\n--%s--\r\n' % boundary
-
-        client = oauth1.Client(
-            self._consumer_key, client_secret=self._consumer_secret,
-            resource_owner_key=self._token_key,
-            resource_owner_secret=self._token_secret, encoding='utf-8',
-            decoding='utf-8')
-        uri = self._make_uri(self._upload_url_base, uri)
-        headers = {
-            'Content-Type': 'multipart/form-data; boundary=%s' % boundary,
-        }
-        uri, headers, _ = client.sign(uri, http_method='POST', headers=headers)
-        headers = Headers(dict((k, [v]) for k, v in headers.items()))
-        body_producer = FileBodyProducer(StringIO(body))
-
-        d = self._agent.request('POST', uri, headers, body_producer)
-        d.addCallback(self._handle_error)
-        d.addCallback(self._parse_response)
-        return d
+    def _upload_media(self, resource, media, params):
+        return self._post_multipart(resource, params, media.name, media)
+
+    def _post_multipart(self, resource, params, filename, media, offset=None,
+                        size=None):
+        uri = self._make_uri(self._upload_url_base, resource)
+
+        def request():
+            headers = Headers({
+                'Authorization': [self._authorization('POST', uri)],
+                'Content-Type': [
+                    'multipart/form-data; boundary=%s' % BOUNDARY],
+            })
+            body_producer = MultipartBodyProducer(
+                params, filename, media, offset, size)
+            d = self._agent.request('POST', uri, headers, body_producer)
+            d.addCallback(self._update_rate_limits, uri)
+            d.addCallback(self._handle_error)
+            d.addCallback(self._parse_response)
+            return d
+
+        return self._api_call('POST', resource, request, 'upload')
+
+    def _post_upload(self, resource, parameters):
+        uri = self._make_uri(self._upload_url_base, resource)
+        return self._api_call('POST', resource, lambda: self._make_request(
+            'POST', uri, parameters).addCallback(self._parse_response),
+            'upload')
+
+    def _get_upload(self, resource, parameters):
+        uri = self._make_uri(self._upload_url_base, resource, parameters)
+        return self._api_call('GET', resource, lambda: self._make_request(
+            'GET', uri).addCallback(self._parse_response), 'upload')
 
     # Timelines
 
@@ -390,6 +755,47 @@ class TwitterClient(object):
         set_bool_param(params, 'include_entities', include_entities)
         return self._get_api('statuses/mentions_timeline.json', params)
 
+    def statuses_mentions_timeline_walker(self, since_id=None, max_id=None,
+                                          count=200, **kw):
+        """
+        Walk backwards through the mentions timeline, page by page.
+
+        :param int since_id: The ID to stop at, if any.
+
+        :param int max_id: The newest ID to start at, if any.
+
+        :param int count: The number of tweets to request per page.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_mentions_timeline`.
+
+        :returns: A :class:`txtwitter.pagination.TimelineWalker`.
+        """
+        return self._walker(
+            'statuses_mentions_timeline', since_id, max_id, count, kw)
+
+    def statuses_mentions_timeline_poller(self, delegate, since_id=None,
+                                          count=200, **kw):
+        """
+        Poll the mentions timeline for new tweets.
+
+        :param delegate:
+            A delegate function that will be called with each new tweet
+            dict, oldest first.
+
+        :param str since_id: The newest ID already seen, if any.
+
+        :param int count: The number of tweets to request per poll.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_mentions_timeline`.
+
+        :returns: An unstarted :class:`TwitterPollService`.
+        """
+        return self._poller(
+            'statuses_mentions_timeline', 'statuses/mentions_timeline.json',
+            delegate, since_id, count, kw)
+
     def statuses_user_timeline(self, user_id=None, screen_name=None,
                                since_id=None, count=None, max_id=None,
                                trim_user=None, exclude_replies=None,
@@ -450,6 +856,47 @@ class TwitterClient(object):
         set_bool_param(params, 'include_rts', include_rts)
         return self._get_api('statuses/user_timeline.json', params)
 
+    def statuses_user_timeline_walker(self, since_id=None, max_id=None,
+                                      count=200, **kw):
+        """
+        Walk backwards through a user's timeline, page by page.
+
+        :param int since_id: The ID to stop at, if any.
+
+        :param int max_id: The newest ID to start at, if any.
+
+        :param int count: The number of tweets to request per page.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_user_timeline`.
+
+        :returns: A :class:`txtwitter.pagination.TimelineWalker`.
+        """
+        return self._walker(
+            'statuses_user_timeline', since_id, max_id, count, kw)
+
+    def statuses_user_timeline_poller(self, delegate, since_id=None,
+                                      count=200, **kw):
+        """
+        Poll a user's timeline for new tweets.
+
+        :param delegate:
+            A delegate function that will be called with each new tweet
+            dict, oldest first.
+
+        :param str since_id: The newest ID already seen, if any.
+
+        :param int count: The number of tweets to request per poll.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_user_timeline`.
+
+        :returns: An unstarted :class:`TwitterPollService`.
+        """
+        return self._poller(
+            'statuses_user_timeline', 'statuses/user_timeline.json', delegate,
+            since_id, count, kw)
+
     def statuses_home_timeline(self, count=None, since_id=None, max_id=None,
                                trim_user=None, exclude_replies=None,
                                contributor_details=None,
@@ -500,6 +947,47 @@ class TwitterClient(object):
         set_bool_param(params, 'include_entities', include_entities)
         return self._get_api('statuses/home_timeline.json', params)
 
+    def statuses_home_timeline_walker(self, since_id=None, max_id=None,
+                                      count=200, **kw):
+        """
+        Walk backwards through the home timeline, page by page.
+
+        :param int since_id: The ID to stop at, if any.
+
+        :param int max_id: The newest ID to start at, if any.
+
+        :param int count: The number of tweets to request per page.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_home_timeline`.
+
+        :returns: A :class:`txtwitter.pagination.TimelineWalker`.
+        """
+        return self._walker(
+            'statuses_home_timeline', since_id, max_id, count, kw)
+
+    def statuses_home_timeline_poller(self, delegate, since_id=None,
+                                      count=200, **kw):
+        """
+        Poll the home timeline for new tweets.
+
+        :param delegate:
+            A delegate function that will be called with each new tweet
+            dict, oldest first.
+
+        :param str since_id: The newest ID already seen, if any.
+
+        :param int count: The number of tweets to request per poll.
+
+        Any other keyword arguments are passed to
+        :meth:`statuses_home_timeline`.
+
+        :returns: An unstarted :class:`TwitterPollService`.
+        """
+        return self._poller(
+            'statuses_home_timeline', 'statuses/home_timeline.json', delegate,
+            since_id, count, kw)
+
     # TODO: Implement statuses_retweets_of_me()
 
     # Tweets
@@ -686,11 +1174,237 @@ class TwitterClient(object):
         :returns:
             A dict containing information about the file uploaded. (Contains
             the media id needed to embed the image in the ``media_id`` field).
+            If the client has a media cache, this may describe an earlier
+            upload of the same content.
         """
         params = {}
         set_list_param(
             params, 'additional_owners', additional_owners, max_len=100)
-        return self._upload_media('media/upload.json', media, params)
+        if self._media_cache is None:
+            return self._upload_media('media/upload.json', media, params)
+
+        filename = media.name
+
+        def upload(hashed):
+            digest, media = hashed
+            key = self._media_cache.key(
+                self._token_key, digest, additional_owners)
+            response = self._media_cache.get(key)
+            if response is not None:
+                return response
+            d = self._post_multipart(
+                'media/upload.json', params, filename, media)
+            return d.addCallback(self._cache_media, key)
+
+        return content_hash(media).addCallback(upload)
+
+    def _cache_media(self, response, key):
+        self._media_cache.set(key, response)
+        return response
+
+    def media_upload_init(self, total_bytes, media_type, media_category=None,
+                          additional_owners=None):
+        """
+        Starts a chunked media upload.
+
+        https://dev.twitter.com/rest/reference/post/media/upload-init
+
+        :param int total_bytes: (*required*) The size of the media in bytes.
+
+        :param str media_type:
+            (*required*) The MIME type of the media, such as ``video/mp4``.
+
+        :param str media_category:
+            The category of the media, such as ``tweet_video``.
+
+        :param list additional_owners:
+            A list of Twitter users that will be able to access the uploaded
+            file and embed it in their tweets (maximum 100 users).
+
+        :returns:
+            A dict containing the ``media_id_string`` to send the media's
+            segments with, and the number of seconds the media will be kept
+            for in ``expires_after_secs``.
+        """
+        params = {'command': 'INIT'}
+        set_int_param(params, 'total_bytes', total_bytes, min=1)
+        set_str_param(params, 'media_type', media_type)
+        set_str_param(params, 'media_category', media_category)
+        set_list_param(
+            params, 'additional_owners', additional_owners, max_len=100)
+        return self._post_upload('media/upload.json', params)
+
+    def media_upload_append(self, media_id, segment_index, data,
+                            filename='media', offset=None, size=None):
+        """
+        Uploads a segment of a chunked media upload.
+
+        https://dev.twitter.com/rest/reference/post/media/upload-append
+
+        :param str media_id:
+            (*required*) The ``media_id_string`` returned by
+            :meth:`media_upload_init`.
+
+        :param int segment_index:
+            (*required*) The position of the segment, from ``0`` to ``999``.
+
+        :param data:
+            (*required*) The segment's bytes, or a file to send the segment
+            from. Files are streamed rather than read into memory.
+
+        :param str filename: The name of the file being uploaded.
+
+        :param int offset:
+            The position of the segment in ``data``, if it is a file. If
+            ``None``, the file's current position is used.
+
+        :param int size:
+            The size of the segment, if ``data`` is a file. If ``None``, the
+            rest of the file is sent.
+
+        :returns: ``None``
+        """
+        params = {'command': 'APPEND'}
+        set_str_param(params, 'media_id', media_id)
+        set_int_param(params, 'segment_index', segment_index, min=0, max=999)
+        return self._post_multipart(
+            'media/upload.json', params, filename, data, offset, size)
+
+    def media_upload_finalize(self, media_id):
+        """
+        Finishes a chunked media upload.
+
+        https://dev.twitter.com/rest/reference/post/media/upload-finalize
+
+        :param str media_id:
+            (*required*) The ``media_id_string`` returned by
+            :meth:`media_upload_init`.
+
+        :returns:
+            A dict describing the media. If Twitter needs to process the
+            media before it can be used, there is a ``processing_info`` field
+            and :meth:`media_upload_status` should be polled.
+        """
+        params = {'command': 'FINALIZE'}
+        set_str_param(params, 'media_id', media_id)
+        return self._post_upload('media/upload.json', params)
+
+    def media_upload_status(self, media_id):
+        """
+        Gets the processing status of a finalized chunked media upload.
+
+        https://dev.twitter.com/rest/reference/get/media/upload-status
+
+        :param str media_id:
+            (*required*) The ``media_id_string`` returned by
+            :meth:`media_upload_init`.
+
+        :returns:
+            A dict describing the media, with its processing ``state`` and
+            the number of seconds to wait before checking it again in
+            ``processing_info``.
+        """
+        params = {'command': 'STATUS'}
+        set_str_param(params, 'media_id', media_id)
+        return self._get_upload('media/upload.json', params)
+
+    def media_upload_chunked(self, media, media_type, total_bytes=None,
+                             media_category=None, additional_owners=None,
+                             segment_size=SEGMENT_SIZE, progress=None,
+                             concurrency=1, retry_policy=None):
+        """
+        Uploads media (such as a video) in segments, without reading the
+        whole file into memory.
+
+        See :class:`txtwitter.mediaupload.ChunkedUpload` for the parameters.
+
+        :returns:
+            A ``Deferred`` that fires with a dict describing the media once
+            Twitter has processed it. (Contains the media id needed to embed
+            the media in the ``media_id_string`` field.)
+        """
+        upload = ChunkedUpload(
+            self, media, media_type, total_bytes=total_bytes,
+            media_category=media_category,
+            additional_owners=additional_owners, segment_size=segment_size,
+            progress=progress, concurrency=concurrency,
+            retry_policy=retry_policy, clock=self.reactor)
+        return upload.start()
+
+    def statuses_lookup(self, id, include_entities=None, trim_user=None):
+        """
+        Returns fully-hydrated tweet objects for up to 100 tweets per request.
+
+        https://dev.twitter.com/docs/api/1.1/get/statuses/lookup
+
+        :param list id:
+            (*required*) A list of up to 100 tweet IDs.
+
+        :param bool include_entities:
+            When set to ``False``, the ``entities`` node will not be included.
+
+        :param bool trim_user:
+            When set to ``True``, the tweet's user object includes only the
+            status author's numerical ID.
+
+        :returns:
+            A list of tweet dicts, in no particular order. Tweets that don't
+            exist or can't be seen are left out.
+        """
+        params = {}
+        set_list_param(params, 'id', id, min_len=1, max_len=100)
+        set_bool_param(params, 'include_entities', include_entities)
+        set_bool_param(params, 'trim_user', trim_user)
+        return self._get_api('statuses/lookup.json', params)
+
+    def statuses_lookup_all(self, ids, callback=None, concurrency=4,
+                            include_entities=None, trim_user=None):
+        """
+        Look up any number of tweets with :meth:`statuses_lookup`.
+
+        The IDs are split into requests of 100, and up to ``concurrency`` of
+        the requests are made at once.
+
+        :param ids: An iterable of tweet IDs of any length.
+
+        :param callback:
+            If given, each tweet is passed to this callable as soon as the
+            request it came from finishes, instead of being collected.
+
+        :param int concurrency: The maximum number of requests to make at once.
+
+        The other parameters are the same as for :meth:`statuses_lookup`.
+
+        :returns:
+            A list of tweet dicts in the same order as ``ids``, or the number
+            of tweets found if there is a ``callback``. Tweets that don't exist
+            or can't be seen are left out.
+        """
+        return lookup_all(
+            lambda chunk: self.statuses_lookup(
+                chunk, include_entities=include_entities,
+                trim_user=trim_user),
+            (str(id) for id in ids), lambda tweet: tweet['id_str'],
+            callback, concurrency)
+
+    def load_status(self, id):
+        """
+        Look up a single tweet, batched with other lookups.
+
+        Tweets asked for at about the same time (see ``batch_window``) are
+        fetched together with :meth:`statuses_lookup`.
+
+        :param str id: (*required*) The numerical ID of the desired tweet.
+
+        :returns:
+            A ``Deferred`` that fires with a tweet dict, or fails with
+            :class:`txtwitter.error.NotFoundError` if the tweet doesn't exist
+            or can't be seen.
+        """
+        loader = self._loader(
+            'status', lambda client, ids: client.statuses_lookup(ids),
+            lambda tweet: tweet['id_str'])
+        return loader.load(str(id))
 
     # TODO: Implement statuses_update_with_media()
     # TODO: Implement statuses_oembed()
@@ -748,7 +1462,7 @@ class TwitterClient(object):
 
         svc = TwitterStreamService(
             lambda: self._post_stream('statuses/filter.json', params),
-            delegate)
+            delegate, self._json_decoder, self._timeouts.get('stream'))
         return svc
 
     # TODO: Implement stream_sample()
@@ -795,7 +1509,7 @@ class TwitterClient(object):
 
         svc = TwitterStreamService(
             lambda: self._get_userstream('user.json', params),
-            delegate)
+            delegate, self._json_decoder, self._timeouts.get('stream'))
         return svc
 
     # Direct Messages
@@ -843,6 +1557,48 @@ class TwitterClient(object):
         set_bool_param(params, 'skip_status', skip_status)
         return self._get_api('direct_messages.json', params)
 
+    def direct_messages_walker(self, since_id=None, max_id=None, count=200,
+                               **kw):
+        """
+        Walk backwards through the direct messages received by the
+        authenticating user, page by page.
+
+        :param int since_id: The ID to stop at, if any.
+
+        :param int max_id: The newest ID to start at, if any.
+
+        :param int count: The number of messages to request per page.
+
+        Any other keyword arguments are passed to
+        :meth:`direct_messages`.
+
+        :returns: A :class:`txtwitter.pagination.TimelineWalker`.
+        """
+        return self._walker(
+            'direct_messages', since_id, max_id, count, kw)
+
+    def direct_messages_poller(self, delegate, since_id=None, count=200, **kw):
+        """
+        Poll the direct messages received by the authenticating user for new
+        messages.
+
+        :param delegate:
+            A delegate function that will be called with each new message
+            dict, oldest first.
+
+        :param str since_id: The newest ID already seen, if any.
+
+        :param int count: The number of messages to request per poll.
+
+        Any other keyword arguments are passed to
+        :meth:`direct_messages`.
+
+        :returns: An unstarted :class:`TwitterPollService`.
+        """
+        return self._poller(
+            'direct_messages', 'direct_messages.json', delegate,
+            since_id, count, kw)
+
     def direct_messages_sent(self, since_id=None, max_id=None, count=None,
                              include_entities=None, page=None):
         """
@@ -951,10 +1707,165 @@ class TwitterClient(object):
 
     # Friends & Followers
 
-    # TODO: Implement friendships_no_retweets_ids()
-    # TODO: Implement friends_ids()
-    # TODO: Implement followers_ids()
-    # TODO: Implement friendships_lookup()
+    def friendships_no_retweets_ids(self, stringify_ids=None):
+        """
+        Returns the IDs of users that the authenticating user does not want to
+        receive retweets from.
+
+        https://dev.twitter.com/docs/api/1.1/get/friendships/no_retweets/ids
+
+        :param bool stringify_ids:
+            When set to ``True``, IDs are returned as strings.
+
+        :returns: A list of user IDs.
+        """
+        params = {}
+        set_bool_param(params, 'stringify_ids', stringify_ids)
+        return self._get_api('friendships/no_retweets/ids.json', params)
+
+    def friends_ids(self, user_id=None, screen_name=None, cursor=None,
+                    stringify_ids=None, count=None):
+        """
+        Returns a page of the IDs of the users the specified user follows.
+
+        https://dev.twitter.com/docs/api/1.1/get/friends/ids
+
+        :param str user_id:
+            The ID of the user. If neither ``user_id`` nor ``screen_name`` is
+            given, the authenticating user is used.
+
+        :param str screen_name:
+            The screen name of the user.
+
+        :param int cursor:
+            The cursor of the page to get. ``-1`` is the first page.
+
+        :param bool stringify_ids:
+            When set to ``True``, IDs are returned as strings.
+
+        :param int count:
+            The number of IDs per page, up to 5000.
+
+        :returns:
+            A dict with the ``ids`` on the page and the ``next_cursor`` and
+            ``previous_cursor`` of the neighbouring pages.
+        """
+        params = self._ids_params(
+            user_id, screen_name, cursor, stringify_ids, count)
+        return self._get_api('friends/ids.json', params)
+
+    def friends_ids_cursor(self, user_id=None, screen_name=None, cursor=-1,
+                           count=None):
+        """
+        Iterate over the IDs of the users the specified user follows.
+
+        See :meth:`friends_ids` for the parameters.
+
+        :returns: A :class:`txtwitter.pagination.CursorIterator`.
+        """
+        return CursorIterator(lambda cursor: self.friends_ids(
+            user_id, screen_name, cursor=cursor, count=count), cursor)
+
+    def followers_ids(self, user_id=None, screen_name=None, cursor=None,
+                      stringify_ids=None, count=None):
+        """
+        Returns a page of the IDs of the users following the specified user.
+
+        https://dev.twitter.com/docs/api/1.1/get/followers/ids
+
+        See :meth:`friends_ids` for the parameters and return value.
+        """
+        params = self._ids_params(
+            user_id, screen_name, cursor, stringify_ids, count)
+        return self._get_api('followers/ids.json', params)
+
+    def followers_ids_cursor(self, user_id=None, screen_name=None, cursor=-1,
+                             count=None):
+        """
+        Iterate over the IDs of the users following the specified user.
+
+        See :meth:`friends_ids` for the parameters.
+
+        :returns: A :class:`txtwitter.pagination.CursorIterator`.
+        """
+        return CursorIterator(lambda cursor: self.followers_ids(
+            user_id, screen_name, cursor=cursor, count=count), cursor)
+
+    def _ids_params(self, user_id, screen_name, cursor, stringify_ids, count):
+        params = {}
+        set_str_param(params, 'user_id', user_id)
+        set_str_param(params, 'screen_name', screen_name)
+        set_int_param(params, 'cursor', cursor)
+        set_bool_param(params, 'stringify_ids', stringify_ids)
+        set_int_param(params, 'count', count, min=1, max=5000)
+        return params
+
+    def friendships_lookup(self, user_id=None, screen_name=None):
+        """
+        Returns the relationships of the authenticating user to up to 100
+        other users per request.
+
+        https://dev.twitter.com/docs/api/1.1/get/friendships/lookup
+
+        :param list user_id:
+            A list of user IDs. Up to 100 users may be given across
+            ``user_id`` and ``screen_name``.
+
+        :param list screen_name:
+            A list of screen names.
+
+        :returns:
+            A list of dicts with the ``id_str``, ``screen_name`` and
+            ``connections`` of each user.
+        """
+        params = {}
+        set_list_param(params, 'user_id', user_id, max_len=100)
+        set_list_param(params, 'screen_name', screen_name, max_len=100)
+        return self._get_api('friendships/lookup.json', params)
+
+    def friendships_lookup_all(self, user_ids=None, screen_names=None,
+                               callback=None, concurrency=4):
+        """
+        Look up any number of relationships with :meth:`friendships_lookup`.
+
+        Users may be given either by ID or by screen name, but not both. They
+        are split into requests of 100, and up to ``concurrency`` of the
+        requests are made at once.
+
+        :param user_ids: An iterable of user IDs of any length.
+
+        :param screen_names: An iterable of screen names of any length.
+
+        :param callback:
+            If given, each relationship is passed to this callable as soon as
+            the request it came from finishes, instead of being collected.
+
+        :param int concurrency: The maximum number of requests to make at once.
+
+        :returns:
+            A list of relationship dicts in the same order as the users given,
+            or the number of relationships found if there is a ``callback``.
+        """
+        return self._users_lookup_all(
+            self.friendships_lookup, user_ids, screen_names, callback,
+            concurrency)
+
+    def _users_lookup_all(self, lookup, user_ids, screen_names, callback,
+                          concurrency):
+        if (user_ids is None) == (screen_names is None):
+            raise ValueError(
+                "Exactly one of 'user_ids' and 'screen_names' is required.")
+        if user_ids is not None:
+            return lookup_all(
+                lambda chunk: lookup(user_id=chunk),
+                (str(user_id) for user_id in user_ids),
+                lambda user: user['id_str'], callback, concurrency)
+        # Screen names are case-insensitive.
+        return lookup_all(
+            lambda chunk: lookup(screen_name=chunk),
+            (name.lower() for name in screen_names),
+            lambda user: user['screen_name'].lower(), callback, concurrency)
+
     # TODO: Implement friendships_incoming()
     # TODO: Implement friendships_outgoing()
 
@@ -1020,10 +1931,137 @@ class TwitterClient(object):
     # TODO: Implement account_update_profile_colors()
     # TODO: Implement account_update_profile_image()
     # TODO: Implement blocks_list()
-    # TODO: Implement blocks_ids()
+
+    def blocks_ids(self, cursor=None, stringify_ids=None):
+        """
+        Returns a page of the IDs of the users the authenticating user is
+        blocking.
+
+        https://dev.twitter.com/docs/api/1.1/get/blocks/ids
+
+        :param int cursor:
+            The cursor of the page to get. ``-1`` is the first page.
+
+        :param bool stringify_ids:
+            When set to ``True``, IDs are returned as strings.
+
+        :returns:
+            A dict with the ``ids`` on the page and the ``next_cursor`` and
+            ``previous_cursor`` of the neighbouring pages.
+        """
+        params = {}
+        set_int_param(params, 'cursor', cursor)
+        set_bool_param(params, 'stringify_ids', stringify_ids)
+        return self._get_api('blocks/ids.json', params)
+
+    def blocks_ids_cursor(self, cursor=-1):
+        """
+        Iterate over the IDs of the users the authenticating user is
+        blocking.
+
+        :param int cursor: The cursor to start at.
+
+        :returns: A :class:`txtwitter.pagination.CursorIterator`.
+        """
+        return CursorIterator(
+            lambda cursor: self.blocks_ids(cursor=cursor), cursor)
+
     # TODO: Implement blocks_create()
     # TODO: Implement blocks_destroy()
-    # TODO: Implement users_lookup()
+
+    def users_lookup(self, user_id=None, screen_name=None,
+                     include_entities=None):
+        """
+        Returns fully-hydrated user objects for up to 100 users per request.
+
+        https://dev.twitter.com/docs/api/1.1/get/users/lookup
+
+        :param list user_id:
+            A list of user IDs. Up to 100 users may be given across
+            ``user_id`` and ``screen_name``.
+
+        :param list screen_name:
+            A list of screen names.
+
+        :param bool include_entities:
+            When set to ``False``, the ``entities`` node will not be included.
+
+        :returns:
+            A list of user dicts, in no particular order. Users that don't
+            exist or are suspended are left out.
+        """
+        params = {}
+        set_list_param(params, 'user_id', user_id, max_len=100)
+        set_list_param(params, 'screen_name', screen_name, max_len=100)
+        set_bool_param(params, 'include_entities', include_entities)
+        return self._get_api('users/lookup.json', params)
+
+    def users_lookup_all(self, user_ids=None, screen_names=None,
+                         callback=None, concurrency=4, include_entities=None):
+        """
+        Look up any number of users with :meth:`users_lookup`.
+
+        Users may be given either by ID or by screen name, but not both. They
+        are split into requests of 100, and up to ``concurrency`` of the
+        requests are made at once.
+
+        :param user_ids: An iterable of user IDs of any length.
+
+        :param screen_names: An iterable of screen names of any length.
+
+        :param callback:
+            If given, each user is passed to this callable as soon as the
+            request it came from finishes, instead of being collected.
+
+        :param int concurrency: The maximum number of requests to make at once.
+
+        :param bool include_entities:
+            When set to ``False``, the ``entities`` node will not be included.
+
+        :returns:
+            A list of user dicts in the same order as the users given, or the
+            number of users found if there is a ``callback``. Users that don't
+            exist or are suspended are left out.
+        """
+        def lookup(**kw):
+            return self.users_lookup(include_entities=include_entities, **kw)
+
+        return self._users_lookup_all(
+            lookup, user_ids, screen_names, callback, concurrency)
+
+    def load_user(self, user_id=None, screen_name=None):
+        """
+        Look up a single user, batched with other lookups.
+
+        Users asked for at about the same time (see ``batch_window``) are
+        fetched together with :meth:`users_lookup`. Exactly one of
+        ``user_id`` and ``screen_name`` is required.
+
+        :param str user_id: The ID of the user.
+
+        :param str screen_name: The screen name of the user.
+
+        :returns:
+            A ``Deferred`` that fires with a user dict, or fails with
+            :class:`txtwitter.error.NotFoundError` if the user doesn't exist
+            or is suspended.
+        """
+        if (user_id is None) == (screen_name is None):
+            raise ValueError(
+                "Exactly one of 'user_id' and 'screen_name' is required.")
+        if user_id is not None:
+            loader = self._loader(
+                'user_id',
+                lambda client, ids: client.users_lookup(user_id=ids),
+                lambda user: user['id_str'])
+            return loader.load(str(user_id))
+        # Screen names are case-insensitive.
+        loader = self._loader(
+            'screen_name',
+            lambda client, names: client.users_lookup(screen_name=names),
+            lambda user: user['screen_name'].lower())
+        return loader.load(screen_name.lower())
+
     # TODO: Implement users_show()
     # TODO: Implement users_search()
     # TODO: Implement users_contributees()
@@ -1101,4 +2139,34 @@ class TwitterClient(object):
     # TODO: Implement help_languages()
     # TODO: Implement help_privacy()
     # TODO: Implement help_tos()
-    # TODO: Implement application_rate_limit_status()
+
+    def application_rate_limit_status(self, resources=None):
+        """
+        Returns the current rate limits for methods belonging to the specified
+        resource families.
+
+        https://dev.twitter.com/docs/api/1.1/get/application/rate_limit_status
+
+        If this client has a rate limit registry, it is updated with the
+        returned limits.
+
+        :param list resources:
+            A list of resource families (such as ``'statuses'`` or
+            ``'friends'``) to return limits for. If not provided, limits for
+            all resource families are returned.
+
+        :returns:
+            A dict containing a ``resources`` dict, mapping resource family
+            names to dicts of endpoint limits.
+        """
+        params = {}
+        if resources is not None:
+            params['resources'] = ','.join(resources)
+        d = self._get_api('application/rate_limit_status.json', params)
+        if self._rate_limits is not None:
+            d.addCallback(self._update_rate_limit_status)
+        return d
+
+    def _update_rate_limit_status(self, status):
+        self._rate_limits.update_from_status(self._token_key, status)
+        return status